@@ -0,0 +1,369 @@
+"""
+Simulation and rendering throughput benchmarks.
+
+Runs headless (SDL dummy video driver) from the repository root:
+
+    python -m benchmarks.bench                      # run, print, write results
+    python -m benchmarks.bench --save-baseline      # ...and store them as the baseline
+    python -m benchmarks.bench --threshold 0.2 --limit track_draw_ms=0.5
+
+Every result is compared with the baseline (if one exists); the run exits
+with status 1 when any metric regressed by more than its threshold, given
+as a fraction of the baseline value. Baselines are machine specific, so
+record one on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+RESULTS = os.path.join(HERE, "results.json")
+THRESHOLD = 0.15          # default allowed regression, fraction of baseline
+MIN_TIME = 0.5            # seconds spent measuring each metric
+
+ENV_CARS = (4, 8, 16)
+BATCH_RACES = 1024
+SIM_CARS = (6, 12, 20)
+LOD_CARS = 40
+LOD_WARMUP = 600          # ticks raced before measuring, so the grid has spread out
+DRAW_FRAMES = 60
+
+
+def _rate(fn, min_time, repeats=3):
+    """Best calls-per-second of fn() over `repeats` runs sharing `min_time` seconds."""
+    fn()  # warm caches
+    best = 0.0
+    for _ in range(repeats):
+        n, t0 = 0, time.perf_counter()
+        while True:
+            fn()
+            n += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time / repeats:
+                break
+        best = max(best, n / elapsed)
+    return best
+
+
+def _frame_ms(fn, frames):
+    """Median milliseconds per call of fn(i) over `frames` calls."""
+    fn(0)
+    times = []
+    for i in range(1, frames + 1):
+        t0 = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times) * 1000)
+
+
+class _FreeClock:
+    """Stands in for pygame's Clock so draw loops are not capped at 60 FPS."""
+    def tick(self, framerate=0):
+        return 16
+
+
+# ---------- Simulation ----------
+def bench_env_step(results, min_time):
+    from src.env.race_env import RaceEnvironment
+    for n in ENV_CARS:
+        env = RaceEnvironment(n=n, laps=10**6, seed=0)
+        actions = [0.8] * n
+        results[f"env_step_n{n}"] = (_rate(lambda: env.step(actions), min_time), "steps/s", "higher")
+
+
+def bench_batch_env(results, min_time):
+    """Car-steps/s of BatchRaceEnvironment over BATCH_RACES 4-car races, and its gain over RaceEnvironment."""
+    from src.env.batch_env import BatchRaceEnvironment
+    from src.env.race_env import RaceEnvironment
+    env = RaceEnvironment(n=4, laps=10**6, seed=0)
+    single = _rate(lambda: env.step([0.8] * 4), min_time) * 4
+    batch = BatchRaceEnvironment(n_races=BATCH_RACES, n=4, laps=10**6, seed=0)
+    actions = np.random.default_rng(0).uniform(-0.2, 1.0, (BATCH_RACES, 4))
+    rate = _rate(lambda: batch.step(actions), min_time) * BATCH_RACES * 4
+    results["batch_env_car_steps"] = (rate, "car-steps/s", "higher")
+    results["batch_env_speedup"] = (rate / single, "x", "higher")
+
+
+def bench_sim_step(results, min_time):
+    from src.sim.engine import SimulationManager
+    for n in SIM_CARS:
+        sim = SimulationManager(seed=0, n_cars=n)
+        sim.race_started = True
+        results[f"sim_step_cars{n}"] = (_rate(sim.step, min_time), "steps/s", "higher")
+
+
+def bench_sim_lod(results, min_time):
+    """A big grid with and without physics level of detail, viewed like the admin viewport."""
+    from src.sim.engine import SimulationManager
+    for name, lod in (("full", False), ("lod", True)):
+        sim = SimulationManager(seed=0, n_cars=LOD_CARS, lod=lod)
+        sim.race_started = True
+
+        def step():
+            car = sim.focused_car
+            sim.set_view((car.x - 400, car.y - 300, 800, 600))
+            sim.step()
+        for _ in range(LOD_WARMUP):
+            step()
+        results[f"sim_step_{name}_cars{LOD_CARS}"] = (_rate(step, min_time), "steps/s", "higher")
+
+
+def bench_record(results, min_time):
+    """Step rates with a TelemetryRecorder attached, to compare with env_step/sim_step."""
+    from src.env.race_env import RaceEnvironment
+    from src.sim.engine import SimulationManager
+    with tempfile.TemporaryDirectory() as tmp:
+        env = RaceEnvironment(n=16, laps=10**6, seed=0)
+        env.record_to(os.path.join(tmp, "env"))
+        actions = [0.8] * 16
+        results["env_step_rec_n16"] = (_rate(lambda: env.step(actions), min_time), "steps/s", "higher")
+        env.stop_recording()
+        sim = SimulationManager(seed=0)
+        sim.race_started = True
+        sim.record_to(os.path.join(tmp, "sim"))
+        results["sim_step_rec_cars6"] = (_rate(sim.step, min_time), "steps/s", "higher")
+        sim.stop_recording()
+
+
+def bench_cars(results, min_time):
+    """Per-car memory and update rate of the slotted Car."""
+    from src.env.car import Car
+    from src.env.track import TrackSection
+    n = 10000
+
+    tracemalloc.start()
+    cars = [Car(i) for i in range(n)]
+    results["car_bytes"] = (tracemalloc.get_traced_memory()[0] / n, "bytes/car", "lower")
+    tracemalloc.stop()
+    del cars
+
+    corner = TrackSection("corner", 200, radius=60)
+    car = Car(0)
+
+    def update():
+        car.speed, car.damage, car.done = 50.0, 0.0, False
+        car.update(0.8, corner)
+    results["car_update"] = (_rate(update, min_time), "updates/s", "higher")
+
+
+def bench_section_at(results, min_time):
+    from src.env.track import Track
+    track = Track()
+    rng = random.Random(0)
+    positions = [rng.uniform(0, track.length * 3) for _ in range(1000)]
+
+    def lookups():
+        for p in positions:
+            track.section_at(p)
+    results["section_at"] = (_rate(lookups, min_time) * len(positions), "lookups/s", "higher")
+
+
+def bench_lap_time(results, min_time):
+    """Cached speed-profile queries over a spread of tyre wear and damage."""
+    from src.core.tracks import get_track
+    from src.env.speed_profile import lap_time
+    track = get_track("night")["physics"]
+    rng = random.Random(0)
+    states = [(rng.uniform(0, 0.6), rng.uniform(0, 0.3)) for _ in range(1000)]
+
+    def lookups():
+        for wear, damage in states:
+            lap_time(track, wear, damage)
+    results["lap_time"] = (_rate(lookups, min_time) * len(states), "lookups/s", "higher")
+
+
+def bench_strategy(results, min_time):
+    """Full pit-strategy decisions: every 0-2 stop compound sequence, 2000 rollouts each."""
+    from src.core.tracks import get_track
+    from src.sim.strategy import StrategyEvaluator, even_plans
+    evaluator = StrategyEvaluator(get_track("forest")["physics"], laps=50, seed=0)
+    plans = even_plans(50)
+    results[f"strategy_plans{len(plans)}"] = (
+        _rate(lambda: evaluator.evaluate(plans, lap=10, fuel=60.0, tire_wear=30.0), min_time),
+        "decisions/s", "higher")
+
+
+def bench_track_geometry(results, min_time):
+    """Building the admin track's geometry from its control points, against loading the cached bundle."""
+    from src.sim.geometry import compile_track
+    points = [(600, 1400), (1200, 1400), (1800, 1300), (2300, 1000), (2300, 600),
+              (1800, 400), (1200, 400), (800, 600), (600, 900), (700, 1200)]
+    kwargs = dict(spline_steps=50, width=240, barrier_width=25, start=(1200, 1400))
+    with tempfile.TemporaryDirectory() as cache:
+        results["track_compile"] = (
+            _rate(lambda: compile_track(points, cache_dir=False, **kwargs), min_time), "tracks/s", "higher")
+        results["track_load_cached"] = (
+            _rate(lambda: compile_track(points, cache_dir=cache, **kwargs), min_time), "tracks/s", "higher")
+
+
+# ---------- Rendering ----------
+def bench_track_draw(results, frames):
+    import pygame
+    import main_game
+    main_game.init_display()
+    track = main_game.Track()
+    view = pygame.Surface(main_game.viewport_rect().size)
+    w, h = view.get_size()
+    pts = track.waypoints
+
+    def draw(i):
+        x, y = pts[i % len(pts)]
+        track.draw(view, (x - w / 2, y - h / 2))
+    results["track_draw_ms"] = (_frame_ms(draw, frames), "ms/frame", "lower")
+
+
+def bench_draw_race(results, frames):
+    import main
+    from src.core.tracks import get_track
+    from src.env.race_env import RaceEnvironment
+    game = main.Game()
+    game.ui.clock = _FreeClock()
+    track = get_track("desert")
+    env = RaceEnvironment(track=track["physics"], n=4, laps=10**6, seed=0)
+    game.ui.set_track(track, env)
+
+    def frame(i):
+        env.step([0.6] * 4)
+        game.ui.draw_race()
+    results["display_draw_race_ms"] = (_frame_ms(frame, frames), "ms/frame", "lower")
+
+
+def bench_admin_panels(results, frames):
+    import main_game
+    main_game.init_display()
+    sim = main_game.SimulationManager(seed=0)
+    sim.race_started = True
+    panels = main_game.build_panels()
+    viewport = panels.widgets[0]
+
+    def follow():
+        car = sim.focused_car
+        viewport.cam = (car.x - viewport.rect.w / 2, car.y - viewport.rect.h / 2)
+
+    def full(i):
+        follow()
+        panels.invalidate()
+        panels.update(main_game.screen, sim)
+
+    def incremental(i):
+        sim.step()
+        follow()
+        panels.update(main_game.screen, sim)
+    results["admin_panels_full_ms"] = (_frame_ms(full, frames), "ms/frame", "lower")
+    results["admin_panels_step_ms"] = (_frame_ms(incremental, frames), "ms/frame", "lower")
+
+
+SUITES = {
+    "env_step": bench_env_step,
+    "batch_env": bench_batch_env,
+    "sim_step": bench_sim_step,
+    "sim_lod": bench_sim_lod,
+    "record": bench_record,
+    "cars": bench_cars,
+    "section_at": bench_section_at,
+    "lap_time": bench_lap_time,
+    "strategy": bench_strategy,
+    "track_geometry": bench_track_geometry,
+    "track_draw": bench_track_draw,
+    "draw_race": bench_draw_race,
+    "admin_panels": bench_admin_panels,
+}
+RENDER_SUITES = {"track_draw", "draw_race", "admin_panels"}
+
+
+def run(suites, min_time=MIN_TIME, frames=DRAW_FRAMES):
+    results = {}
+    for name in suites:
+        arg = frames if name in RENDER_SUITES else min_time
+        SUITES[name](results, arg)
+    return {k: {"value": v, "unit": unit, "better": better}
+            for k, (v, unit, better) in results.items()}
+
+
+def compare(results, baseline, threshold=THRESHOLD, limits=None):
+    """Rows of (metric, baseline, current, change, limit, regressed); change > 0 is worse."""
+    rows = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        if cur["better"] == "higher":
+            change = -change
+        limit = (limits or {}).get(name, threshold)
+        rows.append((name, base["value"], cur["value"], change, limit, change > limit))
+    return rows
+
+
+def _parse_limits(items):
+    limits = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if not value:
+            raise SystemExit(f"--limit expects NAME=FRACTION, got {item!r}")
+        limits[name] = float(value)
+    return limits
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--suite", action="append", choices=sorted(SUITES),
+                    help="run only these suites (repeatable)")
+    ap.add_argument("--out", default=RESULTS, help="where to write results JSON")
+    ap.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare against")
+    ap.add_argument("--save-baseline", action="store_true", help="also write results as the baseline")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD,
+                    help="allowed regression as a fraction of the baseline (default %(default)s)")
+    ap.add_argument("--limit", action="append", default=[], metavar="NAME=FRACTION",
+                    help="per-metric threshold override (repeatable)")
+    ap.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds per throughput metric")
+    ap.add_argument("--frames", type=int, default=DRAW_FRAMES, help="frames per rendering metric")
+    args = ap.parse_args(argv)
+    limits = _parse_limits(args.limit)
+
+    results = run(args.suite or list(SUITES), args.min_time, args.frames)
+    doc = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+           "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                       "cpus": os.cpu_count()},
+           "results": results}
+    with open(args.out, "w") as f:
+        json.dump(doc, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(doc, f, indent=2)
+
+    for name, r in results.items():
+        print(f"{name:<24}{r['value']:>14.2f} {r['unit']}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        if not args.save_baseline:
+            print(f"\nno baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    rows = compare(results, baseline, args.threshold, limits)
+    print(f"\n{'metric':<24}{'baseline':>12}{'current':>12}{'change':>9}{'limit':>8}")
+    for name, base, cur, change, limit, bad in rows:
+        print(f"{name:<24}{base:>12.2f}{cur:>12.2f}{change:>+9.1%}{limit:>8.0%}"
+              f"{'  REGRESSED' if bad else ''}")
+    failed = [r[0] for r in rows if r[5]]
+    if failed:
+        print(f"\n{len(failed)} metric(s) regressed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
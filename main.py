@@ -1,16 +1,26 @@
 import pygame
 import random
+import shutil
 import sys
+import tempfile
+from src.core.events import MAJOR, print_events
 from src.env.race_env import RaceEnvironment
+from src.env.replay_env import ReplayEnvironment
 from src.ui.display import Display, Button
 from src.core.tracks import get_track
+from src.core.timestep import FixedTimestep
+from src.env.car import DT
 
 class Game:
     def __init__(self):
         self.ui = Display()
         self.game_state = "main_menu"
         self.env = None
+        self.replay = None
+        self.recording = None  # telemetry directory of the last race
         self.selected_track_key = None
+        self.timestep = FixedTimestep(DT)
+        self.frame_time = 0.0
         self.setup_buttons()
 
     def setup_buttons(self):
@@ -28,6 +38,7 @@ class Game:
 
             # Race End
             "main_menu": Button(self.ui.width/2 - 150, 600, 300, 80, "MAIN MENU", (80, 80, 80), (120, 120, 120)),
+            "replay": Button(self.ui.width/2 - 150, 700, 300, 80, "REPLAY", (0, 90, 160), (30, 130, 210)),
         }
         
         # Dynamically position track buttons
@@ -49,6 +60,8 @@ class Game:
                 self.racing_loop()
             elif self.game_state == "race_end":
                 self.race_end_loop()
+            elif self.game_state == "replay":
+                self.replay_loop()
 
     def main_menu_loop(self):
         while self.game_state == "main_menu":
@@ -90,28 +103,50 @@ class Game:
     def start_race(self, track_key):
         self.selected_track_key = track_key
         track_data = get_track(track_key)
+        self.discard_recording()
         self.env = RaceEnvironment(track=track_data["physics"], n=4, laps=3)
+        self.env.events.set_level(MAJOR)
+        self.env.events.subscribe(print_events)  # flags, retirements and finishes on the console
+        # every race is logged so it can be replayed from the race-end screen;
+        # discard_recording() keeps only the latest log on disk
+        self.env.record_to(tempfile.mkdtemp(prefix=f"f1-{track_key}-"))
         self.ui.set_track(track_data, self.env)
+        self.timestep.set_scale(1)
+        self.frame_time = 0.0
         self.game_state = "racing"
 
     def racing_loop(self):
         if self.env.finished():
-            self.game_state = "race_end"
+            self.finish_race()
             return
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.quit_game()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                self.timestep.cycle_scale()
+            self.ui.profiler_overlay.handle_event(event)
         
-        # Your simulation logic
-        acts = [random.uniform(-1, 1) for _ in self.env.cars]
-        self.env.step(acts)
-        self.ui.draw_race()
+        # Your simulation logic, at a fixed DT however fast frames are drawn
+        for _ in self.timestep.steps(self.frame_time):
+            acts = [random.uniform(-1, 1) for _ in self.env.cars]
+            self.ui.remember_positions()
+            self.env.step(acts)
+            if self.env.finished():
+                break
+        self.frame_time = self.ui.draw_race(self.timestep.alpha, self.timestep.label())
+
+    def finish_race(self):
+        self.recording = self.env.recorder.path
+        self.env.stop_recording()
+        self.game_state = "race_end"
 
     def race_end_loop(self):
+        buttons = [self.buttons["main_menu"], self.buttons["replay"]]
         while self.game_state == "race_end":
             mouse_pos = pygame.mouse.get_pos()
-            self.buttons["main_menu"].check_hover(mouse_pos)
+            for button in buttons:
+                button.check_hover(mouse_pos)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -119,10 +154,65 @@ class Game:
                 if self.buttons["main_menu"].is_clicked(event):
                     self.game_state = "main_menu"
                     return # Exit loop
-            
-            self.ui.draw_race_end(self.buttons["main_menu"])
+                if self.buttons["replay"].is_clicked(event):
+                    self.start_replay()
+                    return
+
+            self.ui.draw_race_end(buttons)
+
+    def start_replay(self):
+        track_data = get_track(self.selected_track_key)
+        self.replay = ReplayEnvironment(self.recording, track=self.env.track)
+        self.ui.set_track(track_data, self.replay)
+        self.paused = False
+        self.frame_time = 0.0
+        self.game_state = "replay"
+
+    def replay_loop(self):
+        """
+        Scrubs through the recorded race: LEFT/RIGHT change speed (down into
+        reverse), SPACE pauses, HOME/END jump to either end, 1-9 to the
+        leader's lap start and ESC goes back to the results.
+        """
+        replay = self.replay
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.quit_game()
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key == pygame.K_ESCAPE:
+                self.ui.set_track(get_track(self.selected_track_key), self.env)
+                self.game_state = "race_end"
+                return
+            if event.key == pygame.K_SPACE:
+                self.paused = not self.paused
+            elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                replay.replay.cycle_speed(1 if event.key == pygame.K_RIGHT else -1)
+            elif event.key == pygame.K_HOME:
+                replay.seek(replay.replay.start)
+            elif event.key == pygame.K_END:
+                replay.seek(replay.replay.end)
+            elif pygame.K_1 <= event.key <= pygame.K_9:
+                replay.seek_lap(event.key - pygame.K_1)
+            self.ui.profiler_overlay.handle_event(event)
+
+        if not self.paused:
+            replay.advance(self.frame_time)
+        label = "PAUSED" if self.paused else f"REPLAY {replay.replay.label()}"
+        self.frame_time = self.ui.draw_race(1.0, label, "[</> SPACE 1-9 ESC]")
+
+    def discard_recording(self):
+        """Deletes the last race's telemetry log, stopping it first if the race is still running."""
+        if self.env is not None and self.env.recorder is not None:
+            self.recording = self.env.recorder.path
+            self.env.stop_recording()
+        self.replay = None  # drops the log's memory maps
+        if self.recording:
+            shutil.rmtree(self.recording, ignore_errors=True)
+            self.recording = None
 
     def quit_game(self):
+        self.discard_recording()
         self.ui.close()
         pygame.quit()
         sys.exit()
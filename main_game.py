@@ -1,46 +1,27 @@
 
+import argparse
 import math
-import random
+import numpy as np
 import pygame
-from collections import deque
-import Box2D  # Import the physics engine
-from Box2D.b2 import world, polygonShape, dynamicBody, staticBody
+from src.sim import engine
+from src.sim import replay as sim_replay
+from src.core.profiler import profiler
+from src.core.timestep import FixedTimestep
+from src.ui.profiler_overlay import ProfilerOverlay
+from src.ui.sprites import SpriteCache
+from src.ui.text import text_cache
+from src.ui.track_layer import StaticLayer
+from src.ui.widgets import Widget, WidgetGroup
+from src.sim.engine import (PPM, WORLD_W, WORLD_H, FPS, TIME_STEP, NUM_AI, LAPS_TO_FINISH,
+                            ACCEL_FORCE, BRAKE_FORCE, TURN_TORQUE, DRAG, TIRE_COMPOUNDS,
+                            ENGINE_MODES, clamp, lerp, catmull_rom_spline, AIController)
 
 # ---------- CONFIG ----------
-pygame.init()
-info = pygame.display.Info()
-SCREEN_W, SCREEN_H = info.current_w, info.current_h
+# The simulation itself lives in src/sim/engine.py; this module is only the
+# pygame front-end. Display, screen size and fonts are set up by init_display()
+# so that importing this module never opens a window.
 BASE_W, BASE_H = 1920, 1080
-
-# Physics world scaling factor (Box2D works best with small numbers)
-PPM = 20.0
-
-WORLD_W, WORLD_H = 3000, 2000
-FPS = 60
-TIME_STEP = 1.0 / FPS
-
-NUM_AI = 9
-LAPS_TO_FINISH = 5
-
-# Car physics (now used to apply forces)
-ACCEL_FORCE = 180.0
-BRAKE_FORCE = 220.0
-TURN_TORQUE = 200.0  # This will be modulated by the smooth steering
-DRAG = 0.992 # Kept for high-speed drag simulation
-
-# Tire compounds
-TIRE_COMPOUNDS = {
-    'soft': {'grip': 1.25, 'color': (255, 50, 50)},
-    'medium': {'grip': 1.0, 'color': (255, 200, 0)},
-    'hard': {'grip': 0.85, 'color': (220, 220, 220)},
-}
-
-# Engine modes
-ENGINE_MODES = {
-    'qualifying': {'power': 1.15},
-    'race': {'power': 1.0},
-    'conservation': {'power': 0.8},
-}
+SCREEN_W, SCREEN_H = BASE_W, BASE_H
 
 # Colors
 WHITE = (255, 255, 255)
@@ -60,10 +41,36 @@ GRASS_GREEN = (118, 188, 74)
 SAND_YELLOW = (230, 218, 158)
 UI_BORDER = (60, 65, 75)
 
+# Colours baked into the cached track layer; changing a Track's theme rebuilds it
+TRACK_THEME = {
+    "grass": GRASS_GREEN,
+    "sand": SAND_YELLOW,
+    "asphalt": TRACK_GRAY,
+    "barrier": (RED, WHITE),
+    "kerb": (RED, WHITE),
+    "pit": (50, 50, 65),
+}
+
+screen = None
+clock = None
+font_xs = font_sm = font_md = font_lg = font_xl = None
+
+def init_display():
+    """Initializes pygame, opens the full-screen admin window and loads fonts."""
+    global SCREEN_W, SCREEN_H, screen, clock, font_xs, font_sm, font_md, font_lg, font_xl
+    pygame.init()
+    info = pygame.display.Info()
+    SCREEN_W, SCREEN_H = info.current_w, info.current_h
+
+    screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+    pygame.display.set_caption("F1 Race Control - Admin Panel")
+    clock = pygame.time.Clock()
 
-screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
-pygame.display.set_caption("F1 Race Control - Admin Panel")
-clock = pygame.time.Clock()
+    font_xs = pygame.font.SysFont("Consolas", get_scaled_font_size(12))
+    font_sm = pygame.font.SysFont("Consolas", get_scaled_font_size(14))
+    font_md = pygame.font.SysFont("Consolas", get_scaled_font_size(16))
+    font_lg = pygame.font.SysFont("Consolas", get_scaled_font_size(18), bold=True)
+    font_xl = pygame.font.SysFont("Consolas", get_scaled_font_size(22), bold=True)
 
 # ========== DYNAMIC FONT AND UI SCALING ==========
 def scale_x(val): return int(val * (SCREEN_W / BASE_W))
@@ -72,88 +79,60 @@ def get_scaled_font_size(base_size):
     scale_factor = min(SCREEN_W / BASE_W, SCREEN_H / BASE_H)
     return max(10, int(base_size * scale_factor))
 
-font_xs = pygame.font.SysFont("Consolas", get_scaled_font_size(12))
-font_sm = pygame.font.SysFont("Consolas", get_scaled_font_size(14))
-font_md = pygame.font.SysFont("Consolas", get_scaled_font_size(16))
-font_lg = pygame.font.SysFont("Consolas", get_scaled_font_size(18), bold=True)
-font_xl = pygame.font.SysFont("Consolas", get_scaled_font_size(22), bold=True)
-
-def clamp(x, a, b): return max(a, min(b, x))
-def lerp(a, b, t): return a + (b - a) * t
-
-def catmull_rom_spline(p0, p1, p2, p3, t):
-    t2, t3 = t * t, t * t * t
-    x = 0.5 * ((2 * p1[0]) + (-p0[0] + p2[0]) * t + (2 * p0[0] - 5 * p1[0] + 4 * p2[0] - p3[0]) * t2 + (-p0[0] + 3 * p1[0] - 3 * p2[0] + p3[0]) * t3)
-    y = 0.5 * ((2 * p1[1]) + (-p0[1] + p2[1]) * t + (2 * p0[1] - 5 * p1[1] + 4 * p2[1] - p3[1]) * t2 + (-p0[1] + 3 * p1[1] - 3 * p2[1] + p3[1]) * t3)
-    return x, y
-
 # ---------- Track ----------
-class Track:
+class Track(engine.Track):
     def __init__(self):
-        """
-        Redesigned F1-style circuit:
-        - Start/finish straight in the center horizontally
-        - Long flowing corners
-        - Pit lane parallel to main straight
-        """
-        # Wider, longer F1-style layout (roughly "loop" with chicane)
-        control_points = [
-            (600, 1400), (1200, 1400), (1800, 1300), (2300, 1000), (2300, 600),
-            (1800, 400), (1200, 400), (800, 600), (600, 900), (700, 1200)
-        ]
-
-        self.waypoints = []
-        num_points = len(control_points)
-        for i in range(num_points):
-            p0, p1 = control_points[(i - 1 + num_points) % num_points], control_points[i]
-            p2, p3 = control_points[(i + 1) % num_points], control_points[(i + 2) % num_points]
-            for t_step in range(50):  # smoother curvature
-                self.waypoints.append(catmull_rom_spline(p0, p1, p2, p3, t_step / 50.0))
-
-        # Geometry parameters
-        self.track_width, self.barrier_width = 240, 25
-
-        # Start line near center, on main straight
-        self.start_line = (1200, 1400)
-
-        # Pit lane parallel to main straight
-        self.pit_entry = (1200, 1500)
-        self.pit_exit = (1800, 1500)
-        self.pit_rect = pygame.Rect(1150, 1480, 750, 100)
+        super().__init__()
+        self.theme = dict(TRACK_THEME)
+        self._layer = StaticLayer(self.draw_static, self.static_bounds)
 
+    @profiler.timed("draw.track")
     def draw(self, surf, cam_offset):
-        surf.fill(GRASS_GREEN)
-        pygame.draw.rect(surf, GRASS_GREEN, (0, 0, surf.get_width(), surf.get_height()))
+        # Everything on the track is static: blit the visible part of the
+        # pre-rendered layer instead of redrawing ~500 segments per frame.
+        surf.fill(self.theme["grass"])
+        self._layer.blit(surf, cam_offset, self._layer_key())
+
+    def _layer_key(self):
+        return (id(self.geometry), id(self.waypoints), len(self.waypoints), self.track_width,
+                self.barrier_width, tuple(self.pit_rect), tuple(self.start_line), tuple(self.theme.items()))
+
+    def static_bounds(self):
+        """World rect (x, y, w, h) covered by draw_static, with the sand run-off."""
+        reach = (self.track_width + 180) / 2 + 2
+        xs = [p[0] for p in self.waypoints]
+        ys = [p[1] for p in self.waypoints]
+        px, py, pw, ph = self.pit_rect
+        x0, y0 = min(min(xs) - reach, px), min(min(ys) - reach, py)
+        x1, y1 = max(max(xs) + reach, px + pw), max(max(ys) + reach, py + ph)
+        return math.floor(x0), math.floor(y0), math.ceil(x1 - x0) + 1, math.ceil(y1 - y0) + 1
+
+    def draw_static(self, surf, cam_offset):
+        surf.fill(self.theme["grass"])
 
         # Draw sand background (large to prevent leaks)
         track_points = [(p[0] - cam_offset[0], p[1] - cam_offset[1]) for p in self.waypoints]
-        pygame.draw.lines(surf, SAND_YELLOW, True, track_points, self.track_width + 180)
+        pygame.draw.lines(surf, self.theme["sand"], True, track_points, self.track_width + 180)
 
         # Draw main asphalt track
-        pygame.draw.lines(surf, TRACK_GRAY, True, track_points, self.track_width + 20)
-
-        # Barriers
-        for i, p1 in enumerate(track_points):
-            p2 = track_points[(i + 1) % len(track_points)]
-            dx, dy = p2[0] - p1[0], p2[1] - p1[1]
-            mag = math.hypot(dx, dy)
-            if mag == 0:
-                continue
-            nx, ny = -dy / mag, dx / mag
-            offset = self.track_width / 2 + self.barrier_width / 2
-
-            p1_outer = (p1[0] + nx * offset, p1[1] + ny * offset)
-            p2_outer = (p2[0] + nx * offset, p2[1] + ny * offset)
-            p1_inner = (p1[0] - nx * offset, p1[1] - ny * offset)
-            p2_inner = (p2[0] - nx * offset, p2[1] - ny * offset)
-
-            color = RED if (i % 16 < 8) else WHITE
-            pygame.draw.line(surf, color, p1_outer, p2_outer, self.barrier_width)
-            pygame.draw.line(surf, color, p1_inner, p2_inner, self.barrier_width)
+        pygame.draw.lines(surf, self.theme["asphalt"], True, track_points, self.track_width + 20)
+
+        # Kerbs and barriers come precompiled with the track geometry
+        geo, cam = self.geometry, (cam_offset[0], cam_offset[1])
+        kerb = self.theme["kerb"]
+        for quad, seg in zip((geo.kerbs - cam).tolist(), geo.kerb_seg.tolist()):
+            pygame.draw.polygon(surf, kerb[0] if seg % 4 < 2 else kerb[1], quad)
+
+        barrier = self.theme["barrier"]
+        outer, inner = (geo.barrier_outer - cam).tolist(), (geo.barrier_inner - cam).tolist()
+        for i in np.flatnonzero(geo.seg_len > 0).tolist():
+            color = barrier[0] if (i % 16 < 8) else barrier[1]
+            pygame.draw.line(surf, color, *outer[i], self.barrier_width)
+            pygame.draw.line(surf, color, *inner[i], self.barrier_width)
 
         # Draw pit lane
-        pit_rect = self.pit_rect.move(-cam_offset[0], -cam_offset[1])
-        pygame.draw.rect(surf, (50, 50, 65), pit_rect)
+        pit_rect = pygame.Rect(self.pit_rect).move(-cam_offset[0], -cam_offset[1])
+        pygame.draw.rect(surf, self.theme["pit"], pit_rect)
         pygame.draw.rect(surf, WHITE, pit_rect, 2)
         pit_text = font_sm.render("PIT LANE", True, YELLOW)
         surf.blit(pit_text, (pit_rect.x + 10, pit_rect.y + 10))
@@ -175,329 +154,90 @@ class Track:
             pygame.draw.circle(surf, WHITE, (int(x - cam_offset[0]), int(y - cam_offset[1])), 3)
 
 
-
 # ---------- Car ----------
-class Car:
-    def __init__(self, sim_world, id, x, y, color, team_name):
-        # Telemetry-related properties
-        self.fuel = 100.0          # percentage
-        self.tire_wear = 0.0       # percentage
-        self.tire_temp = 45.0      # °C
-        self.brake_temp = 40.0     # °C
-        self.engine_temp = 85.0    # °C
-        self.ers = 100.0           # %
-        self.downforce_level = 5
-        self.drs_enabled = False
-
-        self.id, self.team_name, self.color = id, team_name, color
-        self.width, self.length = 20, 36
-        
-        # ========== PyBox2D BODY CREATION ==========
-        self.body = sim_world.CreateDynamicBody(
-            position=(x / PPM, y / PPM),
-            angle=0,
-            linearDamping=0.8,   # Simulates friction and air resistance
-            angularDamping=4.0, # Makes turning more stable
-        )
-        self.body.userData = self # Link the body back to the car object
-        shape = polygonShape(box=(self.length / 2 / PPM, self.width / 2 / PPM))
-        self.body.CreateFixture(shape=shape, density=1.0)
-        # ==========================================
-        
-        # Public properties read from physics body
-        self.x, self.y, self.angle, self.speed = x, y, 0, 0
+def render_car_sprite(key):
+    """Unrotated car body for a (color, tire compound, length, width) sprite key."""
+    color, compound, length, width = key
+    car_surf = pygame.Surface((length, width), pygame.SRCALPHA)
+    pygame.draw.rect(car_surf, color, (0, 0, length, width), border_radius=4)
+    pygame.draw.rect(car_surf, (30, 30, 30), (length * 0.4, 4, length * 0.25, width - 8), border_radius=2)
+    tire_color = TIRE_COMPOUNDS[compound]['color']
+    pygame.draw.circle(car_surf, tire_color, (length - 8, 4), 3)
+    pygame.draw.circle(car_surf, tire_color, (length - 8, width - 4), 3)
+    return car_surf
+
+CAR_SPRITES = SpriteCache(render_car_sprite)
+
+class CarSprite:
+    """Drawing for anything with a car's pose, colour and tyres (live or replayed)."""
+    __slots__ = ()
+    prev_pose = None  # (x, y, angle) before the latest physics step
+
+    def sprite_key(self):
+        return (self.color, self.tire_compound, self.length, self.width)
+
+    def render_pose(self, alpha=1.0):
+        """Pose `alpha` of the way from the previous physics step to the current one."""
+        if self.prev_pose is None or alpha >= 1.0:
+            return self.x, self.y, self.angle
+        px, py, pa = self.prev_pose
+        turn = (self.angle - pa + 180) % 360 - 180
+        return lerp(px, self.x, alpha), lerp(py, self.y, alpha), pa + turn * alpha
+
+    def draw(self, surf, cam_offset, alpha=1.0):
+        x, y, angle = self.render_pose(alpha)
+        CAR_SPRITES.blit(surf, self.sprite_key(), -angle, (x - cam_offset[0], y - cam_offset[1]))
+
+class Car(CarSprite, engine.Car):
+    __slots__ = ("prev_pose",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prev_pose = None
+
+class ReplayCar(CarSprite, sim_replay.ReplayCar):
+    pass
 
-        self.lap, self.finished, self.position = 0, False, 1
-        self.total_time, self.current_lap_time, self.best_lap, self.last_lap_time = 0.0, 0.0, None, None
-        
-        self.tire_compound = random.choice(['soft', 'medium', 'hard'])
-        self.engine_mode = 'race'
-        self.in_pit, self.pit_stops = False, 0
-        self.waypoint_index = 0
-        self._last_pass = None
-
-    def get_lateral_velocity(self):
-        """Returns the sideways velocity vector."""
-        right_normal = self.body.GetWorldVector((0, 1))
-        return right_normal.dot(self.body.linearVelocity) * right_normal
-
-    def update_physics(self, action):
-        """
-        Apply forces and torques to this car's physics body based on control actions.
-        Realistic and stable F1-style vehicle dynamics tuned for Box2D.
-        """
-        # ---------------------------------------------------
-        # CONFIGURABLE PARAMETERS (tune these as needed)
-        # ---------------------------------------------------
-        grip = TIRE_COMPOUNDS[self.tire_compound]['grip']
-        engine_power = ENGINE_MODES[self.engine_mode]['power']
-        max_accel_force = ACCEL_FORCE * engine_power
-        max_brake_force = BRAKE_FORCE
-        max_turn_torque = TURN_TORQUE
-        lateral_grip_factor = 8.0 * grip      # higher = more grip, less sliding
-        longitudinal_drag_coeff = 0.25        # 0.2–0.3 is realistic
-        angular_vel_limit = 10.0              # clamp spin speed (rad/s)
-        angular_vel_damp_factor = 0.9         # damping multiplier when limit exceeded
-        steer_speed_scale_min = 0.5           # stronger steering at low speed
-        steer_speed_scale_max = 10.0          # weaker steering at high speed
-        throttle_smooth = 0.2                 # 0.1 = sluggish, 0.3 = twitchy
-        # ---------------------------------------------------
-
-        # --- Smoothed throttle for stability ---
-        throttle_cmd = clamp(action.get('throttle', 0.0), -1.0, 1.0)
-        self.throttle_input = getattr(self, 'throttle_input', 0.0)
-        self.throttle_input = lerp(self.throttle_input, throttle_cmd, throttle_smooth)
-
-        steer_input = clamp(action.get('steer', 0.0), -1.0, 1.0)
-
-        # --- Get orientation vectors ---
-        forward_normal = self.body.GetWorldVector(localVector=(1, 0))
-        right_normal   = self.body.GetWorldVector(localVector=(0, 1))
-        vel = self.body.linearVelocity
-
-        # ===================================================
-        # 1️⃣  LATERAL FRICTION  (kill side slip)
-        # ===================================================
-        lateral_speed = right_normal.dot(vel)
-        lateral_impulse = -right_normal * clamp(
-            lateral_speed * self.body.mass,
-            -self.body.mass * lateral_grip_factor,
-            self.body.mass * lateral_grip_factor,
-        )
-        self.body.ApplyLinearImpulse(lateral_impulse, self.body.worldCenter, True)
-
-        # ===================================================
-        # 2️⃣  LONGITUDINAL DRAG (air resistance)
-        # ===================================================
-        forward_speed = forward_normal.dot(vel)
-        drag_force = -forward_normal * forward_speed * abs(forward_speed) * longitudinal_drag_coeff
-        self.body.ApplyForce(drag_force, self.body.worldCenter, True)
-
-        # ===================================================
-        # 3️⃣  ACCELERATION / BRAKING
-        # ===================================================
-        if self.throttle_input > 0.0:
-            # accelerate
-            accel_force = forward_normal * max_accel_force * self.throttle_input
-            self.body.ApplyForce(accel_force, self.body.worldCenter, True)
-        elif self.throttle_input < 0.0:
-            # braking
-            brake_force = forward_normal * max_brake_force * self.throttle_input
-            self.body.ApplyForce(brake_force, self.body.worldCenter, True)
-
-        # ===================================================
-        # 4️⃣  STEERING TORQUE (speed-scaled)
-        # ===================================================
-        speed = max(self.body.linearVelocity.length, steer_speed_scale_min)
-        speed_factor = clamp(speed, steer_speed_scale_min, steer_speed_scale_max)
-        turn_strength = max_turn_torque * steer_input / speed_factor
-        self.body.ApplyTorque(turn_strength, True)
-
-        # ===================================================
-        # 5️⃣  STABILIZATION (spin and velocity clamping)
-        # ===================================================
-        if abs(self.body.angularVelocity) > angular_vel_limit:
-            self.body.angularVelocity *= angular_vel_damp_factor
-
-        # --- optional tiny linear damping correction ---
-        if vel.length > 0.001:
-            self.body.linearDamping = 0.3 + 0.1 * (1.0 - grip)
-        else:
-            self.body.linearDamping = 1.0
 
-        
-    def check_pit_stop(self):
-        """Simulated pit stop entry, stay, and exit."""
-        # Start pit stop if fuel/tire thresholds crossed and not already in pit
-        if not self.in_pit and (self.fuel < 15.0 or self.tire_wear > 80.0):
-            # Drive toward pit lane
-            self.target_pit = (random.uniform(1850, 2100), random.uniform(1520, 1580))
-            self.in_pit = True
-            self.pit_timer = 0.0
-            self.pit_stops += 1
-
-        # If in pit lane, simulate being stationary for a while
-        if self.in_pit:
-            self.pit_timer += 1 / FPS
-
-            # During first 1s: move slowly into pit lane area
-            if self.pit_timer < 1.0:
-                tx, ty = self.target_pit
-                dx, dy = tx - self.x, ty - self.y
-                angle = math.atan2(dy, dx)
-                self.body.linearVelocity = (math.cos(angle) * 2.0 / PPM, math.sin(angle) * 2.0 / PPM)
-
-            # Stay still during service
-            elif 1.0 <= self.pit_timer < 4.0:
-                self.body.linearVelocity = (0, 0)
-
-            # Exit pit after 4s
-            else:
-                self.in_pit = False
-                self.target_pit = None
-                self.fuel = 100.0
-                self.tire_wear = 0.0
-                self.tire_temp = 45.0
-                self.brake_temp = 40.0
-                self.engine_temp = 85.0
-                self.ers = 100.0
-
-
-
-
-    def sync_with_physics(self):
-        """Updates car's state from its physics body."""
-        pos = self.body.position
-        self.x, self.y = pos.x * PPM, pos.y * PPM
-        self.angle = math.degrees(self.body.angle)
-        self.speed = self.body.linearVelocity.length * PPM
-        # Simple telemetry simulation
-        self.fuel = max(0.0, self.fuel - 0.01)                 # burns fuel slowly
-        self.tire_wear = min(100.0, self.tire_wear + 0.005)    # tires wear over time
-        self.tire_temp = min(130.0, self.tire_temp + abs(self.speed) * 0.002)
-        self.brake_temp = min(1000.0, self.brake_temp + abs(self.speed) * 0.005)
-        self.engine_temp = clamp(85.0 + abs(self.speed) * 0.02, 85.0, 130.0)
-        self.ers = max(0.0, self.ers - 0.002)
-        self.check_pit_stop()
+# ---------- Simulation ----------
+class SimulationManager(engine.SimulationManager):
+    track_cls = Track
+    car_cls = Car
+    speed_keys = "TAB"
 
+    def __init__(self, seed=None, n_cars=None, lod=False):
+        super().__init__(seed, n_cars, lod)
+        self.timestep = FixedTimestep(TIME_STEP)
 
+    def step(self, dt=TIME_STEP, player_action=None, actions=None):
+        for car in self.cars:
+            car.prev_pose = (car.x, car.y, car.angle)
+        super().step(dt, player_action, actions)
 
+    @profiler.timed("draw.viewport")
     def draw(self, surf, cam_offset):
-        car_surf = pygame.Surface((self.length, self.width), pygame.SRCALPHA)
-        pygame.draw.rect(car_surf, self.color, (0, 0, self.length, self.width), border_radius=4)
-        pygame.draw.rect(car_surf, (30, 30, 30), (self.length * 0.4, 4, self.length * 0.25, self.width - 8), border_radius=2)
-        tire_color = TIRE_COMPOUNDS[self.tire_compound]['color']
-        pygame.draw.circle(car_surf, tire_color, (self.length - 8, 4), 3)
-        pygame.draw.circle(car_surf, tire_color, (self.length - 8, self.width - 4), 3)
-        
-        rotated = pygame.transform.rotate(car_surf, -self.angle)
-        rect = rotated.get_rect(center=(self.x - cam_offset[0], self.y - cam_offset[1]))
-        surf.blit(rotated, rect.topleft)
-    
+        draw_world(surf, self, cam_offset, self.timestep.alpha)
 
-# ---------- AI Controller ----------
-class AIController:
-    def __init__(self, car, waypoints):
-        self.car, self.waypoints, self.idx = car, waypoints, 0
 
-    def step(self):
-        tx, ty = self.waypoints[self.idx]
-        if math.hypot(tx - self.car.x, ty - self.car.y) < 120:
-            self.idx = (self.idx + 1) % len(self.waypoints)
-        
-        self.car.waypoint_index = self.idx
-        desired = math.degrees(math.atan2(ty - self.car.y, tx - self.car.x))
-        diff = (desired - self.car.angle + 540) % 360 - 180
-        
-        return {'throttle': 0.8, 'steer': clamp(diff / 45.0, -1.0, 1.0)}
+class ReplaySimulation(sim_replay.ReplaySimulation):
+    """A recorded race for the admin panels; the replay cursor doubles as the timestep."""
+    track_cls = Track
+    car_cls = ReplayCar
+    speed_keys = "</> SPACE 1-9"
 
-# ---------- Simulation ----------
-class SimulationManager:
-    def __init__(self):
-        self.world = world(gravity=(0, 0))
-        self.track = Track()
-
-        # Only 6 teams (simpler grid)
-        teams = [
-            ("Red Bull", (30, 65, 174)),
-            ("Ferrari", (220, 0, 0)),
-            ("Mercedes", (0, 210, 190)),
-            ("McLaren", (255, 135, 0)),
-            ("Aston Martin", (0, 111, 98)),
-            ("Alpine", (34, 147, 209))
-        ]
-
-        self.cars = []
-        sx, sy = self.track.start_line
-
-        # Create only AI cars now
-        for i in range(len(teams)):
-            team_name, color = teams[i]
-            offset_x, offset_y = -(i // 2) * 60, ((i % 2) - 0.5) * 45
-            car_id = f"AI{i+1}"
-            self.cars.append(Car(self.world, car_id, sx + offset_x, sy + offset_y, color, team_name))
-
-        # Default focus = first car (Red Bull)
-        self.focused_car = self.cars[0]
-
-        # AI Controllers for all cars
-        self.ai_ctrl = [AIController(c, self.track.waypoints) for c in self.cars]
-
-        self.time, self.race_started, self.start_countdown = 0.0, False, 5.0
-
-    def set_focus_car(self, car):
-        """Set which car the camera should follow."""
-        if car in self.cars:
-            self.focused_car = car
-    
-    def step(self, dt, player_action):
-        if not self.race_started:
-            self.start_countdown -= dt
-            if self.start_countdown <= 0: self.race_started = True
-            else: return
-
-        # Update physics based on actions
-        # Update all AI cars
-        for ctrl in self.ai_ctrl:
-            ctrl.car.update_physics(ctrl.step())
-            
-        # Step the physics world
-        self.world.Step(TIME_STEP, 10, 8)
-        
-        # Sync game objects with physics bodies
-        for car in self.cars:
-            car.sync_with_physics()
-            car.total_time += dt
-            car.current_lap_time += dt
-
-        # Lap detection and positioning
-        self.update_race_progress()
-        self.time += dt
-    def update_race_progress(self):
-        for car in self.cars:
-            if car.finished:
-                continue
-
-            sx, sy = self.track.start_line
-            # detect crossing start line
-            if math.hypot(car.x - sx, car.y - sy) < 100 and (
-                car._last_pass is None or self.time - car._last_pass > 10.0
-            ):
-                car._last_pass = self.time
-                if car.lap > 0:
-                    car.last_lap_time = car.current_lap_time
-                    if car.best_lap is None or car.current_lap_time < car.best_lap:
-                        car.best_lap = car.current_lap_time
-                    car.current_lap_time = 0.0
-                car.lap += 1
-
-                if car.lap > LAPS_TO_FINISH:
-                    car.finished = True
-                    car.body.linearVelocity = (0, 0)
-                    car.body.angularVelocity = 0
-
-        # Sort leaderboard
-        leaderboard = self.get_leaderboard()
-        for i, car in enumerate(leaderboard):
-            car.position = i + 1
-
-        # Stop all cars when everyone finishes
-        if all(c.finished for c in self.cars):
-            for c in self.cars:
-                c.body.linearVelocity = (0, 0)
-                c.body.angularVelocity = 0
-
-
-    def get_leaderboard(self):
-        def race_key(c): return (-c.lap, -(c.waypoint_index / len(self.track.waypoints)))
-        racing = sorted([c for c in self.cars if not c.finished], key=race_key)
-        finished = sorted([c for c in self.cars if c.finished], key=lambda c: c.total_time)
-        return finished + racing
+    @property
+    def timestep(self):
+        return self.replay
 
+    @profiler.timed("draw.viewport")
     def draw(self, surf, cam_offset):
-        self.track.draw(surf, cam_offset)
-        for car in sorted(self.cars, key=lambda c: c.y):
-            car.draw(surf, cam_offset)
+        draw_world(surf, self, cam_offset)
+
+
+def draw_world(surf, sim, cam_offset, alpha=1.0):
+    sim.track.draw(surf, cam_offset)
+    for car in sorted(sim.cars, key=lambda c: c.y):
+        car.draw(surf, cam_offset, alpha)
 
 # ========== UI DRAWING FUNCTIONS (IMPROVED) ==========
 def draw_panel(surf, rect, title):
@@ -506,39 +246,72 @@ def draw_panel(surf, rect, title):
     header_rect = (rect.x, rect.y, rect.width, scale_y(40))
     pygame.draw.rect(surf, HEADER_BG, header_rect, border_top_left_radius=8, border_top_right_radius=8)
     pygame.draw.line(surf, UI_BORDER, (rect.x, rect.y + scale_y(40)), (rect.x + rect.width, rect.y + scale_y(40)), 2)
-    title_surf = font_lg.render(title, True, YELLOW)
+    title_surf = text_cache.render(font_lg, title, YELLOW)
     surf.blit(title_surf, (rect.x + 15, rect.y + 8))
 
+@profiler.timed("draw.header")
 def draw_header(surf, sim):
     header_rect = pygame.Rect(0, 0, SCREEN_W, scale_y(70))
     pygame.draw.rect(surf, HEADER_BG, header_rect)
     pygame.draw.line(surf, YELLOW, (0, header_rect.h), (SCREEN_W, header_rect.h), 3)
     
-    title = font_xl.render(f"F1 RACE CONTROL", True, YELLOW)
+    title = text_cache.render(font_xl, "F1 RACE CONTROL", YELLOW)
     surf.blit(title, (scale_x(20), scale_y(15)))
     
-    info_text = f"Race Time: {sim.time:.1f}s   Laps: {LAPS_TO_FINISH}   Weather: Clear | Track: 35.0°C"
-    surf.blit(font_md.render(info_text, True, LIGHT_GRAY), (scale_x(400), scale_y(25)))
+    info_text = (f"Race Time: {sim.time:.1f}s   Laps: {LAPS_TO_FINISH}   Weather: Clear | Track: 35.0°C"
+                 f"   Speed: {sim.timestep.label()} [{sim.speed_keys}]")
+    text_cache.draw(surf, font_md, info_text, LIGHT_GRAY, (scale_x(400), scale_y(25)))
     
     if not sim.race_started:
-        text = font_xl.render(f"RACE STARTS IN: {max(0, sim.start_countdown):.1f}", True, RED)
-        surf.blit(text, (SCREEN_W - text.get_width() - scale_x(30), scale_y(20)))
+        text = f"RACE STARTS IN: {max(0, sim.start_countdown):.1f}"
+        width = text_cache.width(font_xl, text, RED)
+        text_cache.draw(surf, font_xl, text, RED, (SCREEN_W - width - scale_x(30), scale_y(20)))
 
 
-def draw_leaderboard(surf, sim):
-    rect = pygame.Rect(scale_x(10), scale_y(80), scale_x(380), SCREEN_H - scale_y(90))
-    draw_panel(surf, rect, "LIVE STANDINGS")
-    
-    mouse_pos = pygame.mouse.get_pos()
-    mouse_clicked = pygame.mouse.get_pressed()[0]
-    y_pos = rect.y + scale_y(55)
-    clicked_car = None
+# ---------- Panel layout ----------
+def leaderboard_rect(): return pygame.Rect(scale_x(10), scale_y(80), scale_x(380), SCREEN_H - scale_y(90))
+def telemetry_rect(): return pygame.Rect(SCREEN_W - scale_x(430), scale_y(80), scale_x(420), SCREEN_H - scale_y(90))
+def viewport_rect(): return pygame.Rect(scale_x(400), scale_y(80), SCREEN_W - scale_x(850), SCREEN_H - scale_y(230))
+
+def bottom_panel_rects():
+    stats_w, map_w = scale_x(500), scale_x(320)
+    panel_h = scale_y(120)
+    panel_y = SCREEN_H - panel_h - scale_y(10)
+    stats_rect = pygame.Rect((SCREEN_W - stats_w - map_w - scale_x(10)) / 2, panel_y, stats_w, panel_h)
+    map_rect = pygame.Rect(stats_rect.right + scale_x(10), panel_y, map_w, panel_h)
+    return stats_rect, map_rect
 
+
+def leaderboard_rows(sim, rect):
+    """(position index, car, row rect) for every standings row that fits in the panel."""
+    rows = []
+    y_pos = rect.y + scale_y(55)
     for i, car in enumerate(sim.get_leaderboard()):
         if y_pos > rect.y + rect.h - scale_y(40):
             break
+        rows.append((i, car, pygame.Rect(rect.x + 10, y_pos, rect.width - 20, scale_y(35))))
+        y_pos += scale_y(38)
+    return rows
+
+def handle_leaderboard_click(sim):
+    """Focuses the camera on the car whose standings row is being clicked."""
+    if not pygame.mouse.get_pressed()[0]:
+        return
+    mouse_pos = pygame.mouse.get_pos()
+    for _, car, row_rect in leaderboard_rows(sim, leaderboard_rect()):
+        if row_rect.collidepoint(mouse_pos):
+            sim.set_focus_car(car)
+            return
 
-        row_rect = pygame.Rect(rect.x + 10, y_pos, rect.width - 20, scale_y(35))
+@profiler.timed("draw.leaderboard")
+def draw_leaderboard(surf, sim):
+    rect = leaderboard_rect()
+    draw_panel(surf, rect, "LIVE STANDINGS")
+    
+    mouse_pos = pygame.mouse.get_pos()
+
+    for i, car, row_rect in leaderboard_rows(sim, rect):
+        y_pos = row_rect.y
         is_hovered = row_rect.collidepoint(mouse_pos)
         is_focused = (car == sim.focused_car)
 
@@ -551,112 +324,118 @@ def draw_leaderboard(surf, sim):
         # Position badge
         pos_color = YELLOW if i == 0 else ORANGE if i == 1 else (200, 140, 30) if i == 2 else DARK_GRAY
         pygame.draw.rect(surf, pos_color, (rect.x + 15, y_pos + scale_y(5), scale_x(25), scale_y(25)), border_radius=4)
-        pos_text = font_md.render(str(i + 1), True, BLACK if i < 3 else WHITE)
+        pos_text = text_cache.render(font_md, str(i + 1), BLACK if i < 3 else WHITE)
         surf.blit(pos_text, pos_text.get_rect(center=(rect.x + 28, y_pos + scale_y(17))))
 
         # Team color stripe
         pygame.draw.rect(surf, car.color, (rect.x + 50, y_pos + scale_y(5), 5, scale_y(25)))
 
         # Car & team text
-        surf.blit(font_md.render(f"{car.id} - {car.team_name}", True, LIGHT_GRAY), (rect.x + 65, y_pos + scale_y(8)))
+        surf.blit(text_cache.render(font_md, f"{car.id} - {car.team_name}", LIGHT_GRAY), (rect.x + 65, y_pos + scale_y(8)))
 
         # Status text
-        status_text, status_color = (
-            ("PIT", YELLOW) if car.in_pit
-            else (("FIN", GREEN) if car.finished else (f"Lap {car.lap}/{LAPS_TO_FINISH}", GRAY))
-        )
-        surf.blit(font_sm.render(status_text, True, status_color), (rect.right - scale_x(90), y_pos + scale_y(10)))
+        surf.blit(text_cache.render(font_sm, *leaderboard_status(car)), (rect.right - scale_x(90), y_pos + scale_y(10)))
 
-        # Detect click
-        if is_hovered and mouse_clicked:
-            clicked_car = car
+def leaderboard_status(car):
+    return (
+        ("PIT", YELLOW) if car.in_pit
+        else (("FIN", GREEN) if car.finished else (f"Lap {car.lap}/{LAPS_TO_FINISH}", GRAY))
+    )
 
-        y_pos += scale_y(38)
-
-    # Update camera focus if a new car was clicked
-    if clicked_car:
-        sim.set_focus_car(clicked_car)
-        
-        
-def draw_telemetry(surf, sim):
-    rect = pygame.Rect(SCREEN_W - scale_x(430), scale_y(80), scale_x(420), SCREEN_H - scale_y(90))
-    draw_panel(surf, rect, "CAR TELEMETRY")
 
+def telemetry_items(sim, rect):
+    """
+    The telemetry panel as a list of rows, each ("row", y, label, text, color)
+    or ("bar", y, text, fill_width, color), holding exactly what is drawn.
+    """
     car = sim.focused_car if sim.focused_car else None
     if not car:
-        return
+        return []
 
+    items = []
     y_pos = rect.y + scale_y(55)
 
-    def draw_row(label, value, color=LIGHT_GRAY):
+    def row(label, value, color=LIGHT_GRAY):
         nonlocal y_pos
-        surf.blit(font_md.render(f"{label}:", True, GRAY), (rect.x + 15, y_pos))
-        surf.blit(font_md.render(str(value), True, color), (rect.x + scale_x(160), y_pos))
+        items.append(("row", y_pos, label, str(value), color))
         y_pos += scale_y(30)
 
-    def draw_bar(label, val, max_val, color):
+    def bar(label, val, max_val, color):
         nonlocal y_pos
         progress = clamp(val / max_val, 0, 1)
-        bar_w, bar_h = rect.width - 30, scale_y(22)
-        pygame.draw.rect(surf, DARK_GRAY, (rect.x + 15, y_pos, bar_w, bar_h), border_radius=4)
-        pygame.draw.rect(surf, color, (rect.x + 15, y_pos, bar_w * progress, bar_h), border_radius=4)
         txt = f"{label}: {val:.1f}" if isinstance(val, float) else f"{label}: {val*100:.0f}%"
-        surf.blit(font_sm.render(txt, True, WHITE), (rect.x + 25, y_pos + 4))
+        items.append(("bar", y_pos, txt, int((rect.width - 30) * progress), color))
         y_pos += scale_y(35)
 
     # ─── CORE INFO ───────────────────────────────
-    draw_row("Car", f"{car.id} - {car.team_name}", car.color)
-    draw_row("Position", f"{car.position} / {len(sim.cars)}")
-    draw_row("Lap", f"{car.lap}/{LAPS_TO_FINISH}")
+    row("Car", f"{car.id} - {car.team_name}", car.color)
+    row("Position", f"{car.position} / {len(sim.cars)}")
+    row("Lap", f"{car.lap}/{LAPS_TO_FINISH}")
+    row("Gap / Int", "LEADER" if car.gap_to_leader is None
+        else f"+{car.gap_to_leader:.2f}s / +{car.interval:.2f}s")
     y_pos += scale_y(10)
 
     # ─── SPEED / THROTTLE ────────────────────────
-    draw_bar("Speed (KPH)", car.speed * 3.6, 350, GREEN)
-    draw_bar("Throttle", abs(getattr(car, 'throttle_input', 0)) * 100, 100, ORANGE)
+    bar("Speed (KPH)", car.speed * 3.6, 350, GREEN)
+    bar("Throttle", abs(getattr(car, 'throttle_input', 0)) * 100, 100, ORANGE)
     y_pos += scale_y(10)
 
     # ─── TIRES ───────────────────────────────────
-    draw_row("Compound", car.tire_compound.upper(), TIRE_COMPOUNDS[car.tire_compound]['color'])
-    draw_bar("Wear", getattr(car, "tire_wear", 0.0), 100, YELLOW)
-    draw_bar("Temp (°C)", getattr(car, "tire_temp", 45.0), 130, RED)
+    row("Compound", car.tire_compound.upper(), TIRE_COMPOUNDS[car.tire_compound]['color'])
+    bar("Wear", getattr(car, "tire_wear", 0.0), 100, YELLOW)
+    bar("Temp (°C)", getattr(car, "tire_temp", 45.0), 130, RED)
     y_pos += scale_y(10)
 
     # ─── FUEL & POWER ────────────────────────────
-    draw_bar("Fuel (%)", getattr(car, "fuel", 100.0), 100, (80, 160, 255))
-    draw_row("Engine Mode", car.engine_mode.upper(), LIGHT_GRAY)
-    draw_bar("ERS (%)", getattr(car, "ers", 100.0), 100, GREEN)
+    bar("Fuel (%)", getattr(car, "fuel", 100.0), 100, (80, 160, 255))
+    row("Engine Mode", car.engine_mode.upper(), LIGHT_GRAY)
+    bar("ERS (%)", getattr(car, "ers", 100.0), 100, GREEN)
     y_pos += scale_y(10)
 
     # ─── TEMPERATURES ────────────────────────────
-    draw_bar("Brakes (°C)", getattr(car, "brake_temp", 40.0), 1000, ORANGE)
-    draw_bar("Engine (°C)", getattr(car, "engine_temp", 85.0), 130, RED)
+    bar("Brakes (°C)", getattr(car, "brake_temp", 40.0), 1000, ORANGE)
+    bar("Engine (°C)", getattr(car, "engine_temp", 85.0), 130, RED)
     y_pos += scale_y(10)
 
     # ─── LAP TIMES ───────────────────────────────
-    draw_row("Current Lap", f"{car.current_lap_time:.2f}s")
-    draw_row("Total Time", f"{car.total_time:.2f}s")
+    row("Current Lap", f"{car.current_lap_time:.2f}s")
+    row("Total Time", f"{car.total_time:.2f}s")
     y_pos += scale_y(10)
 
     # ─── AERODYNAMICS ────────────────────────────
     drs_status = getattr(car, "drs_enabled", False)
-    draw_row("DRS", "ENABLED" if drs_status else "DISABLED", GREEN if drs_status else RED)
-    draw_row("Downforce", f"{getattr(car, 'downforce_level', 5)}/10")
-    draw_row("Pit Stops", getattr(car, "pit_stops", 0))
+    row("DRS", "ENABLED" if drs_status else "DISABLED", GREEN if drs_status else RED)
+    row("Downforce", f"{getattr(car, 'downforce_level', 5)}/10")
+    row("Pit Stops", getattr(car, "pit_stops", 0))
+    return items
+
+def telemetry_item_rect(rect, item):
+    height = scale_y(30) if item[0] == "row" else scale_y(22)
+    return pygame.Rect(rect.x + 15, item[1], rect.width - 30, height)
+
+def draw_telemetry_item(surf, rect, item):
+    kind, y_pos = item[:2]
+    if kind == "row":
+        _, _, label, value, color = item
+        surf.blit(text_cache.render(font_md, f"{label}:", GRAY), (rect.x + 15, y_pos))
+        text_cache.draw(surf, font_md, value, color, (rect.x + scale_x(160), y_pos))
+    else:
+        _, _, txt, fill_w, color = item
+        bar_w, bar_h = rect.width - 30, scale_y(22)
+        pygame.draw.rect(surf, DARK_GRAY, (rect.x + 15, y_pos, bar_w, bar_h), border_radius=4)
+        pygame.draw.rect(surf, color, (rect.x + 15, y_pos, fill_w, bar_h), border_radius=4)
+        text_cache.draw(surf, font_sm, txt, WHITE, (rect.x + 25, y_pos + 4))
 
+@profiler.timed("draw.telemetry")
+def draw_telemetry(surf, sim):
+    rect = telemetry_rect()
+    draw_panel(surf, rect, "CAR TELEMETRY")
+    for item in telemetry_items(sim, rect):
+        draw_telemetry_item(surf, rect, item)
 
-def draw_bottom_panels(surf, sim):
-    stats_w, map_w = scale_x(500), scale_x(320)
-    panel_h = scale_y(120)
-    panel_y = SCREEN_H - panel_h - scale_y(10)
-    
-    # Race Stats
-    stats_rect = pygame.Rect((SCREEN_W - stats_w - map_w - scale_x(10)) / 2, panel_y, stats_w, panel_h)
-    draw_panel(surf, stats_rect, "RACE STATISTICS")
-    
-    # Minimap
-    map_rect = pygame.Rect(stats_rect.right + scale_x(10), panel_y, map_w, panel_h)
-    draw_panel(surf, map_rect, "TRACK MAP")
-    
+
+def minimap_points(sim, map_rect):
+    """Track outline and per-car dots projected into the minimap panel."""
     # *** CHANGED: Use a dynamic scale based on track bounds ***
     min_x = min(p[0] for p in sim.track.waypoints)
     max_x = max(p[0] for p in sim.track.waypoints)
@@ -673,12 +452,121 @@ def draw_bottom_panels(surf, sim):
     map_points = [(((p[0] - track_center_x) * scale + offset_x), 
                    ((p[1] - track_center_y) * scale + offset_y)) 
                   for p in sim.track.waypoints]
+    car_points = [(car.color, (int((car.x - track_center_x) * scale + offset_x),
+                               int((car.y - track_center_y) * scale + offset_y)))
+                  for car in sim.cars]
+    return map_points, car_points
+
+@profiler.timed("draw.bottom_panels")
+def draw_bottom_panels(surf, sim):
+    stats_rect, map_rect = bottom_panel_rects()
+
+    # Race Stats
+    draw_panel(surf, stats_rect, "RACE STATISTICS")
     
+    # Minimap
+    draw_panel(surf, map_rect, "TRACK MAP")
+    map_points, car_points = minimap_points(sim, map_rect)
     pygame.draw.lines(surf, GRAY, True, map_points, 3)
-    
-    for car in sim.cars:
-        cx, cy = (car.x - track_center_x) * scale + offset_x, (car.y - track_center_y) * scale + offset_y
-        pygame.draw.circle(surf, car.color, (cx, cy), 4)
+    for color, (cx, cy) in car_points:
+        pygame.draw.circle(surf, color, (cx, cy), 4)
+
+
+# ========== RETAINED PANELS ==========
+# Each panel remembers what it last drew; main() only repaints and presents
+# the rectangles whose content changed, so a paused race costs next to nothing.
+class HeaderWidget(Widget):
+    def __init__(self):
+        super().__init__((0, 0, SCREEN_W, scale_y(70) + 2))
+
+    def state(self, sim):
+        return (round(sim.time, 1), sim.race_started, round(max(0, sim.start_countdown), 1),
+                sim.timestep.label())
+
+    def render(self, surf, sim):
+        surf.fill(DARK_BG, self.rect)
+        draw_header(surf, sim)
+
+
+class LeaderboardWidget(Widget):
+    def __init__(self):
+        super().__init__(leaderboard_rect())
+
+    def state(self, sim):
+        mouse_pos = pygame.mouse.get_pos()
+        return (sim.focused_car.id,
+                tuple((car.id, leaderboard_status(car), row_rect.collidepoint(mouse_pos))
+                      for _, car, row_rect in leaderboard_rows(sim, self.rect)))
+
+    def render(self, surf, sim):
+        surf.fill(DARK_BG, self.rect)
+        draw_leaderboard(surf, sim)
+
+
+class TelemetryWidget(Widget):
+    """Repaints the panel chrome once, then only the rows whose values changed."""
+    def __init__(self):
+        super().__init__(telemetry_rect())
+        self._items = []
+
+    @profiler.timed("draw.telemetry")
+    def update(self, surf, sim):
+        items = telemetry_items(sim, self.rect)
+        if self.dirty or len(items) != len(self._items):
+            self._items, self._state = items, None
+            self.render(surf, sim)
+            return [self.rect]
+        rects = []
+        for old, item in zip(self._items, items):
+            if old != item:
+                row_rect = telemetry_item_rect(self.rect, item)
+                surf.fill(PANEL_BG, row_rect)
+                draw_telemetry_item(surf, self.rect, item)
+                rects.append(row_rect)
+        self._items = items
+        return rects
+
+    def render(self, surf, sim):
+        surf.fill(DARK_BG, self.rect)
+        draw_panel(surf, self.rect, "CAR TELEMETRY")
+        for item in self._items:
+            draw_telemetry_item(surf, self.rect, item)
+
+
+class BottomPanelsWidget(Widget):
+    def __init__(self):
+        stats_rect, map_rect = bottom_panel_rects()
+        super().__init__(stats_rect.union(map_rect))
+
+    def state(self, sim):
+        return tuple(pos for _, pos in minimap_points(sim, bottom_panel_rects()[1])[1])
+
+    def render(self, surf, sim):
+        surf.fill(DARK_BG, self.rect)
+        draw_bottom_panels(surf, sim)
+
+
+class ViewportWidget(Widget):
+    """The camera view of the track; `cam` is set by the main loop each frame."""
+    def __init__(self):
+        super().__init__(viewport_rect())
+        self.cam = (0, 0)
+        self._view = None
+
+    def state(self, sim):
+        return (round(self.cam[0]), round(self.cam[1]),
+                tuple((*map(round, c.render_pose(sim.timestep.alpha)), c.tire_compound) for c in sim.cars))
+
+    def render(self, surf, sim):
+        if self._view is None or self._view.get_size() != self.rect.size:
+            self._view = surf.subsurface(self.rect)
+        sim.draw(self._view, self.cam)
+        pygame.draw.rect(surf, UI_BORDER, self.rect, 2)
+
+
+def build_panels():
+    return WidgetGroup([ViewportWidget(), HeaderWidget(), LeaderboardWidget(),
+                        TelemetryWidget(), BottomPanelsWidget()], background=DARK_BG)
 
 # *** CHANGED: Modified function to smooth steering ***
 def get_player_action(keys, old_steer):
@@ -701,8 +589,34 @@ def get_player_action(keys, old_steer):
     }
     return action, new_steer
 
-def main():
-    sim = SimulationManager()
+def handle_replay_key(sim, key):
+    """Replay controls: LEFT/RIGHT change speed (down into reverse), HOME/END, 1-9 lap starts."""
+    if key in (pygame.K_LEFT, pygame.K_RIGHT):
+        sim.replay.cycle_speed(1 if key == pygame.K_RIGHT else -1)
+    elif key == pygame.K_HOME:
+        sim.seek(sim.replay.start)
+    elif key == pygame.K_END:
+        sim.seek(sim.replay.end)
+    elif pygame.K_1 <= key <= pygame.K_9:
+        sim.seek_lap(key - pygame.K_0)
+
+def main(record=None, replay=None, cars=None, lod=False):
+    """
+    Runs race control live (optionally logging telemetry to `record`) or
+    replays a log. `lod` opts in to running cars away from the viewport and
+    from other cars on the cheap 1D physics model, which big grids need to
+    hold 60 FPS; it approximates, so races can end differently.
+    """
+    init_display()
+    if replay:
+        sim = ReplaySimulation(replay)
+    else:
+        sim = SimulationManager(n_cars=cars, lod=lod)
+        if record:
+            sim.record_to(record)
+    panels = build_panels()
+    viewport = panels.widgets[0]
+    overlay = ProfilerOverlay(font_xs)
     running, paused = True, False
     # cam_x, cam_y = sim.cars[0].x - (SCREEN_W / 2), sim.cars[0].y - (SCREEN_H / 2)
     cam_x, cam_y = sim.focused_car.x - (SCREEN_W / 2), sim.focused_car.y - (SCREEN_H / 2)
@@ -710,42 +624,57 @@ def main():
     
     # *** CHANGED: Added current_steer variable ***
     current_steer = 0.0
+    frame_time = 0.0
     
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE): running = False
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_p: paused = not paused
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_p, pygame.K_SPACE): paused = not paused
+            if event.type == pygame.KEYDOWN and replay: handle_replay_key(sim, event.key)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB: sim.timestep.cycle_scale()
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.VIDEORESIZE): panels.invalidate()
+            if overlay.handle_event(event): panels.invalidate()
         
-        if not paused:
+        if replay:
+            if not paused:
+                sim.advance(frame_time)
+        elif not paused:
             # *** CHANGED: Update steering and get action dict ***
             player_action, current_steer = get_player_action(pygame.key.get_pressed(), current_steer)
-            sim.step(TIME_STEP, player_action)
+            sim.set_view((cam_x, cam_y, *viewport.rect.size))
+            # Physics runs at a fixed TIME_STEP (times the speed-up) whatever the frame rate
+            for _ in sim.timestep.steps(frame_time):
+                sim.step(TIME_STEP, player_action)
+        handle_leaderboard_click(sim)
         
         # Viewport and Camera
-        vp_x, vp_y = scale_x(400), scale_y(80)
-        vp_w, vp_h = SCREEN_W - scale_x(850), SCREEN_H - scale_y(230)
+        vp_w, vp_h = viewport.rect.size
         focus = sim.focused_car if sim.focused_car else sim.cars[0]
-        target_cam_x, target_cam_y = focus.x - (vp_w / 2), focus.y - (vp_h / 2)
+        focus_x, focus_y, _ = focus.render_pose(sim.timestep.alpha)
+        target_cam_x, target_cam_y = focus_x - (vp_w / 2), focus_y - (vp_h / 2)
         cam_x, cam_y = lerp(cam_x, target_cam_x, 0.1), lerp(cam_y, target_cam_y, 0.1)
-
-        
-        # Drawing
-        screen.fill(DARK_BG)
-        # track_surface = pygame.Surface((vp_w, vp_h))
-        track_surface = pygame.Surface((vp_w + 400, vp_h + 400))  # extra margin
-        sim.draw(track_surface, (cam_x, cam_y))
-        screen.blit(track_surface, (vp_x, vp_y))
-        pygame.draw.rect(screen, UI_BORDER, (vp_x, vp_y, vp_w, vp_h), 2)
-        
-        draw_header(screen, sim)
-        draw_leaderboard(screen, sim)
-        draw_telemetry(screen, sim)
-        draw_bottom_panels(screen, sim)
-        
-        pygame.display.flip()
-        clock.tick(FPS)
+        viewport.cam = (cam_x, cam_y)
+
+        # Drawing: only the panels whose content changed are repainted and presented
+        dirty = panels.update(screen, sim)
+        if overlay.visible:
+            dirty.append(overlay.draw(screen, (viewport.rect.x + 10, viewport.rect.y + 10)))
+        if dirty:
+            with profiler.section("draw.present"):
+                pygame.display.update(dirty)
+        frame_time = clock.tick(FPS) / 1000
+        profiler.end_frame()
     
+    if not replay:
+        sim.stop_recording()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    ap = argparse.ArgumentParser(description="F1 race control admin panel")
+    ap.add_argument("--record", metavar="DIR", help="log every car's telemetry to DIR")
+    ap.add_argument("--replay", metavar="DIR", help="play back a log written with --record")
+    ap.add_argument("--cars", type=int, default=None, help="grid size (default: one car per team)")
+    ap.add_argument("--lod", action="store_true",
+                    help="approximate off-screen cars with 1D physics (faster, changes results)")
+    args = ap.parse_args()
+    main(args.record, args.replay, args.cars, lod=args.lod)
\ No newline at end of file
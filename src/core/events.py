@@ -0,0 +1,120 @@
+"""
+Race events, batched per tick.
+
+    env.events.subscribe(print_events, types=(Flag, Finish))
+    env.events.set_level(MAJOR)
+
+The environments emit events into their EventBus while stepping and flush
+them once at the end of the tick, so every subscriber sees one list per
+tick. How much is emitted is set by the level: OFF (nothing), MAJOR
+(flags, retirements, finishes) or ALL (also laps, overtakes and pit stops).
+A bus with no subscribers behaves as OFF, so headless runs that never
+subscribe pay one integer comparison per emission site and tick.
+"""
+from collections import namedtuple, deque
+
+OFF, MAJOR, ALL = 0, 1, 2
+
+Flag = namedtuple("Flag", "time kind")                # kind: "yellow" or "green"
+Overtake = namedtuple("Overtake", "time car passed")  # car ids
+Lap = namedtuple("Lap", "time car lap")               # `car` started lap `lap`
+PitStop = namedtuple("PitStop", "time car stop")      # `stop`-th stop of the race
+DNF = namedtuple("DNF", "time car reason")            # reason: "fuel" or "damage"
+Finish = namedtuple("Finish", "time car position")
+
+EVENT_LEVEL = {Flag: MAJOR, DNF: MAJOR, Finish: MAJOR, Overtake: ALL, Lap: ALL, PitStop: ALL}
+
+class EventBus:
+    """
+    Collects a tick's events and hands them to subscribers as one batch.
+
+    Emitters check `level` before building an event; it is the requested
+    level while anyone is subscribed and OFF otherwise. Subscribers are
+    plain callables taking the batch, called synchronously from flush(),
+    so they must return quickly; anything slow should subscribe an
+    EventQueue and drain it elsewhere.
+    """
+    def __init__(self, level=ALL):
+        self.requested = level
+        self.level = OFF
+        self.pending = []
+        self._subscribers = []
+
+    def set_level(self, level):
+        self.requested = level
+        self._update_level()
+
+    def subscribe(self, fn, types=None):
+        """Calls fn(batch) after every tick with events; `types` limits the batch to those classes."""
+        self._subscribers.append((fn, tuple(types) if types else None))
+        self._update_level()
+        return fn
+
+    def unsubscribe(self, fn):
+        self._subscribers = [(f, t) for f, t in self._subscribers if f is not fn]
+        self._update_level()
+
+    def _update_level(self):
+        self.level = self.requested if self._subscribers else OFF
+
+    def emit(self, event):
+        if EVENT_LEVEL[type(event)] <= self.level:
+            self.pending.append(event)
+
+    def flush(self):
+        """Delivers the tick's batch; call once at the end of every step."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        for fn, types in self._subscribers:
+            if types is None:
+                fn(batch)
+            else:
+                mine = [e for e in batch if isinstance(e, types)]
+                if mine:
+                    fn(mine)
+
+    def clear(self):
+        self.pending = []
+
+
+class EventQueue:
+    """
+    Non-blocking subscriber: stores batches in a bounded deque for another
+    loop or thread to drain. When the consumer falls behind, the oldest
+    batches are dropped (and counted) instead of stalling the simulation.
+    """
+    def __init__(self, maxlen=1024):
+        self.batches = deque(maxlen=maxlen)
+        self.dropped = 0
+
+    def __call__(self, batch):
+        if len(self.batches) == self.batches.maxlen:
+            self.dropped += 1
+        self.batches.append(batch)
+
+    def drain(self):
+        """All queued events, oldest first."""
+        events = []
+        while self.batches:
+            events.extend(self.batches.popleft())
+        return events
+
+
+def format_event(event):
+    kind = type(event)
+    if kind is Flag:
+        return "⚠️  Yellow flag! Safety car deployed." if event.kind == "yellow" else "✅ Green flag!"
+    if kind is Overtake:
+        return f"🔀 Car-{event.car} passes Car-{event.passed}"
+    if kind is Lap:
+        return f"⏱️  Car-{event.car} starts lap {event.lap}"
+    if kind is PitStop:
+        return f"🔧 Car-{event.car} pits (stop {event.stop})"
+    if kind is DNF:
+        return f"💥 Car-{event.car} retires ({event.reason})"
+    return f"🏁 Car-{event.car} finishes P{event.position}"
+
+def print_events(batch):
+    """Console subscriber, one line per event."""
+    print("\n".join(map(format_event, batch)))
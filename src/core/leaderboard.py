@@ -1,11 +1,17 @@
 class Leaderboard:
+    """Console standings table; update() writes it in one go."""
+    def format(self, env):
+        lines = ["", "🏁 --- Leaderboard --- 🏁"]
+        for rank, (car, lap) in enumerate(env.ranked(), start=1):
+            lines.append(f"{rank}. Car-{car.id} | Lap {lap}/{env.total_laps} "
+                         f"| Pos {car.pos:6.0f}m | Speed {car.speed:5.1f} "
+                         f"| Fuel {car.fuel:5.1f} | Wear {car.tyre_wear:4.2f} | Dmg {car.damage:4.2f}")
+        lines.append("-"*70)
+        return "\n".join(lines)
+
     def update(self, env):
-        sorted_cars = sorted(zip(env.cars, env.laps),
-                             key=lambda x:(x[1], x[0].pos),
-                             reverse=True)
-        print("\n🏁 --- Leaderboard --- 🏁")
-        for rank,(car,lap) in enumerate(sorted_cars,start=1):
-            print(f"{rank}. Car-{car.id} | Lap {lap}/{env.total_laps} "
-                  f"| Pos {car.pos:6.0f}m | Speed {car.speed:5.1f} "
-                  f"| Fuel {car.fuel:5.1f} | Wear {car.tyre_wear:4.2f} | Dmg {car.damage:4.2f}")
-        print("-"*70)
+        print(self.format(env))
+
+    def subscribe(self, env, types):
+        """Prints the table only after ticks with events of `types` (e.g. Finish, Overtake)."""
+        env.events.subscribe(lambda batch: self.update(env), types)
@@ -0,0 +1,156 @@
+import cProfile
+import csv
+import json
+import time
+from collections import defaultdict, deque
+from functools import wraps
+import numpy as np
+
+WINDOW = 300              # frames of history kept per timer
+PERCENTILES = (50, 95, 99)
+
+class _NullSection:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL = _NullSection()
+
+class _Section:
+    __slots__ = ("totals", "name", "t0")
+
+    def __init__(self, totals, name):
+        self.totals, self.name = totals, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.totals[self.name] += time.perf_counter() - self.t0
+        return False
+
+
+class Profiler:
+    """
+    Named stage timers with a rolling per-frame history.
+
+        with profiler.section("sim.physics"):
+            ...
+        profiler.end_frame()
+
+    Time spent in a section is summed over the frame (a section entered once
+    per car counts once per frame), and end_frame() pushes those totals into
+    a WINDOW-frame history that stats() summarises. While disabled,
+    section() hands back a shared no-op context, so instrumented code costs
+    one attribute check.
+    """
+    def __init__(self, window=WINDOW, enabled=False):
+        self.enabled = enabled
+        self.window = window
+        self.frames = 0
+        self._totals = defaultdict(float)
+        self._history = {}
+        self._last_frame = None
+        self._cprofile = None
+        self._capture_left = 0
+        self._capture_path = None
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL
+        return _Section(self._totals, name)
+
+    def timed(self, name):
+        """Decorator form of section()."""
+        def deco(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Section(self._totals, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def end_frame(self):
+        """Closes the current frame: records stage totals and the whole frame's time."""
+        now = time.perf_counter()
+        if self.enabled:
+            if self._last_frame is not None:
+                self._totals["frame"] = now - self._last_frame
+            for name, secs in self._totals.items():
+                hist = self._history.get(name)
+                if hist is None:
+                    hist = self._history[name] = deque(maxlen=self.window)
+                hist.append(secs * 1000.0)
+            self._totals.clear()
+            self.frames += 1
+        self._last_frame = now
+        if self._cprofile is not None:
+            self._capture_left -= 1
+            if self._capture_left <= 0:
+                self._finish_capture()
+
+    def reset(self):
+        self._totals.clear()
+        self._history.clear()
+        self.frames = 0
+
+    # ---------- Reporting ----------
+    def stats(self):
+        """{name: {"n", "mean", "p50", "p95", "p99", "max"}} in milliseconds, by name."""
+        out = {}
+        for name in sorted(self._history):
+            ms = np.fromiter(self._history[name], dtype=np.float64)
+            if not len(ms):
+                continue
+            row = {"n": len(ms), "mean": float(ms.mean())}
+            for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+                row[f"p{p}"] = float(v)
+            row["max"] = float(ms.max())
+            out[name] = row
+        return out
+
+    def report_lines(self):
+        """Fixed-width text table of stats(), for overlays and logs."""
+        lines = [f"{'stage':<20}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for name, row in self.stats().items():
+            lines.append(f"{name:<20}{row['p50']:7.2f}{row['p95']:7.2f}{row['p99']:7.2f}")
+        return lines
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"frames": self.frames, "window": self.window, "stages": self.stats()}, f, indent=2)
+
+    def export_csv(self, path):
+        cols = ["n", "mean"] + [f"p{p}" for p in PERCENTILES] + ["max"]
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["stage"] + cols)
+            for name, row in self.stats().items():
+                w.writerow([name] + [row[c] for c in cols])
+
+    # ---------- cProfile capture ----------
+    def capture(self, frames, path):
+        """Runs cProfile over the next `frames` end_frame() calls and dumps it to `path`."""
+        if self._cprofile is not None:
+            return
+        self._capture_left, self._capture_path = frames, path
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    @property
+    def capturing(self):
+        return self._cprofile is not None
+
+    def _finish_capture(self):
+        prof, self._cprofile = self._cprofile, None
+        prof.disable()
+        prof.dump_stats(self._capture_path)
+        print(f"cProfile dump written to {self._capture_path} "
+              f"(python -m pstats {self._capture_path})")
+
+
+# Shared by the simulation and both front-ends
+profiler = Profiler()
@@ -0,0 +1,155 @@
+"""
+Columnar per-tick telemetry logs on disk.
+
+A log is a directory holding a header.json and one raw little-endian file
+per column, shaped (ticks, n_cars) in C order, plus time.bin (ticks,).
+TelemetryRecorder appends to it in chunks; TelemetryLog maps it back
+zero-copy:
+
+    log = TelemetryLog("runs/race1")
+    log["speed"][1200:1300, 2]          # numpy.memmap slice, nothing copied
+    log.lap_start(car=2, lap=3)         # tick index
+"""
+import json
+import os
+import numpy as np
+
+FORMAT_VERSION = 1
+CHUNK_TICKS = 4096
+HEADER = "header.json"
+
+class TelemetryRecorder:
+    """
+    Appends one row per tick for every car.
+
+    record() only extends flat lists with the values it is given (plain
+    numbers, which the garbage collector does not track, unlike per-car
+    tuples); every `chunk` ticks they are converted in one go and written
+    through memory maps of the column files, which grow a chunk at a time.
+    The header is rewritten at each chunk, so a log is readable even if the
+    run dies.
+    """
+    def __init__(self, path, columns, n_cars, chunk=CHUNK_TICKS, meta=None):
+        self.path, self.n_cars, self.chunk = path, n_cars, chunk
+        self.columns = {name: np.dtype(dtype).newbyteorder("<") for name, dtype in columns}
+        self.meta = meta or {}
+        self.ticks = 0
+        self._parts, self._times = None, []
+        self._lap_col = list(self.columns).index("lap") if "lap" in self.columns else None
+        self._lap_index = [{} for _ in range(n_cars)]  # per car: lap -> first tick
+        self.closed = False
+        os.makedirs(path, exist_ok=True)
+        for name in self.columns:
+            open(self._file(name), "wb").close()
+        open(self._file("time"), "wb").close()
+        self._write_header()
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def record(self, time, *parts):
+        """
+        Logs one tick. `parts` cover the columns in schema order: each is a
+        flat iterable of numbers, car by car, with one value per car for a
+        single column or k consecutive values for k columns. Every call must
+        split the columns the same way.
+        """
+        if self._parts is None:
+            self._parts = [[] for _ in parts]
+        for buf, part in zip(self._parts, parts):
+            buf.extend(part)
+        self._times.append(time)
+        if len(self._times) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        if not self._times:
+            return
+        ticks = len(self._times)
+        blocks = []
+        for buf in self._parts:
+            blocks.append(np.array(buf, dtype=np.float64).reshape(ticks, self.n_cars, -1))
+            buf.clear()
+        block = np.concatenate(blocks, axis=2) if len(blocks) > 1 else blocks[0]
+        t0, t1 = self.ticks, self.ticks + ticks
+        for k, (name, dtype) in enumerate(self.columns.items()):
+            self._append(name, dtype, block[:, :, k], (ticks, self.n_cars))
+        self._append("time", np.dtype("<f8"), np.array(self._times), (ticks,))
+        if self._lap_col is not None:
+            self._index_laps(block[:, :, self._lap_col].astype(np.int64), t0)
+        self._times = []
+        self.ticks = t1
+        self._write_header()
+
+    def _append(self, name, dtype, values, shape):
+        fname = self._file(name)
+        offset = os.path.getsize(fname)
+        with open(fname, "r+b") as f:
+            f.truncate(offset + int(np.prod(shape)) * dtype.itemsize)
+        mm = np.memmap(fname, dtype=dtype, mode="r+", offset=offset, shape=shape)
+        mm[...] = values
+        mm.flush()
+        del mm
+
+    def _index_laps(self, laps, t0):
+        first = np.ones(laps.shape, dtype=bool)
+        first[1:] = laps[1:] != laps[:-1]
+        for tick, car in zip(*np.nonzero(first)):
+            self._lap_index[car].setdefault(str(laps[tick, car]), t0 + int(tick))
+
+    def _write_header(self):
+        header = {
+            "version": FORMAT_VERSION,
+            "n_cars": self.n_cars,
+            "ticks": self.ticks,
+            "columns": {name: dtype.str for name, dtype in self.columns.items()},
+            "lap_index": self._lap_index,
+            **self.meta,
+        }
+        tmp = os.path.join(self.path, HEADER + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp, os.path.join(self.path, HEADER))
+
+    def close(self):
+        if not self.closed:
+            self.flush()
+            self.closed = True
+
+
+class TelemetryLog:
+    """Read side of a recorder directory; columns are numpy.memmap views."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER)) as f:
+            self.header = header = json.load(f)
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"unsupported telemetry log version {header['version']}")
+        self.n_cars, self.ticks = header["n_cars"], header["ticks"]
+        self.columns = list(header["columns"])
+        self.lap_index = header["lap_index"]
+        self._maps = {}
+
+    def __getitem__(self, name):
+        mm = self._maps.get(name)
+        if mm is None:
+            if name == "time":
+                dtype, shape = np.dtype("<f8"), (self.ticks,)
+            else:
+                dtype, shape = np.dtype(self.header["columns"][name]), (self.ticks, self.n_cars)
+            if not self.ticks:
+                return np.empty(shape, dtype)  # numpy cannot map an empty file
+            mm = self._maps[name] = np.memmap(os.path.join(self.path, f"{name}.bin"),
+                                              dtype=dtype, mode="r", shape=shape)
+        return mm
+
+    def __len__(self):
+        return self.ticks
+
+    def lap_start(self, car, lap):
+        """First tick recorded with `car` on lap number `lap`."""
+        return self.lap_index[car][str(lap)]
+
+    def tick_at(self, time):
+        """Last tick recorded at or before simulated `time`."""
+        return max(0, int(np.searchsorted(self["time"], time, side="right")) - 1)
@@ -0,0 +1,155 @@
+"""
+Seekable playback of a recorded telemetry log.
+
+A Replay is a cursor over a TelemetryLog: it never steps physics, it reads
+the recorded columns back and interpolates between stored ticks.
+
+    replay = Replay(TelemetryLog("runs/race1"), angles=("angle",))
+    replay.speed = -2                   # any rate, negative plays backwards
+    replay.advance(frame_seconds)
+    state = replay.state()              # column -> (n_cars,) array at replay.time
+    replay.seek_lap(car=0, lap=3)
+"""
+from collections import OrderedDict
+import numpy as np
+from src.core.recorder import CHUNK_TICKS
+
+# Decoded chunks kept in memory: the current one, the one playback is heading
+# into and the one it just left (for scrubbing back and forth over a boundary)
+CACHED_CHUNKS = 3
+# Playback speeds the front-ends step through with their replay keys
+REPLAY_SPEEDS = (-16, -4, -1, -0.25, 0.25, 1, 4, 16)
+
+class Replay:
+    """
+    Playback cursor over a TelemetryLog.
+
+    Seeking is O(1): logs are recorded at a fixed timestep, so the tick for a
+    time is computed rather than searched (then nudged over any rounding),
+    and lap starts come from the log's lap index. Columns are read through
+    the log's memory maps one chunk of ticks at a time, only when playback
+    reaches them, plus the next chunk in the direction of play once the
+    cursor is past the middle of the current one.
+
+    Float columns are interpolated linearly between the surrounding ticks;
+    names in `angles` take the shortest way round in degrees, and `unwrap`
+    maps a per-lap distance column to (lap column, lap length) so it is
+    interpolated across the start line. Integer and bool columns hold the
+    value of the last tick at or before the cursor.
+    """
+    alpha = 1.0  # state() is interpolated already; lets a Replay stand in for a FixedTimestep
+
+    def __init__(self, log, chunk=CHUNK_TICKS, angles=(), unwrap=None):
+        self.log, self.chunk = log, chunk
+        self.angles, self.unwrap = set(angles), dict(unwrap or {})
+        self.ticks = log.ticks
+        if not self.ticks:
+            raise ValueError("cannot replay an empty telemetry log")
+        times = log["time"]
+        self.start, self.end = float(times[0]), float(times[-1])
+        self.dt = float(log.header.get("dt") or (self.end - self.start) / max(self.ticks - 1, 1))
+        self.time = self.start
+        self.speed = 1.0
+        self._chunks = OrderedDict()
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    # ---------- Cursor ----------
+    def seek(self, time):
+        self.time = min(max(time, self.start), self.end)
+
+    def seek_tick(self, tick):
+        self.seek(self._time_at(min(max(tick, 0), self.ticks - 1)))
+
+    def seek_lap(self, car, lap):
+        """Jumps to the first tick of `car`'s lap `lap`; KeyError if it never started it."""
+        self.seek_tick(self.log.lap_start(car, lap))
+
+    def advance(self, seconds):
+        """Moves the cursor by `seconds` of real time at `speed`; False if it ran into either end."""
+        target = self.time + seconds * self.speed
+        self.seek(target)
+        return self.time == target
+
+    def cycle_speed(self, step, speeds=REPLAY_SPEEDS):
+        """Moves `step` places along `speeds` (e.g. +1 faster forwards, -1 towards reverse)."""
+        i = speeds.index(self.speed) if self.speed in speeds else speeds.index(1)
+        self.speed = speeds[min(max(i + step, 0), len(speeds) - 1)]
+
+    def label(self):
+        return f"{self.speed:g}x"
+
+    def tick(self):
+        """(tick, fraction of the way to the next tick) at the cursor."""
+        i = min(max(int((self.time - self.start) / self.dt), 0), self.ticks - 1)
+        # the estimate is off by a tick at most after rounding or an odd-sized step
+        while i > 0 and self._time_at(i) > self.time:
+            i -= 1
+        while i + 1 < self.ticks and self._time_at(i + 1) <= self.time:
+            i += 1
+        if i + 1 == self.ticks:
+            return i, 0.0
+        t0, t1 = self._time_at(i), self._time_at(i + 1)
+        return i, (self.time - t0) / (t1 - t0) if t1 > t0 else 0.0
+
+    # ---------- State ----------
+    def state(self, columns=None):
+        """Column name -> per-car array at the cursor, interpolated as described above."""
+        i, alpha = self.tick()
+        rows, k = self._rows(i), i - self._base(i)
+        self._prefetch(i)
+        nxt = k + 1 if k + 1 < len(rows["time"]) else k
+        out = {}
+        for name in columns or self.log.columns:
+            col = rows[name]
+            a = col[k]
+            if col.dtype.kind != "f" or alpha == 0.0 or nxt == k:
+                out[name] = a.astype(np.float64) if col.dtype.kind == "f" else a.copy()
+                continue
+            a, b = a.astype(np.float64), col[nxt].astype(np.float64)
+            if name in self.angles:
+                b = a + (b - a + 180.0) % 360.0 - 180.0
+            elif name in self.unwrap:
+                lap_col, length = self.unwrap[name]
+                b = b + (rows[lap_col][nxt] - rows[lap_col][k]) * length
+                out[name] = (a + (b - a) * alpha) % length
+                continue
+            out[name] = a + (b - a) * alpha
+        out["time"] = self.time
+        return out
+
+    # ---------- Chunks ----------
+    def _base(self, tick):
+        return tick // self.chunk * self.chunk
+
+    def _time_at(self, tick):
+        return float(self._rows(tick)["time"][tick - self._base(tick)])
+
+    def _rows(self, tick):
+        """Decoded columns for the chunk holding `tick`, plus the first tick of the next one."""
+        k = tick // self.chunk
+        rows = self._chunks.get(k)
+        if rows is None:
+            lo, hi = k * self.chunk, min((k + 1) * self.chunk + 1, self.ticks)
+            rows = {name: np.array(self.log[name][lo:hi]) for name in self.log.columns}
+            rows["time"] = np.array(self.log["time"][lo:hi])
+            self._chunks[k] = rows
+            while len(self._chunks) > CACHED_CHUNKS:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(k)
+        return rows
+
+    def _prefetch(self, tick):
+        base = self._base(tick)
+        if self.speed > 0 and tick - base >= self.chunk // 2:
+            nxt = base + self.chunk
+        elif self.speed < 0 and tick - base < self.chunk // 2:
+            nxt = base - 1
+        else:
+            return
+        if 0 <= nxt < self.ticks and nxt // self.chunk not in self._chunks:
+            self._rows(nxt)
+            self._chunks.move_to_end(tick // self.chunk)  # keep the current chunk freshest
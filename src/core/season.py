@@ -0,0 +1,247 @@
+"""
+Headless season runner.
+
+Runs every (circuit, seed) race of a season on a process pool and streams
+championship standings, lap-time distributions and DNF rates as races come
+back. Each finished race is appended to a JSON-lines checkpoint, so an
+interrupted season picks up where it stopped:
+
+    python -m src.core.season --seeds 100 --out runs/season1
+    python -m src.core.season --seeds 100 --out runs/season1   # resumes
+
+Nothing is rendered and pygame is never imported.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+from collections import defaultdict, namedtuple
+import numpy as np
+from src.core.events import ALL, DNF, EventQueue, Finish, Lap
+from src.core.tracks import TRACK_DATA, get_track
+from src.env.car import CORNER_SPEED_FACTOR, MIN_CORNER_SPEED
+from src.env.race_env import RaceEnvironment
+
+TRACKS = ("desert", "forest", "alpine", "night")
+POINTS = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1)
+CHECKPOINT = "races.jsonl"
+MAX_STEPS = 50_000       # a race still running after this many steps is called
+LOOKAHEAD = 2.0          # seconds of travel the drivers brake ahead for
+THROTTLE_NOISE = 0.15
+
+# One race of a season; `pace` is each driver's throttle on the straights,
+# and how far over a corner's safe speed they dare to carry (0.35 -> 94%, 0.95 -> 101%)
+RaceJob = namedtuple("RaceJob", "track seed laps pace")
+
+def season_jobs(tracks=TRACKS, seeds=10, laps=3, n_cars=4, season_seed=0):
+    """Every race of a season: `seeds` races per circuit, drivers keeping one pace all season."""
+    rng = random.Random(season_seed)
+    pace = tuple(round(rng.uniform(0.35, 0.95), 3) for _ in range(n_cars))
+    return [RaceJob(t, s, laps, pace) for s in range(seeds) for t in tracks]
+
+def race_key(job):
+    """Checkpoint key: the race plus every parameter its result depends on."""
+    return f"{job.track}/{job.seed}/laps={job.laps}/pace={','.join(map(str, job.pace))}"
+
+def corner_limits(track, pace):
+    """Per driver, the speed each section may be entered at (inf on straights)."""
+    safe = [max(MIN_CORNER_SPEED, s.radius * CORNER_SPEED_FACTOR) if s.kind == "corner" else float("inf")
+            for s in track.sections]
+    return [[v * (0.9 + p * 0.12) for v in safe] for p in pace]
+
+def drive(env, pace, limits, rng):
+    """Throttle on the straights, brakes for the section LOOKAHEAD seconds ahead."""
+    index = env.track.section_index
+    return [-1.0 if car.speed > lim[index(car.pos + car.speed * LOOKAHEAD)]
+            else p + rng.uniform(-THROTTLE_NOISE, THROTTLE_NOISE)
+            for car, p, lim in zip(env.cars, pace, limits)]
+
+def run_race(job):
+    """Runs one race to the flag; returns a JSON-ready result dict."""
+    env = RaceEnvironment(n=len(job.pace), laps=job.laps, track=get_track(job.track)["physics"],
+                          seed=job.seed)
+    log = EventQueue(maxlen=None)
+    env.events.set_level(ALL)
+    env.events.subscribe(log, types=(Lap, Finish, DNF))
+    rng = random.Random(job.seed)
+    pace, n = job.pace, len(job.pace)
+    limits = corner_limits(env.track, pace)
+    t0 = time.perf_counter()
+    steps = 0
+    while not env.finished() and steps < MAX_STEPS:
+        env.step(drive(env, pace, limits, rng))
+        steps += 1
+
+    lap_started = [0.0] * n
+    lap_times = [[] for _ in range(n)]
+    dnf = [None] * n
+    finish = [None] * n
+    for e in log.drain():
+        if type(e) is DNF:
+            dnf[e.car] = e.reason
+            continue
+        lap_times[e.car].append(round(e.time - lap_started[e.car], 3))
+        lap_started[e.car] = e.time
+        if type(e) is Finish:
+            finish[e.car] = e.position
+    # retired cars coast on and keep a place on the road, so classify finishers first
+    finishers = sorted((p, car) for car, p in enumerate(finish) if p is not None)
+    order = [car for _, car in finishers]
+    order += [car.id for car, _ in env.ranked() if finish[car.id] is None]
+    return {
+        "key": race_key(job), "track": job.track, "seed": job.seed,
+        "steps": steps, "race_time": round(env.race_time, 3), "wall": time.perf_counter() - t0,
+        "order": order, "laps": env.laps, "finish": finish, "dnf": dnf, "lap_times": lap_times,
+    }
+
+
+class SeasonStats:
+    """Running championship and per-circuit statistics over race results."""
+    def __init__(self, n_cars):
+        self.n_cars = n_cars
+        self.races = 0
+        self.points = [0] * n_cars
+        self.wins = [0] * n_cars
+        self.dnfs = [0] * n_cars
+        self.track_races = defaultdict(int)
+        self.track_dnfs = defaultdict(int)
+        self.lap_times = defaultdict(list)
+
+    def add(self, result):
+        self.races += 1
+        track = result["track"]
+        self.track_races[track] += 1
+        # points go to the finishers, who lead the classification
+        finishers = [car for car in result["order"] if result["finish"][car] is not None]
+        for car, pts in zip(finishers, POINTS):
+            self.points[car] += pts
+        if finishers:
+            self.wins[finishers[0]] += 1
+        for car, reason in enumerate(result["dnf"]):
+            if reason is not None:
+                self.dnfs[car] += 1
+                self.track_dnfs[track] += 1
+        for times in result["lap_times"]:
+            self.lap_times[track].extend(times)
+
+    def standings(self):
+        """(car, points, wins, dnfs) rows, championship leader first."""
+        rows = [(car, self.points[car], self.wins[car], self.dnfs[car]) for car in range(self.n_cars)]
+        return sorted(rows, key=lambda r: (-r[1], -r[2], r[0]))
+
+    def lap_time_summary(self, track):
+        """(laps, p5, median, p95) lap time in seconds for a circuit."""
+        times = self.lap_times.get(track)
+        if not times:
+            return 0, None, None, None
+        p5, p50, p95 = np.percentile(times, (5, 50, 95))
+        return len(times), p5, p50, p95
+
+    def dnf_rate(self, track=None):
+        if track is None:
+            starts, dnfs = self.races * self.n_cars, sum(self.dnfs)
+        else:
+            starts, dnfs = self.track_races[track] * self.n_cars, self.track_dnfs[track]
+        return dnfs / starts if starts else 0.0
+
+    def format(self):
+        lines = [f"{'car':<8}{'pts':>6}{'wins':>6}{'dnf':>6}"]
+        lines += [f"Car-{car:<4}{pts:>6}{wins:>6}{dnfs:>6}" for car, pts, wins, dnfs in self.standings()]
+        lines.append(f"\n{'circuit':<10}{'races':>6}{'dnf%':>7}{'laps':>7}{'p5':>8}{'median':>8}{'p95':>8}")
+        for track in sorted(self.track_races):
+            n, p5, p50, p95 = self.lap_time_summary(track)
+            times = f"{p5:>8.1f}{p50:>8.1f}{p95:>8.1f}" if n else f"{'-':>8}" * 3
+            lines.append(f"{track:<10}{self.track_races[track]:>6}{self.dnf_rate(track):>7.1%}{n:>7}{times}")
+        return "\n".join(lines)
+
+
+def winner(result):
+    car = result["order"][0]
+    return f"Car-{car}" if result["finish"][car] is not None else "none"
+
+def load_checkpoint(path):
+    """
+    Results already written to a checkpoint. A torn last line from a crash
+    is cut off, so appending resumes on a clean line.
+    """
+    results = []
+    if not os.path.exists(path):
+        return results
+    good = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            if not line.endswith(b"\n"):
+                results.pop()
+                break
+            good += len(line)
+    if good != os.path.getsize(path):
+        os.truncate(path, good)
+    return results
+
+def run_season(jobs, out_dir, workers=None, context=None, on_result=None, chunksize=1):
+    """
+    Runs `jobs` on a process pool, skipping races already in out_dir's
+    checkpoint. Checkpointed races run with other laps or drivers are left
+    in the file but not counted. on_result(result, stats, rate) is called in
+    this process as each race completes, with races per second since the
+    call started. Returns the SeasonStats over `jobs`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, CHECKPOINT)
+    keys = {race_key(job) for job in jobs}
+    checkpoint = load_checkpoint(path)
+    done = [r for r in checkpoint if r["key"] in keys]
+    if len(done) < len(checkpoint):
+        print(f"ignoring {len(checkpoint) - len(done)} checkpointed races run with other parameters")
+    stats = SeasonStats(len(jobs[0].pace) if jobs else 0)
+    for result in done:
+        stats.add(result)
+    finished = {r["key"] for r in done}
+    todo = [job for job in jobs if race_key(job) not in finished]
+    if not todo:
+        return stats
+
+    ctx = mp.get_context(context)
+    t0 = time.perf_counter()
+    with ctx.Pool(workers or os.cpu_count()) as pool, open(path, "a") as ckpt:
+        for i, result in enumerate(pool.imap_unordered(run_race, todo, chunksize), start=1):
+            ckpt.write(json.dumps(result) + "\n")
+            ckpt.flush()
+            stats.add(result)
+            if on_result is not None:
+                on_result(result, stats, i / (time.perf_counter() - t0))
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run a headless season across all circuits")
+    ap.add_argument("--out", required=True, help="directory for the resumable race checkpoint")
+    ap.add_argument("--seeds", type=int, default=10, help="races per circuit")
+    ap.add_argument("--tracks", nargs="+", default=list(TRACKS), choices=sorted(TRACK_DATA))
+    ap.add_argument("--laps", type=int, default=3)
+    ap.add_argument("--cars", type=int, default=4)
+    ap.add_argument("--season-seed", type=int, default=0, help="draws each driver's pace")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--report-every", type=int, default=20, help="races between standings tables")
+    args = ap.parse_args(argv)
+
+    jobs = season_jobs(args.tracks, args.seeds, args.laps, args.cars, args.season_seed)
+
+    def report(result, stats, rate):
+        race = f"{result['track']}/{result['seed']}"
+        print(f"[{stats.races}/{len(jobs)}] {race:<12} winner {winner(result)}"
+              f"  {rate:6.1f} races/s  dnf {stats.dnf_rate():.1%}")
+        if stats.races % args.report_every == 0:
+            print(stats.format() + "\n")
+
+    stats = run_season(jobs, args.out, args.workers, on_result=report)
+    print(f"\nSeason: {stats.races} races\n{stats.format()}")
+
+if __name__ == "__main__":
+    main()
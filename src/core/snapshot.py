@@ -0,0 +1,10 @@
+import numpy as np
+
+def pack_rng_state(rng):
+    """random.Random state as (version, uint32 array, gauss_next): ~2.5 KB instead of ~25 KB of ints."""
+    version, internal, gauss = rng.getstate()
+    return version, np.array(internal, dtype=np.uint32), gauss
+
+def unpack_rng_state(rng, state):
+    version, internal, gauss = state
+    rng.setstate((version, tuple(internal.tolist()), gauss))
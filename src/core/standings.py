@@ -0,0 +1,44 @@
+class Standings:
+    """
+    Running order of a fixed field of cars, kept up to date incrementally.
+
+    update() re-sorts the previous order in place. Between ticks the order
+    is almost sorted, which Timsort handles in close to one linear pass, so
+    a tick costs O(n + changes) rather than a fresh O(n log n) sort. Ties in
+    `keys` keep the previous order.
+
+    After an update, `overtakes` lists (gainer, loser) index pairs for every
+    position swap since the last one, unless built with overtakes=False.
+    """
+    def __init__(self, n, overtakes=True):
+        self.order = list(range(n))   # car indices, leader first
+        self.rank = list(range(n))    # rank[i] = 0-based position of car i
+        self.track_overtakes = overtakes
+        self.overtakes = []
+
+    def update(self, keys):
+        """`keys[i]` orders car i in the field: larger is further ahead."""
+        old_rank, order = self.rank, self.order
+        before = order[:]
+        order.sort(key=keys.__getitem__, reverse=True)
+        if order == before:
+            self.overtakes = []
+            return order
+        rank = [0] * len(order)
+        for r, i in enumerate(order):
+            rank[i] = r
+        self.rank = rank
+        if not self.track_overtakes:
+            return order
+
+        # the swaps are the inversions of the old ranks read in the new
+        # order; an insertion pass over them lists each one exactly once
+        overtakes, seq = [], []
+        for i in order:
+            k = len(seq)
+            while k and old_rank[seq[k - 1]] > old_rank[i]:
+                k -= 1
+                overtakes.append((seq[k], i))
+            seq.insert(k, i)
+        self.overtakes = overtakes
+        return order
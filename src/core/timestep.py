@@ -0,0 +1,62 @@
+import time
+
+# Simulation speed multipliers the front-ends cycle through; None runs as many
+# steps as fit in the frame budget.
+TIME_SCALES = (1, 4, 16, None)
+
+class FixedTimestep:
+    """
+    Accumulator that decouples a fixed-rate simulation from the render loop.
+
+        for _ in ts.steps(frame_seconds):
+            env.step(actions)
+        draw(alpha=ts.alpha)
+
+    Real frame time (times `scale`) is banked and paid out in whole `dt`
+    steps; `alpha` is the leftover fraction of a step, for interpolating
+    between the previous and current state. With scale=None the simulation
+    runs flat out for `budget` seconds of wall time per frame instead; a
+    fixed scale that cannot keep up within that budget slows down rather
+    than falling further behind every frame.
+    """
+    def __init__(self, dt, scale=1, max_frame=0.25, budget=1 / 80):
+        self.dt = dt
+        self.scale = scale
+        self.max_frame = max_frame  # clamps the catch-up after a stall
+        self.budget = budget
+        self.acc = 0.0
+
+    @property
+    def alpha(self):
+        if self.scale is None:
+            return 1.0  # no step is ever half-done when running flat out
+        return min(self.acc / self.dt, 1.0)
+
+    def set_scale(self, scale):
+        self.scale = scale
+        self.acc = 0.0
+
+    def cycle_scale(self, scales=TIME_SCALES):
+        i = scales.index(self.scale) if self.scale in scales else -1
+        self.set_scale(scales[(i + 1) % len(scales)])
+
+    def label(self):
+        return "MAX" if self.scale is None else f"{self.scale}x"
+
+    def steps(self, frame_seconds):
+        """Yields once per simulation step due for a frame that took `frame_seconds`."""
+        deadline = time.perf_counter() + self.budget
+        if self.scale is None:
+            self.acc = 0.0
+            while True:
+                yield
+                if time.perf_counter() >= deadline:
+                    return
+        self.acc += min(frame_seconds, self.max_frame) * self.scale
+        while self.acc >= self.dt:
+            self.acc -= self.dt
+            yield
+            if time.perf_counter() >= deadline:
+                # can't keep up at this scale: drop the backlog rather than spiral
+                self.acc %= self.dt
+                return
@@ -74,9 +74,7 @@ def get_track(name: str) -> dict:
     track_info = TRACK_DATA[name]
     
     # The Track object from track.py now gets initialized with the sections
-    track_physics = Track()
-    track_physics.sections = track_info["sections"]
-    track_physics.length = sum(s.length for s in track_physics.sections)
+    track_physics = Track(track_info["sections"])
 
     return {
         "name": theme["name"],
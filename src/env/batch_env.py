@@ -0,0 +1,310 @@
+import numpy as np
+from src.env.car import (DT, MAX_ACCEL, DRAG_COEFF, MIN_GRIP, MIN_CORNER_SPEED,
+                         CORNER_SPEED_FACTOR, CORNER_BRAKE, CORNER_DAMAGE, DRS_RANGE,
+                         DRS_DELAY, DRS_BOOST, SAFETY_SPEED, FUEL_BURN, TYRE_WEAR_RATE)
+from src.env.race_env import SAFETY_CAR_PROB, SAFETY_CAR_STEPS
+from src.env.track import Track
+
+try:
+    from numba import njit
+except ImportError:  # optional: without it every step takes the NumPy path
+    njit = None
+
+NEVER = np.iinfo(np.int64).max  # flag tick of a race that never gets a yellow
+
+class BatchRaceEnvironment:
+    """
+    Many independent races advanced together.
+
+    Car state lives in (n_races, n_cars) arrays instead of Car objects, and
+    one step applies the same rules as RaceEnvironment.step / Car.update to
+    every car of every race. With numba installed (jit=None or True) a
+    compiled loop runs each race car by car in road order, exactly as the
+    object model does; jit=False, or no numba, uses whole-array NumPy
+    passes instead. Both give the same results as RaceEnvironment for the
+    same actions and yellow flags, including cars that took the flag
+    (`parked`) stopping past the line.
+
+    Each race's next yellow flag is drawn ahead of time (the gap between
+    flags is geometric), which is the same per-step chance as drawing
+    every tick without spending a random number per race per step.
+    """
+    def __init__(self, n_races=1024, n=4, laps=3, track=None, seed=None, jit=None):
+        if jit and njit is None:
+            raise ImportError("jit=True needs numba")
+        self.track = track if track is not None else Track()
+        self.n_races, self.n_cars = n_races, n
+        self.total_laps = laps
+        self.jit = njit is not None if jit is None else bool(jit)
+        self.rng = np.random.default_rng(seed)
+        self._row_base = np.arange(n_races)[:, None] * n
+        self._compile_track()
+        self.reset()
+
+    def _compile_track(self):
+        t = self.track
+        # straights never force a lift, so their safe speed is unbounded
+        self._sec_safe = np.where(t.section_is_corner,
+                                  np.maximum(MIN_CORNER_SPEED, t.section_radius * CORNER_SPEED_FACTOR),
+                                  np.inf)
+        self._last_sec = len(t.sections) - 1
+        # section of each whole metre, the start of the compiled loop's section search
+        self._metre_sec = np.searchsorted(t.section_ends, np.arange(int(t.length) + 1), side="left")
+
+    def reset(self, races=None):
+        """Resets every race, or only the races selected by an index/mask."""
+        shape = (self.n_races, self.n_cars)
+        if races is None:
+            self.ticks = 0
+            self.pos = np.zeros(shape)
+            self.speed = np.zeros(shape)
+            self.fuel = np.full(shape, 100.0)
+            self.tyre_wear = np.zeros(shape)
+            self.damage = np.zeros(shape)
+            self.behind_timer = np.zeros(shape)
+            self.done = np.zeros(shape, dtype=bool)
+            self.parked = np.zeros(shape, dtype=bool)  # took the flag: no longer updated
+            self.laps = np.zeros(shape, dtype=np.int64)
+            self.safety_car = np.zeros(self.n_races, dtype=bool)
+            self.yellow_timer = np.zeros(self.n_races, dtype=np.int64)
+            self._order = np.tile(np.arange(self.n_cars), (self.n_races, 1))  # road order, leader first
+            self._next_flag = np.empty(self.n_races, dtype=np.int64)
+            self._draw_flags(slice(None), self.ticks - 1)
+            return
+        for arr in (self.pos, self.speed, self.tyre_wear, self.damage, self.behind_timer):
+            arr[races] = 0.0
+        self.fuel[races] = 100.0
+        self.done[races] = False
+        self.parked[races] = False
+        self.laps[races] = 0
+        self.safety_car[races] = False
+        self.yellow_timer[races] = 0
+        self._order[races] = np.arange(self.n_cars)
+        self._draw_flags(races, self.ticks - 1)
+
+    def _draw_flags(self, races, after):
+        """Schedules the next yellow flag of `races` for a tick after `after`."""
+        n = len(self._next_flag[races])
+        if SAFETY_CAR_PROB > 0:
+            self._next_flag[races] = after + self.rng.geometric(SAFETY_CAR_PROB, n)
+        else:
+            self._next_flag[races] = NEVER
+
+    def step(self, actions):
+        """
+        Advances every race by one tick; `actions` broadcasts to (n_races,
+        n_cars). Returns (progress, finished): laps completed plus the
+        fraction of the current one per car, and finished() per race.
+        """
+        throttle = np.asarray(actions, dtype=np.float64)
+        if throttle.shape != self.pos.shape:
+            throttle = np.ascontiguousarray(np.broadcast_to(throttle, self.pos.shape))
+        tick = self.ticks
+        self.ticks += 1
+        progress = np.empty(self.pos.shape)
+        finished = np.empty(self.n_races, dtype=bool)
+        if self.jit:
+            t = self.track
+            flagged = _step_races(self.pos, self.speed, self.fuel, self.tyre_wear, self.damage,
+                                  self.behind_timer, self.done, self.parked, self.laps, self._order, throttle,
+                                  self.safety_car, self.yellow_timer, self._next_flag, tick,
+                                  self._metre_sec, t.section_ends, self._sec_safe, t.section_drs,
+                                  t.length, 1.0 / t.length, self.total_laps, progress, finished)
+        else:
+            flagged = self._step_arrays(throttle, tick)
+            np.multiply(self.pos, 1.0 / self.track.length, out=progress)
+            progress += self.laps
+            finished[:] = self.finished()
+        if flagged:
+            self._draw_flags(np.flatnonzero(self._next_flag == tick), tick)
+        return progress, finished
+
+    def _step_arrays(self, throttle, tick):
+        """The NumPy step; returns how many races got a yellow flag."""
+        # maybe trigger yellow flag
+        flag = self._next_flag == tick
+        self.safety_car |= flag
+        self.yellow_timer[flag] = SAFETY_CAR_STEPS
+        running = self.yellow_timer > 0
+        self.yellow_timer[running] -= 1
+        self.safety_car[running & (self.yellow_timer == 0)] = False
+
+        # car ahead on the road (-1 for the leader); re-sorting last tick's
+        # order stably keeps it for ties, as RaceEnvironment.road does
+        prev = self._order
+        order = np.take_along_axis(
+            prev, np.argsort(-np.take_along_axis(self.pos, prev, axis=1), axis=1, kind="stable"), axis=1)
+        self._order = order
+        parked = self.parked
+        live = None if not parked.any() else ~parked
+        if live is not None:  # cars that took the flag sit out, so move them behind the field
+            order = np.take_along_axis(
+                order, np.argsort(np.take_along_axis(parked, order, axis=1), axis=1, kind="stable"), axis=1)
+        ahead = np.full((self.n_races, self.n_cars), -1)
+        np.put_along_axis(ahead, order[:, 1:], order[:, :-1], axis=1)
+        has_ahead = ahead >= 0
+        ahead = np.maximum(ahead, 0) + self._row_base
+
+        # pos stays in [0, length) between steps, so no wrap is needed here
+        sec = np.minimum(np.searchsorted(self.track.section_ends, self.pos, side="left"),
+                         self._last_sec)
+        throttle = np.clip(throttle, -1, 1)
+        grip = np.maximum(MIN_GRIP, 1 - self.tyre_wear - self.damage)
+
+        drag = DRAG_COEFF * self.speed**2
+        accel = MAX_ACCEL * throttle * grip - drag
+
+        # slow for corners
+        excess = np.maximum(self.speed - self._sec_safe[sec], 0.0)
+        if live is not None:
+            excess *= live
+        accel -= excess * CORNER_BRAKE
+        self.damage += CORNER_DAMAGE * excess
+
+        timer = self.behind_timer + DT
+        drs_ready = self.track.section_drs[sec] & (timer > DRS_DELAY)
+        safety = self.safety_car[:, None]
+        start_speed = np.where(safety, np.minimum(self.speed, SAFETY_SPEED), self.speed)
+        length = self.track.length
+
+        # Car.update sees the car ahead *after* its own update, so whether a car
+        # is in DRS range depends on the boost of the car in front. Iterate to
+        # the fixed point, which settles from the leader backwards in at most
+        # n+1 passes; starting from last tick's DRS state it is usually one.
+        boost = drs_ready & (self.behind_timer > 0)
+        while True:
+            acc = np.where(boost, accel + DRS_BOOST, accel)
+            acc = np.where(safety, np.minimum(acc, 0), acc)
+            speed = np.maximum(0, start_speed + acc * DT)
+            pos = self.pos + speed * DT
+            lapped = pos >= length
+            pos[lapped] -= length
+
+            ahead_pos = np.take(pos, ahead)
+            behind = has_ahead & (ahead_pos - self.pos < DRS_RANGE) & (ahead_pos > self.pos)
+            new_boost = behind & drs_ready
+            if np.array_equal(new_boost, boost):
+                break
+            boost = new_boost
+
+        behind_timer = np.where(behind, timer, 0.0)
+        wear = np.abs(throttle)
+        if live is not None:
+            behind_timer = np.where(live, behind_timer, self.behind_timer)
+            speed = np.where(live, speed, self.speed)
+            pos = np.where(live, pos, self.pos)
+            lapped &= live
+            wear *= live
+        self.behind_timer, self.speed, self.pos = behind_timer, speed, pos
+        self.fuel -= FUEL_BURN * wear
+        self.tyre_wear += TYRE_WEAR_RATE * wear
+        self.done |= (self.fuel <= 0) | (self.damage >= 1)
+        self.laps += lapped
+
+        # a car still running when it completes the distance stops past the line
+        taken = lapped & (self.laps == self.total_laps) & ~self.done
+        self.parked |= taken
+        self.speed[taken] = 0.0
+        return int(flag.sum())
+
+    def finished(self):
+        """Per-race flag, True once every car has completed its laps or retired."""
+        return ((self.laps >= self.total_laps) | self.done).all(axis=1)
+
+
+def _step_races(pos, speed, fuel, tyre_wear, damage, behind_timer, done, parked, laps, order, throttle,
+                safety_car, yellow_timer, next_flag, tick, metre_sec, section_ends, section_safe,
+                section_drs, length, inv_length, total_laps, progress, finished):
+    """
+    One tick of every race, written as RaceEnvironment.step and Car.update
+    are, statement for statement, so the arithmetic rounds the same way.
+    Updates the state arrays in place, fills progress and finished, and
+    returns how many races got a yellow flag.
+    """
+    n_races, n_cars = pos.shape
+    flagged = 0
+    for r in range(n_races):
+        # maybe trigger yellow flag
+        if next_flag[r] == tick:
+            safety_car[r] = True
+            yellow_timer[r] = SAFETY_CAR_STEPS
+            flagged += 1
+        if yellow_timer[r] > 0:
+            yellow_timer[r] -= 1
+            if yellow_timer[r] == 0:
+                safety_car[r] = False
+        safety = safety_car[r]
+
+        # road order: an insertion pass over last tick's order, so ties keep it
+        o = order[r]
+        for k in range(1, n_cars):
+            car, p = o[k], pos[r, o[k]]
+            j = k
+            while j > 0 and pos[r, o[j - 1]] < p:
+                o[j] = o[j - 1]
+                j -= 1
+            o[j] = car
+
+        done_all = True
+        ahead = -1  # last car updated; cars that took the flag are passed over
+        for k in range(n_cars):
+            i = o[k]
+            if parked[r, i]:
+                progress[r, i] = laps[r, i] + pos[r, i] * inv_length
+                continue
+            x, v, dmg, behind = pos[r, i], speed[r, i], damage[r, i], behind_timer[r, i]
+            sec = metre_sec[int(x)]
+            while section_ends[sec] < x:
+                sec += 1
+
+            a = throttle[r, i]
+            th = a if a < 1.0 else 1.0
+            th = th if th > -1.0 else -1.0
+            grip = 1 - tyre_wear[r, i] - dmg
+            grip = grip if grip > MIN_GRIP else MIN_GRIP
+            accel = MAX_ACCEL * th * grip - DRAG_COEFF * (v * v)
+
+            # slow for corners (straights have an infinite safe speed)
+            safe = section_safe[sec]
+            if v > safe:
+                accel -= (v - safe) * CORNER_BRAKE
+                dmg += CORNER_DAMAGE * (v - safe)
+
+            # slipstream / DRS, against the car ahead as already updated this tick
+            if ahead >= 0 and pos[r, ahead] - x < DRS_RANGE and pos[r, ahead] > x:
+                behind += DT
+                if section_drs[sec] and behind > DRS_DELAY:
+                    accel += DRS_BOOST
+            else:
+                behind = 0.0
+
+            if safety:
+                accel = accel if accel < 0 else 0.0
+                v = v if v < SAFETY_SPEED else SAFETY_SPEED
+
+            v = v + accel * DT
+            v = v if v > 0 else 0.0
+            x += v * DT
+            wear = abs(th)
+            f = fuel[r, i] - FUEL_BURN * wear
+            tyre_wear[r, i] += TYRE_WEAR_RATE * wear
+            out = done[r, i] or f <= 0 or dmg >= 1
+            lap = laps[r, i]
+
+            # lap counting
+            if x >= length:
+                x -= length
+                lap += 1
+                if lap == total_laps and not out:
+                    parked[r, i] = True
+                    v = 0.0
+            pos[r, i], speed[r, i], fuel[r, i], damage[r, i] = x, v, f, dmg
+            behind_timer[r, i], done[r, i], laps[r, i] = behind, out, lap
+            progress[r, i] = lap + x * inv_length  # a division costs a sixth of the tick
+            done_all = done_all and (lap >= total_laps or out)
+            ahead = i
+        finished[r] = done_all
+    return flagged
+
+if njit is not None:
+    _step_races = njit(cache=True)(_step_races)
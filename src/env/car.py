@@ -1,6 +1,27 @@
 import random, math
 
+# Longitudinal model constants, shared with the batched environment
+DT = 0.1                  # seconds per step
+MAX_ACCEL = 30            # m/s^2 at full throttle and full grip
+DRAG_COEFF = 0.00045
+MIN_GRIP = 0.4
+MIN_CORNER_SPEED = 30     # m/s
+CORNER_SPEED_FACTOR = 0.6 # safe speed per metre of radius
+CORNER_BRAKE = 0.3
+CORNER_DAMAGE = 0.0005
+DRS_RANGE = 100           # metres to the car ahead
+DRS_DELAY = 1.0           # seconds in range before DRS opens
+DRS_BOOST = 10
+SAFETY_SPEED = 40
+FUEL_BURN = 0.02
+TYRE_WEAR_RATE = 0.0005
+
+# A car's mutable state; the fixed schema of Car and the columns of RaceSnapshot.cars
+CAR_STATE = ("pos", "speed", "accel", "fuel", "tyre_wear", "damage", "behind_timer", "done")
+
 class Car:
+    __slots__ = ("id",) + CAR_STATE
+
     def __init__(self, car_id, tyre="soft"):
         self.id = car_id
         self.pos = 0.0
@@ -14,36 +35,36 @@ class Car:
 
     def update(self, action, section, ahead=None, safety=False):
         throttle = max(-1, min(1, action))
-        grip = max(0.4, 1 - self.tyre_wear - self.damage)
+        grip = max(MIN_GRIP, 1 - self.tyre_wear - self.damage)
 
         # base accel, mass, drag
-        drag = 0.00045 * self.speed**2
-        accel = 30 * throttle * grip - drag
+        drag = DRAG_COEFF * self.speed**2
+        accel = MAX_ACCEL * throttle * grip - drag
 
         # slow for corners
         if section.kind == "corner":
-            safe_speed = max(30, section.radius * 0.6)
+            safe_speed = max(MIN_CORNER_SPEED, section.radius * CORNER_SPEED_FACTOR)
             if self.speed > safe_speed:
-                accel -= (self.speed - safe_speed) * 0.3
-                self.damage += 0.0005 * (self.speed - safe_speed)
+                accel -= (self.speed - safe_speed) * CORNER_BRAKE
+                self.damage += CORNER_DAMAGE * (self.speed - safe_speed)
 
         # slipstream / DRS
-        if ahead and ahead.pos - self.pos < 100 and ahead.pos > self.pos:
-            self.behind_timer += 0.1
-            if section.drs and self.behind_timer > 1.0:
-                accel += 10  # boost
+        if ahead and ahead.pos - self.pos < DRS_RANGE and ahead.pos > self.pos:
+            self.behind_timer += DT
+            if section.drs and self.behind_timer > DRS_DELAY:
+                accel += DRS_BOOST  # boost
         else:
             self.behind_timer = 0.0
 
         # safety car mode
         if safety:
             accel = min(accel, 0)
-            self.speed = min(self.speed, 40)
+            self.speed = min(self.speed, SAFETY_SPEED)
 
         # update dynamics
-        self.speed = max(0, self.speed + accel * 0.1)
-        self.pos += self.speed * 0.1
-        self.fuel -= 0.02 * abs(throttle)
-        self.tyre_wear += 0.0005 * abs(throttle)
+        self.speed = max(0, self.speed + accel * DT)
+        self.pos += self.speed * DT
+        self.fuel -= FUEL_BURN * abs(throttle)
+        self.tyre_wear += TYRE_WEAR_RATE * abs(throttle)
         if self.fuel <= 0 or self.damage >= 1:
             self.done = True
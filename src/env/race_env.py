@@ -1,32 +1,73 @@
 import random
-from src.env.car import Car
+from collections import namedtuple
+from itertools import chain
+from operator import attrgetter
+import numpy as np
+from src.core.events import ALL, DNF, EventBus, Finish, Flag, Lap, Overtake
+from src.core.profiler import profiler
+from src.core.recorder import TelemetryRecorder
+from src.core.snapshot import pack_rng_state, unpack_rng_state
+from src.core.standings import Standings
+from src.env.car import CAR_STATE, Car, DT
 from src.env.track import Track
 
+SAFETY_CAR_PROB = 0.002   # chance per step of a yellow flag
+SAFETY_CAR_STEPS = 30
+
+# Columns written per car and tick by record_to(); sections are left out,
+# as track.section_indices(log["pos"]) recovers them
+RECORD_COLUMNS = (("pos", "f4"), ("speed", "f4"), ("fuel", "f4"), ("tyre_wear", "f4"),
+                  ("damage", "f4"), ("done", "b1"), ("lap", "i2"), ("throttle", "f4"))
+_record_row = attrgetter(*(name for name, _ in RECORD_COLUMNS[:6]))
+
+# cars: one CAR_STATE row per car; finishers: car ids in the order they took the flag
+RaceSnapshot = namedtuple("RaceSnapshot", "cars laps safety_car yellow_timer race_time rng finishers")
+
 class RaceEnvironment:
-    def __init__(self, n=4, laps=3):
-        self.track = Track()
+    def __init__(self, n=4, laps=3, track=None, seed=None):
+        self.track = track if track is not None else Track()
+        self.rng = random.Random(seed)
         self.laps = [0]*n
         self.cars = [Car(i) for i in range(n)]
         self.total_laps = laps
         self.weather = "dry"
         self.safety_car = False
         self.yellow_timer = 0
+        self.race_time = 0.0      # simulated seconds
+        self.finishers = []       # car ids in the order they took the flag
+        self.road = Standings(n, overtakes=False)  # order on the road, for slipstream/DRS
+        self.standings = Standings(n)               # race order: finishers, then laps and distance into the lap
+        self.recorder = None
+        self.events = EventBus()
 
+    @profiler.timed("env.step")
     def step(self, actions):
+        now = self.race_time + DT
+        events = self.events
         # maybe trigger yellow flag
-        if random.random() < 0.002:
+        if self.rng.random() < SAFETY_CAR_PROB:
             self.safety_car = True
-            self.yellow_timer = 30
-            print("⚠️  Yellow flag! Safety car deployed.")
+            self.yellow_timer = SAFETY_CAR_STEPS
+            if events.level:
+                events.emit(Flag(now, "yellow"))
 
         if self.yellow_timer > 0:
             self.yellow_timer -= 1
             if self.yellow_timer == 0:
                 self.safety_car = False
-                print("✅ Green flag!")
+                if events.level:
+                    events.emit(Flag(now, "green"))
 
-        # sort by position for overtaking logic
-        order = sorted(self.cars, key=lambda c: c.pos, reverse=True)
+        # sort by position for overtaking logic; ties keep the previous order,
+        # which from the grid is car id order
+        cars = self.cars
+        running = [not c.done for c in cars] if events.level else None
+        lapped = []
+        road = self.road.update([c.pos for c in cars])
+        if self.finishers:  # cars that took the flag stop just past the line
+            parked = set(self.finishers)
+            road = [i for i in road if i not in parked]
+        order = [cars[i] for i in road]
         for idx, car in enumerate(order):
             ahead = order[idx-1] if idx > 0 else None
             sec = self.track.section_at(car.pos)
@@ -36,6 +77,81 @@ class RaceEnvironment:
             if car.pos >= self.track.length:
                 car.pos -= self.track.length
                 self.laps[car.id] += 1
+                lapped.append(car.id)
+                if self.laps[car.id] == self.total_laps and not car.done:
+                    self.finishers.append(car.id)
+                    car.speed = 0.0
+        self.race_time = now
+        self._update_standings()
+        if running is not None:
+            self._emit_events(running, lapped)
+        events.flush()
+        if self.recorder is not None:
+            self._record(actions)
+
+    def _emit_events(self, running, lapped):
+        events, cars, now = self.events, self.cars, self.race_time
+        for i in lapped:
+            lap = self.laps[i]
+            if cars[i].done:
+                continue  # retired cars still coast round
+            if lap == self.total_laps:
+                # retired cars coasting ahead on the road don't take a place
+                events.emit(Finish(now, cars[i].id, self.finishers.index(i) + 1))
+            elif lap < self.total_laps and events.level >= ALL:
+                events.emit(Lap(now, cars[i].id, lap + 1))
+        for car, was_running in zip(cars, running):
+            if was_running and car.done and car.id not in self.finishers:
+                events.emit(DNF(now, car.id, "fuel" if car.fuel <= 0 else "damage"))
+        if events.level >= ALL:
+            for gainer, loser in self.standings.overtakes:
+                events.emit(Overtake(now, cars[gainer].id, cars[loser].id))
+
+    def record_to(self, path, **kwargs):
+        """Starts logging every car's state each step to a TelemetryRecorder directory."""
+        self.recorder = TelemetryRecorder(path, RECORD_COLUMNS, len(self.cars), meta={
+            "source": "RaceEnvironment", "dt": DT, "track_length": self.track.length,
+            "total_laps": self.total_laps, "car_ids": [c.id for c in self.cars]}, **kwargs)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def _record(self, actions):
+        self.recorder.record(self.race_time, chain.from_iterable(map(_record_row, self.cars)),
+                             self.laps, actions)
+
+    def _update_standings(self):
+        keys = [(0, lap, c.pos, -i) for i, (c, lap) in enumerate(zip(self.cars, self.laps))]
+        for place, i in enumerate(self.finishers):
+            keys[i] = (1, -place, 0.0, -i)  # finishers lead, in the order they took the flag
+        self.standings.update(keys)
+
+    def ranked(self):
+        """(car, laps) pairs in race order, leader first."""
+        return [(self.cars[i], self.laps[i]) for i in self.standings.order]
 
     def finished(self):
         return all(l >= self.total_laps or c.done for l,c in zip(self.laps,self.cars))
+
+    def snapshot(self):
+        """Captures the full race state (cars, laps, flags, RNG) for a later restore()."""
+        cars = np.array([[getattr(c, f) for f in CAR_STATE] for c in self.cars], dtype=np.float64)
+        return RaceSnapshot(cars, np.array(self.laps), self.safety_car, self.yellow_timer,
+                            self.race_time, pack_rng_state(self.rng), tuple(self.finishers))
+
+    def restore(self, snap):
+        """Rewinds this environment to a snapshot taken from it (or an identical one)."""
+        for car, row in zip(self.cars, snap.cars.tolist()):
+            car.pos, car.speed, car.accel, car.fuel, car.tyre_wear, car.damage, car.behind_timer = row[:7]
+            car.done = bool(row[7])
+        self.laps = snap.laps.tolist()
+        self.safety_car, self.yellow_timer = snap.safety_car, snap.yellow_timer
+        self.race_time = snap.race_time
+        self.finishers = list(snap.finishers)
+        self._update_standings()
+        self.standings.overtakes = []
+        self.events.clear()
+        unpack_rng_state(self.rng, snap.rng)
@@ -0,0 +1,62 @@
+from src.core.recorder import TelemetryLog
+from src.core.replay import Replay
+from src.core.standings import Standings
+from src.env.track import Track
+
+class ReplayCar:
+    """Read-only stand-in for a Car; its attributes are set from the replay each refresh."""
+    def __init__(self, car_id):
+        self.id = car_id
+
+class ReplayEnvironment:
+    """
+    Plays back a log written by RaceEnvironment.record_to() through the same
+    attributes Display and Leaderboard read from a live RaceEnvironment
+    (cars, laps, race_time, ranked(), ...). Nothing is simulated: every
+    refresh reads the recorded state at the replay cursor.
+    """
+    def __init__(self, path, track=None):
+        self.log = log = path if isinstance(path, TelemetryLog) else TelemetryLog(path)
+        self.track = track if track is not None else Track()
+        self.replay = Replay(log, unwrap={"pos": ("lap", log.header["track_length"])})
+        self.cars = [ReplayCar(i) for i in log.header["car_ids"]]
+        self.total_laps = log.header.get("total_laps")
+        self.weather = "dry"
+        self.standings = Standings(len(self.cars), overtakes=False)
+        self._fields = [name for name in log.columns if name not in ("lap", "throttle")]
+        self.refresh()
+
+    def refresh(self):
+        state = self.replay.state()
+        for name in self._fields:
+            for car, v in zip(self.cars, state[name].tolist()):
+                setattr(car, name, v)
+        self.laps = state["lap"].tolist()
+        self.race_time = state["time"]
+        self.standings.update([(lap, c.pos, -i) for i, (c, lap) in enumerate(zip(self.cars, self.laps))])
+
+    def advance(self, seconds):
+        """Plays `seconds` of real time at replay.speed; False once playback hits either end."""
+        moving = self.replay.advance(seconds)
+        self.refresh()
+        return moving
+
+    def seek(self, time):
+        self.replay.seek(time)
+        self.refresh()
+
+    def seek_lap(self, lap):
+        """Jumps to where the current leader started lap `lap`, if it got that far."""
+        try:
+            self.replay.seek_lap(self.standings.order[0], lap)
+        except KeyError:
+            return False
+        self.refresh()
+        return True
+
+    def ranked(self):
+        """(car, laps) pairs in race order, leader first."""
+        return [(self.cars[i], self.laps[i]) for i in self.standings.order]
+
+    def finished(self):
+        return self.replay.time >= self.replay.end
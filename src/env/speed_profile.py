@@ -0,0 +1,104 @@
+"""
+Compiled speed profiles for the 1D car model.
+
+A profile is the fastest a lone car can lap a Track at a given grip: full
+throttle out of every corner, braking at the last moment to reach the next
+corner's safe speed, and never above it through the corner (going faster
+there only costs damage). It is built once on a fine distance grid with a
+forward acceleration pass and a backward braking pass, then cached, so lap
+and sector times are lookups:
+
+    lap_time(track, tyre_wear=car.tyre_wear, damage=car.damage)     # cached float
+    profile = speed_profile(track, car.tyre_wear, car.damage)
+    profile.section_times, profile.time_between(car.pos, track.length)
+
+Profiles are keyed by the track layout and grip rounded to GRIP_STEP.
+Grip is the only part of the car state the model's dynamics depend on:
+tyre wear and damage enter through it, and fuel has no weight in
+Car.update, so it does not change the profile.
+"""
+import math
+from functools import lru_cache
+import numpy as np
+from src.env.car import CORNER_SPEED_FACTOR, DRAG_COEFF, MAX_ACCEL, MIN_CORNER_SPEED, MIN_GRIP
+
+GRIP_STEP = 0.02          # grip resolution of the cache
+GRID_STEP = 1.0           # metres between profile points
+CACHE_SIZE = 512          # profiles kept (tracks x grip levels x flying/standing)
+
+class SpeedProfile:
+    """
+    Speed and elapsed time along one lap. `distance`, `speed` and `time` are
+    arrays over the grid (time from the start line); `section_times` holds
+    the time spent in each TrackSection.
+    """
+    def __init__(self, layout, grip, flying=True, step=GRID_STEP):
+        self.grip, self.flying = grip, flying
+        lengths = np.array([sec[1] for sec in layout], dtype=np.float64)
+        ends = np.cumsum(lengths)
+        self.length = float(ends[-1])
+        n = max(int(math.ceil(self.length / step)), len(layout))
+        self.distance = s = np.linspace(0.0, self.length, n + 1)
+
+        # speed limit at every grid point: safe speed in corners, else the drag-limited top speed
+        top = math.sqrt(MAX_ACCEL * grip / DRAG_COEFF)
+        safe = [max(MIN_CORNER_SPEED, r * CORNER_SPEED_FACTOR) if kind == "corner" else top
+                for kind, _, r, _ in layout]
+        sec = np.minimum(np.searchsorted(ends, s, side="left"), len(layout) - 1)
+        limit = np.array(safe)[sec].tolist()
+        if flying:
+            # a flying lap enters at the speed the previous lap ends with and
+            # brakes for the next lap's first corner: solve three laps, keep the middle one
+            speed = self._envelope(limit[:-1] * 3 + limit[-1:], s[1] - s[0], grip)[n:2 * n + 1]
+        else:
+            speed = self._envelope(limit, s[1] - s[0], grip)
+        self.speed = v = np.array(speed)
+
+        # trapezoidal time per cell; from a standing start the first cell averages v/2
+        dt = 2.0 * np.diff(s) / np.maximum(v[:-1] + v[1:], 1e-9)
+        self.time = np.concatenate(([0.0], np.cumsum(dt)))
+        self.lap_time = float(self.time[-1])
+        self.section_ends = ends
+        self.section_times = np.diff(np.interp(ends, s, self.time), prepend=0.0)
+
+    @staticmethod
+    def _envelope(limit, ds, grip):
+        """Speeds from rest under the per-point limits: a throttle pass forwards, a brake pass backwards."""
+        accel = MAX_ACCEL * grip
+        v = [0.0] * len(limit)
+        for i in range(1, len(limit)):
+            u = v[i - 1]
+            v[i] = min(limit[i], math.sqrt(u * u + 2.0 * (accel - DRAG_COEFF * u * u) * ds))
+        for i in range(len(limit) - 2, -1, -1):
+            u = v[i + 1]
+            v[i] = min(v[i], math.sqrt(u * u + 2.0 * (accel + DRAG_COEFF * u * u) * ds))
+        return v
+
+    def speed_at(self, pos):
+        return float(np.interp(pos % self.length, self.distance, self.speed))
+
+    def time_at(self, pos):
+        """Seconds from the start line to `pos` within the lap."""
+        return float(np.interp(pos % self.length, self.distance, self.time))
+
+    def time_between(self, a, b):
+        """Seconds from lap distance `a` to `b`, going round the start line if b < a."""
+        t = self.time_at(b) - self.time_at(a)
+        return t if t >= 0 else t + self.lap_time
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _profile(layout, bucket, flying):
+    return SpeedProfile(layout, bucket * GRIP_STEP, flying)
+
+def grip_bucket(tyre_wear=0.0, damage=0.0):
+    """The Car.update grip for this wear and damage, in GRIP_STEP units."""
+    return round(max(MIN_GRIP, 1 - tyre_wear - damage) / GRIP_STEP)
+
+def speed_profile(track, tyre_wear=0.0, damage=0.0, flying=True):
+    """Cached SpeedProfile of `track` for a car in this state; flying=False starts from rest."""
+    return _profile(track.layout, grip_bucket(tyre_wear, damage), flying)
+
+def lap_time(track, tyre_wear=0.0, damage=0.0, flying=True):
+    """Lap time in seconds from the cached profile."""
+    return _profile(track.layout, grip_bucket(tyre_wear, damage), flying).lap_time
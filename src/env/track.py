@@ -1,4 +1,9 @@
+from bisect import bisect_left
+import numpy as np
+
 class TrackSection:
+    __slots__ = ("kind", "length", "radius", "drs")
+
     def __init__(self, kind, length, radius=None, drs=False):
         self.kind = kind          # "straight" or "corner"
         self.length = length      # metres
@@ -6,22 +11,54 @@ class TrackSection:
         self.drs = drs            # bool
 
 class Track:
-    def __init__(self):
-        self.sections = [
+    def __init__(self, sections=None):
+        self.sections = sections if sections is not None else [
             TrackSection("straight", 800, drs=True),
             TrackSection("corner", 250, radius=80),
             TrackSection("straight", 1000),
             TrackSection("corner", 200, radius=60),
             TrackSection("straight", 900, drs=True),
         ]
-        self.length = sum(s.length for s in self.sections)
-        self.checkpoints = len(self.sections)
 
-    def section_at(self, pos):
-        p = pos % self.length
+    @property
+    def sections(self):
+        return self._sections
+
+    @sections.setter
+    def sections(self, sections):
+        # Assigning a new layout rebuilds the lookup tables below.
+        self._sections = list(sections)
+        self._build_index()
+
+    def _build_index(self):
+        """Precomputes section boundaries and per-section attribute arrays."""
+        secs = self._sections
+        self._ends = []
         cum = 0
-        for sec in self.sections:
+        for sec in secs:
             cum += sec.length
-            if p <= cum:
-                return sec
-        return self.sections[-1]
+            self._ends.append(cum)
+        self.length = cum
+        self.checkpoints = len(secs)
+        # hashable description of the layout, for caches keyed by track
+        self.layout = tuple((s.kind, s.length, s.radius, bool(s.drs)) for s in secs)
+
+        self.section_ends = np.array(self._ends, dtype=np.float64)
+        self.section_starts = self.section_ends - [s.length for s in secs]
+        self.section_is_corner = np.array([s.kind == "corner" for s in secs], dtype=bool)
+        self.section_radius = np.array([s.radius if s.radius is not None else np.nan for s in secs],
+                                       dtype=np.float64)
+        self.section_drs = np.array([bool(s.drs) for s in secs], dtype=bool)
+
+    def section_index(self, pos):
+        """Index of the section containing `pos`; a boundary belongs to the earlier section."""
+        i = bisect_left(self._ends, pos % self.length)
+        return min(i, len(self._ends) - 1)
+
+    def section_at(self, pos):
+        return self._sections[self.section_index(pos)]
+
+    def section_indices(self, positions):
+        """Vectorized section_index for an array of positions."""
+        p = np.mod(positions, self.length)
+        return np.minimum(np.searchsorted(self.section_ends, p, side="left"), len(self._ends) - 1)
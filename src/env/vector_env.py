@@ -0,0 +1,210 @@
+import math
+import multiprocessing as mp
+import os
+from functools import partial
+import numpy as np
+from src.env.race_env import RaceEnvironment
+
+# Commands written to the shared command slot before each barrier round
+_CMD_STEP, _CMD_RESET, _CMD_CLOSE = 0, 1, 2
+
+
+class RaceEnvAdapter:
+    """
+    Exposes a RaceEnvironment as fixed-shape arrays.
+
+    Observation per car: lap progress (0..1), speed, fuel, tyre wear, damage,
+    laps done. Action per car: throttle. Reward per car: metres gained.
+    """
+    obs_dim, act_dim = 6, 1
+
+    def __init__(self, n=4, laps=3, track=None):
+        self.n_cars = n
+        self._make = partial(RaceEnvironment, n=n, laps=laps, track=track)
+        self.reset()
+
+    def reset(self):
+        self.env = self._make()
+        self._dist = np.zeros(self.n_cars)
+
+    def _distance(self):
+        length = self.env.track.length
+        return np.array([lap * length + c.pos for c, lap in zip(self.env.cars, self.env.laps)])
+
+    def observe(self, out):
+        env = self.env
+        for i, (car, lap) in enumerate(zip(env.cars, env.laps)):
+            out[i] = (car.pos / env.track.length, car.speed, car.fuel,
+                      car.tyre_wear, car.damage, lap)
+
+    def step(self, action, reward_out):
+        self.env.step(action[:, 0].tolist())
+        dist = self._distance()
+        reward_out[:] = dist - self._dist
+        self._dist = dist
+        return self.env.finished()
+
+
+class SimulationAdapter:
+    """
+    Exposes a headless Box2D SimulationManager as fixed-shape arrays.
+
+    Observation per car: x, y, heading (rad), speed, lap, fuel, tyre wear.
+    Action per car: throttle, steer. Reward per car: laps gained, measured
+    along the track centreline, so it grows smoothly between waypoints.
+    """
+    obs_dim, act_dim = 7, 2
+
+    def __init__(self, max_steps=None):
+        from src.sim.engine import SimulationManager  # keeps Box2D optional for RaceEnv users
+        self._make = SimulationManager
+        self.max_steps = max_steps
+        self.reset()
+
+    def reset(self):
+        self.sim = self._make()
+        self.n_cars = len(self.sim.cars)
+        self._steps = 0
+        self._progress = self._laps()
+
+    def _laps(self):
+        length = self.sim.track.projector.length
+        return np.array([c.race_distance / length for c in self.sim.cars], dtype=np.float64)
+
+    def observe(self, out):
+        for i, car in enumerate(self.sim.cars):
+            out[i] = (car.x, car.y, math.radians(car.angle), car.speed,
+                      car.lap, car.fuel, car.tire_wear)
+
+    def step(self, action, reward_out):
+        self.sim.step(actions=[{'throttle': float(t), 'steer': float(s)} for t, s in action])
+        self._steps += 1
+        progress = self._laps()
+        reward_out[:] = progress - self._progress
+        self._progress = progress
+        truncated = self.max_steps is not None and self._steps >= self.max_steps
+        return truncated or all(c.finished for c in self.sim.cars)
+
+
+def _shared(shape, dtype):
+    """Zeroed, lock-free shared buffer and the numpy view onto it."""
+    dtype = np.dtype(dtype)
+    raw = mp.RawArray('b', max(1, int(np.prod(shape)) * dtype.itemsize))
+    return raw, _view(raw, shape, dtype)
+
+
+def _view(raw, shape, dtype):
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _worker(env_fns, lo, raws, shapes, cmd_raw, barrier):
+    obs_raw, act_raw, rew_raw, done_raw = raws
+    obs_shape, act_shape = shapes
+    n = len(env_fns)
+    obs = _view(obs_raw, obs_shape, np.float32)[lo:lo + n]
+    act = _view(act_raw, act_shape, np.float32)[lo:lo + n]
+    rew = _view(rew_raw, obs_shape[:2], np.float32)[lo:lo + n]
+    done = _view(done_raw, obs_shape[:1], np.bool_)[lo:lo + n]
+    cmd = _view(cmd_raw, (1,), np.int64)
+    try:
+        envs = [fn() for fn in env_fns]
+        barrier.wait()
+        while True:
+            barrier.wait()  # main has written actions and the command
+            if cmd[0] == _CMD_CLOSE:
+                break
+            for i, env in enumerate(envs):
+                if cmd[0] == _CMD_RESET:
+                    env.reset()
+                    rew[i] = 0.0
+                    done[i] = False
+                else:
+                    done[i] = env.step(act[i], rew[i])
+                    if done[i]:
+                        env.reset()  # auto-reset; obs below is the new episode's first
+                env.observe(obs[i])
+            barrier.wait()  # results are in place
+    except BaseException:
+        barrier.abort()
+        raise
+
+
+class SubprocVectorEnv:
+    """
+    Steps many environments across worker processes.
+
+    Observations, rewards, done flags and actions live in preallocated shared
+    memory; workers read their slice of the action buffer and write results in
+    place, so a step only costs two barrier waits and no pickling. Every
+    environment must produce the same number of cars.
+
+        venv = SubprocVectorEnv([partial(RaceEnvAdapter, n=4)] * 64)
+        obs = venv.reset()
+        obs, rew, done = venv.step(np.ones((64, 4, 1)))
+
+    The returned arrays are views of the shared buffers and are overwritten
+    by the next step; copy them if they must be kept.
+    """
+    def __init__(self, env_fns, n_workers=None, context=None):
+        ctx = mp.get_context(context)
+        n_envs = len(env_fns)
+        n_workers = min(n_workers or os.cpu_count() or 1, n_envs)
+
+        probe = env_fns[0]()
+        self.n_envs, self.n_cars = n_envs, probe.n_cars
+        self.obs_shape = (n_envs, probe.n_cars, probe.obs_dim)
+        self.act_shape = (n_envs, probe.n_cars, probe.act_dim)
+        del probe
+
+        obs_raw, self.obs = _shared(self.obs_shape, np.float32)
+        act_raw, self.actions = _shared(self.act_shape, np.float32)
+        rew_raw, self.rewards = _shared(self.obs_shape[:2], np.float32)
+        done_raw, self.dones = _shared(self.obs_shape[:1], np.bool_)
+        cmd_raw, self._cmd = _shared((1,), np.int64)
+
+        self._barrier = ctx.Barrier(n_workers + 1)
+        self._procs = []
+        bounds = np.linspace(0, n_envs, n_workers + 1).astype(int)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            p = ctx.Process(target=_worker, daemon=True,
+                            args=(env_fns[lo:hi], lo, (obs_raw, act_raw, rew_raw, done_raw),
+                                  (self.obs_shape, self.act_shape), cmd_raw, self._barrier))
+            p.start()
+            self._procs.append(p)
+        self._barrier.wait()  # every worker has built its environments
+        self.closed = False
+
+    def _run(self, cmd):
+        self._cmd[0] = cmd
+        self._barrier.wait()
+        self._barrier.wait()
+
+    def reset(self):
+        self._run(_CMD_RESET)
+        return self.obs
+
+    def step(self, actions):
+        """actions: array broadcastable to (n_envs, n_cars, act_dim)."""
+        self.actions[...] = actions
+        self._run(_CMD_STEP)
+        return self.obs, self.rewards, self.dones
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._cmd[0] = _CMD_CLOSE
+        try:
+            self._barrier.wait(timeout=5)
+        except Exception:
+            pass
+        for p in self._procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,18 @@
+"""
+Tyre compounds and engine modes. Kept apart from engine.py so models that
+only need the car setup (e.g. src/sim/strategy.py) do not import Box2D.
+"""
+
+# Tire compounds
+TIRE_COMPOUNDS = {
+    'soft': {'grip': 1.25, 'color': (255, 50, 50)},
+    'medium': {'grip': 1.0, 'color': (255, 200, 0)},
+    'hard': {'grip': 0.85, 'color': (220, 220, 220)},
+}
+
+# Engine modes
+ENGINE_MODES = {
+    'qualifying': {'power': 1.15},
+    'race': {'power': 1.0},
+    'conservation': {'power': 0.8},
+}
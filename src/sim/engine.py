@@ -0,0 +1,770 @@
+"""
+Headless Box2D race simulation.
+
+Everything needed to run the admin-panel race without a display: track
+geometry, car physics, the AI driver and the SimulationManager. Nothing here
+imports pygame, so it runs on display-less machines and steps as fast as the
+CPU allows; main_game.py layers the pygame front-end on top.
+"""
+import math
+import random
+from collections import namedtuple
+from itertools import chain
+from operator import attrgetter
+import numpy as np
+from Box2D.b2 import world, polygonShape
+from src.core.events import ALL, EventBus, Finish, Lap, Overtake, PitStop
+from src.core.profiler import profiler
+from src.core.recorder import TelemetryRecorder
+from src.core.snapshot import pack_rng_state, unpack_rng_state
+from src.core.standings import Standings
+from src.sim.compounds import ENGINE_MODES, TIRE_COMPOUNDS
+from src.sim.geometry import compile_track
+from src.sim.progress import TrackProjector
+
+# Physics world scaling factor (Box2D works best with small numbers)
+PPM = 20.0
+
+WORLD_W, WORLD_H = 3000, 2000
+FPS = 60
+TIME_STEP = 1.0 / FPS
+
+NUM_AI = 9
+LAPS_TO_FINISH = 5
+
+# Car physics (now used to apply forces)
+ACCEL_FORCE = 180.0
+BRAKE_FORCE = 220.0
+TURN_TORQUE = 200.0  # This will be modulated by the smooth steering
+DRAG = 0.992 # Kept for high-speed drag simulation
+LONGITUDINAL_DRAG = 0.25   # drag force per (m/s)^2 along the car
+THROTTLE_SMOOTH = 0.2      # lerp factor from throttle command to applied throttle per tick
+
+# Physics level of detail (SimulationManager(lod=True)): cars further than
+# these distances (px) from the camera view and from every other car drive
+# a 1D model along the racing line instead of a Box2D body. Cars go back to
+# full physics inside the distances and leave it only beyond them times
+# LOD_HYSTERESIS, so a car near a boundary does not flip every tick.
+LOD_VIEW_MARGIN = 200.0
+LOD_CONTACT = 60.0
+LOD_HYSTERESIS = 1.5
+
+# Per-car columns of SimSnapshot.cars, followed by tyre compound, engine
+# mode, pit target, the Box2D body and the AI waypoint index. Unset lap
+# times are stored as NaN so a snapshot is one float64 array per race.
+CAR_STATE = (
+    "x", "y", "angle", "speed", "fuel", "tire_wear", "tire_temp", "brake_temp",
+    "engine_temp", "ers", "downforce_level", "drs_enabled", "lap", "finished",
+    "position", "total_time", "current_lap_time", "best_lap", "last_lap_time",
+    "in_pit", "pit_stops", "waypoint_index", "track_seg", "track_s", "race_distance",
+    "throttle_input", "pit_timer", "lod", "lod_offset",
+)
+_INT_STATE = {"downforce_level", "lap", "position", "pit_stops", "waypoint_index", "track_seg"}
+_BOOL_STATE = {"drs_enabled", "finished", "in_pit", "lod"}
+_OPTIONAL_STATE = {"best_lap", "last_lap_time"}
+
+def _optional(v): return None if v != v else v
+
+_STATE_CASTS = tuple(int if f in _INT_STATE else bool if f in _BOOL_STATE
+                     else _optional if f in _OPTIONAL_STATE else float for f in CAR_STATE)
+_COMPOUNDS, _MODES = list(TIRE_COMPOUNDS), list(ENGINE_MODES)
+_state_row = attrgetter(*CAR_STATE)
+
+# Columns written per car and tick by SimulationManager.record_to(); the
+# racing-line segment stands in for the section
+RECORD_COLUMNS = (
+    ("x", "f4"), ("y", "f4"), ("angle", "f4"), ("speed", "f4"), ("throttle_input", "f4"),
+    ("fuel", "f4"), ("tire_wear", "f4"), ("tire_temp", "f4"), ("brake_temp", "f4"),
+    ("engine_temp", "f4"), ("ers", "f4"), ("lap", "i2"), ("track_seg", "i2"),
+    ("race_distance", "f4"), ("position", "i2"), ("in_pit", "b1"), ("pit_stops", "i2"),
+    ("current_lap_time", "f4"),
+)
+_record_row = attrgetter(*(name for name, _ in RECORD_COLUMNS))
+
+SimSnapshot = namedtuple("SimSnapshot", "cars time race_started start_countdown focused rng")
+
+def clamp(x, a, b): return max(a, min(b, x))
+def rolling_damping(grip): return 0.3 + 0.1 * (1.0 - grip)
+def lerp(a, b, t): return a + (b - a) * t
+
+def catmull_rom_spline(p0, p1, p2, p3, t):
+    t2, t3 = t * t, t * t * t
+    x = 0.5 * ((2 * p1[0]) + (-p0[0] + p2[0]) * t + (2 * p0[0] - 5 * p1[0] + 4 * p2[0] - p3[0]) * t2 + (-p0[0] + 3 * p1[0] - 3 * p2[0] + p3[0]) * t3)
+    y = 0.5 * ((2 * p1[1]) + (-p0[1] + p2[1]) * t + (2 * p0[1] - 5 * p1[1] + 4 * p2[1] - p3[1]) * t2 + (-p0[1] + 3 * p1[1] - 3 * p2[1] + p3[1]) * t3)
+    return x, y
+
+# ---------- Track ----------
+class Track:
+    def __init__(self):
+        """
+        Redesigned F1-style circuit:
+        - Start/finish straight in the center horizontally
+        - Long flowing corners
+        - Pit lane parallel to main straight
+        """
+        # Wider, longer F1-style layout (roughly "loop" with chicane)
+        control_points = [
+            (600, 1400), (1200, 1400), (1800, 1300), (2300, 1000), (2300, 600),
+            (1800, 400), (1200, 400), (800, 600), (600, 900), (700, 1200)
+        ]
+
+        # Geometry parameters
+        self.track_width, self.barrier_width = 240, 25
+
+        # Start line near center, on main straight
+        self.start_line = (1200, 1400)
+
+        # Pit lane parallel to main straight
+        self.pit_entry = (1200, 1500)
+        self.pit_exit = (1800, 1500)
+        self.pit_rect = (1150, 1480, 750, 100)  # x, y, w, h
+
+        # Spline, barriers, sectors and projector grid, compiled once and cached on disk
+        self.geometry = compile_track(control_points, spline_steps=50, width=self.track_width,
+                                      barrier_width=self.barrier_width, start=self.start_line)
+        self.waypoints = [tuple(p) for p in self.geometry.points.tolist()]
+
+        # Arc-length projection of the racing line; progress is measured from the start line
+        self.projector = TrackProjector.from_geometry(self.geometry)
+        self.start_s = self.geometry.start_s
+
+
+# ---------- Car ----------
+class Car:
+    # Fixed schema: no per-instance __dict__, and every attribute exists from __init__ on
+    __slots__ = (
+        "rng", "fuel", "tire_wear", "tire_temp", "brake_temp", "engine_temp", "ers",
+        "downforce_level", "drs_enabled", "id", "team_name", "color", "width", "length", "body",
+        "x", "y", "angle", "speed", "throttle_input", "lap", "finished", "position", "total_time",
+        "current_lap_time", "best_lap", "last_lap_time", "tire_compound", "engine_mode",
+        "in_pit", "pit_stops", "pit_timer", "target_pit", "waypoint_index", "track_seg",
+        "track_s", "race_distance", "gap_to_leader", "interval", "lod", "lod_offset",
+    )
+
+    def __init__(self, sim_world, id, x, y, color, team_name, rng=random):
+        self.rng = rng
+        # Telemetry-related properties
+        self.fuel = 100.0          # percentage
+        self.tire_wear = 0.0       # percentage
+        self.tire_temp = 45.0      # °C
+        self.brake_temp = 40.0     # °C
+        self.engine_temp = 85.0    # °C
+        self.ers = 100.0           # %
+        self.downforce_level = 5
+        self.drs_enabled = False
+
+        self.id, self.team_name, self.color = id, team_name, color
+        self.width, self.length = 20, 36
+        
+        # ========== PyBox2D BODY CREATION ==========
+        self.body = sim_world.CreateDynamicBody(
+            position=(x / PPM, y / PPM),
+            angle=0,
+            linearDamping=0.8,   # Simulates friction and air resistance
+            angularDamping=4.0, # Makes turning more stable
+        )
+        self.body.userData = self # Link the body back to the car object
+        shape = polygonShape(box=(self.length / 2 / PPM, self.width / 2 / PPM))
+        self.body.CreateFixture(shape=shape, density=1.0)
+        # ==========================================
+        
+        # Public properties read from physics body
+        self.x, self.y, self.angle, self.speed = x, y, 0, 0
+        self.throttle_input = 0.0  # smoothed throttle actually applied, -1..1
+
+        self.lap, self.finished, self.position = 0, False, 1
+        self.total_time, self.current_lap_time, self.best_lap, self.last_lap_time = 0.0, 0.0, None, None
+        
+        self.tire_compound = rng.choice(['soft', 'medium', 'hard'])
+        self.engine_mode = 'race'
+        self.in_pit, self.pit_stops = False, 0
+        self.pit_timer, self.target_pit = 0.0, None
+        self.waypoint_index = 0
+        # Continuous progress: segment/arc length on the racing line and the
+        # signed distance covered since the start line (negative on the grid)
+        self.track_seg, self.track_s, self.race_distance = -1, 0.0, 0.0
+        self.gap_to_leader = self.interval = None  # seconds, None for the leader
+        # Level of detail: while `lod` is set the Box2D body is inactive and the
+        # car follows the racing line `lod_offset` px to its left
+        self.lod, self.lod_offset = False, 0.0
+
+    def get_state(self):
+        """Flat list of floats describing this car and its body; see CAR_STATE."""
+        row = [math.nan if v is None else float(v) for v in _state_row(self)]
+        tx, ty = self.target_pit or (math.nan, math.nan)
+        b = self.body
+        pos, vel = b.position, b.linearVelocity
+        row += [_COMPOUNDS.index(self.tire_compound), _MODES.index(self.engine_mode), tx, ty,
+                pos.x, pos.y, b.angle, vel.x, vel.y, b.angularVelocity, b.linearDamping, b.awake]
+        return row
+
+    def set_state(self, row):
+        """Inverse of get_state()."""
+        n = len(CAR_STATE)
+        for f, cast, v in zip(CAR_STATE, _STATE_CASTS, row):
+            setattr(self, f, cast(v))
+        comp, mode, tx, ty, bx, by, angle, vx, vy, w, damping, awake = row[n:n + 12]
+        self.tire_compound, self.engine_mode = _COMPOUNDS[int(comp)], _MODES[int(mode)]
+        self.target_pit = None if tx != tx else (tx, ty)
+        b = self.body
+        b.transform = ((bx, by), angle)
+        b.linearVelocity = (vx, vy)
+        b.angularVelocity = w
+        b.linearDamping = damping
+        b.awake = bool(awake)
+        b.active = not self.lod
+
+    def get_lateral_velocity(self):
+        """Returns the sideways velocity vector."""
+        right_normal = self.body.GetWorldVector((0, 1))
+        return right_normal.dot(self.body.linearVelocity) * right_normal
+
+    def update_physics(self, action):
+        """
+        Apply forces and torques to this car's physics body based on control actions.
+        Realistic and stable F1-style vehicle dynamics tuned for Box2D.
+        """
+        # ---------------------------------------------------
+        # CONFIGURABLE PARAMETERS (tune these as needed)
+        # ---------------------------------------------------
+        grip = TIRE_COMPOUNDS[self.tire_compound]['grip']
+        engine_power = ENGINE_MODES[self.engine_mode]['power']
+        max_accel_force = ACCEL_FORCE * engine_power
+        max_brake_force = BRAKE_FORCE
+        max_turn_torque = TURN_TORQUE
+        lateral_grip_factor = 8.0 * grip      # higher = more grip, less sliding
+        longitudinal_drag_coeff = LONGITUDINAL_DRAG  # 0.2–0.3 is realistic
+        angular_vel_limit = 10.0              # clamp spin speed (rad/s)
+        angular_vel_damp_factor = 0.9         # damping multiplier when limit exceeded
+        steer_speed_scale_min = 0.5           # stronger steering at low speed
+        steer_speed_scale_max = 10.0          # weaker steering at high speed
+        throttle_smooth = THROTTLE_SMOOTH     # 0.1 = sluggish, 0.3 = twitchy
+        # ---------------------------------------------------
+
+        # --- Smoothed throttle for stability ---
+        throttle_cmd = clamp(action.get('throttle', 0.0), -1.0, 1.0)
+        self.throttle_input = lerp(self.throttle_input, throttle_cmd, throttle_smooth)
+
+        steer_input = clamp(action.get('steer', 0.0), -1.0, 1.0)
+
+        # --- Get orientation vectors ---
+        forward_normal = self.body.GetWorldVector(localVector=(1, 0))
+        right_normal   = self.body.GetWorldVector(localVector=(0, 1))
+        vel = self.body.linearVelocity
+
+        # ===================================================
+        # 1️⃣  LATERAL FRICTION  (kill side slip)
+        # ===================================================
+        lateral_speed = right_normal.dot(vel)
+        lateral_impulse = -right_normal * clamp(
+            lateral_speed * self.body.mass,
+            -self.body.mass * lateral_grip_factor,
+            self.body.mass * lateral_grip_factor,
+        )
+        self.body.ApplyLinearImpulse(lateral_impulse, self.body.worldCenter, True)
+
+        # ===================================================
+        # 2️⃣  LONGITUDINAL DRAG (air resistance)
+        # ===================================================
+        forward_speed = forward_normal.dot(vel)
+        drag_force = -forward_normal * forward_speed * abs(forward_speed) * longitudinal_drag_coeff
+        self.body.ApplyForce(drag_force, self.body.worldCenter, True)
+
+        # ===================================================
+        # 3️⃣  ACCELERATION / BRAKING
+        # ===================================================
+        if self.throttle_input > 0.0:
+            # accelerate
+            accel_force = forward_normal * max_accel_force * self.throttle_input
+            self.body.ApplyForce(accel_force, self.body.worldCenter, True)
+        elif self.throttle_input < 0.0:
+            # braking
+            brake_force = forward_normal * max_brake_force * self.throttle_input
+            self.body.ApplyForce(brake_force, self.body.worldCenter, True)
+
+        # ===================================================
+        # 4️⃣  STEERING TORQUE (speed-scaled)
+        # ===================================================
+        speed = max(self.body.linearVelocity.length, steer_speed_scale_min)
+        speed_factor = clamp(speed, steer_speed_scale_min, steer_speed_scale_max)
+        turn_strength = max_turn_torque * steer_input / speed_factor
+        self.body.ApplyTorque(turn_strength, True)
+
+        # ===================================================
+        # 5️⃣  STABILIZATION (spin and velocity clamping)
+        # ===================================================
+        if abs(self.body.angularVelocity) > angular_vel_limit:
+            self.body.angularVelocity *= angular_vel_damp_factor
+
+        # --- optional tiny linear damping correction ---
+        if vel.length > 0.001:
+            self.body.linearDamping = rolling_damping(grip)
+        else:
+            self.body.linearDamping = 1.0
+
+        
+    def enter_lod(self, offset):
+        """Switches to the 1D model; the body is left where it is, inactive."""
+        self.lod, self.lod_offset = True, offset
+        self.body.active = False
+
+    def leave_lod(self):
+        """Back to full physics: the body takes the car's pose, moving straight ahead at its speed."""
+        b, a = self.body, math.radians(self.angle)
+        b.transform = ((self.x / PPM, self.y / PPM), a)
+        b.linearVelocity = (math.cos(a) * self.speed / PPM, math.sin(a) * self.speed / PPM)
+        b.angularVelocity = 0.0
+        b.active = True
+        self.lod = False
+
+    def check_pit_stop(self):
+        """Simulated pit stop entry, stay, and exit."""
+        # Start pit stop if fuel/tire thresholds crossed and not already in pit
+        if not self.in_pit and (self.fuel < 15.0 or self.tire_wear > 80.0):
+            # Drive toward pit lane
+            self.target_pit = (self.rng.uniform(1850, 2100), self.rng.uniform(1520, 1580))
+            self.in_pit = True
+            self.pit_timer = 0.0
+            self.pit_stops += 1
+
+        # If in pit lane, simulate being stationary for a while
+        if self.in_pit:
+            self.pit_timer += 1 / FPS
+
+            # During first 1s: move slowly into pit lane area
+            if self.pit_timer < 1.0:
+                tx, ty = self.target_pit
+                dx, dy = tx - self.x, ty - self.y
+                angle = math.atan2(dy, dx)
+                self.body.linearVelocity = (math.cos(angle) * 2.0 / PPM, math.sin(angle) * 2.0 / PPM)
+
+            # Stay still during service
+            elif 1.0 <= self.pit_timer < 4.0:
+                self.body.linearVelocity = (0, 0)
+
+            # Exit pit after 4s
+            else:
+                self.in_pit = False
+                self.target_pit = None
+                self.fuel = 100.0
+                self.tire_wear = 0.0
+                self.tire_temp = 45.0
+                self.brake_temp = 40.0
+                self.engine_temp = 85.0
+                self.ers = 100.0
+
+
+
+
+    def sync_with_physics(self):
+        """Updates car's state from its physics body."""
+        pos = self.body.position
+        self.x, self.y = pos.x * PPM, pos.y * PPM
+        self.angle = math.degrees(self.body.angle)
+        self.speed = self.body.linearVelocity.length * PPM
+        # Simple telemetry simulation
+        self.fuel = max(0.0, self.fuel - 0.01)                 # burns fuel slowly
+        self.tire_wear = min(100.0, self.tire_wear + 0.005)    # tires wear over time
+        self.tire_temp = min(130.0, self.tire_temp + abs(self.speed) * 0.002)
+        self.brake_temp = min(1000.0, self.brake_temp + abs(self.speed) * 0.005)
+        self.engine_temp = clamp(85.0 + abs(self.speed) * 0.02, 85.0, 130.0)
+        self.ers = max(0.0, self.ers - 0.002)
+        self.check_pit_stop()
+
+
+# ---------- AI Controller ----------
+class AIController:
+    def __init__(self, car, waypoints):
+        self.car, self.waypoints, self.idx = car, waypoints, 0
+
+    def step(self):
+        tx, ty = self.waypoints[self.idx]
+        if math.hypot(tx - self.car.x, ty - self.car.y) < 120:
+            self.idx = (self.idx + 1) % len(self.waypoints)
+        
+        self.car.waypoint_index = self.idx
+        desired = math.degrees(math.atan2(ty - self.car.y, tx - self.car.x))
+        diff = (desired - self.car.angle + 540) % 360 - 180
+        
+        return {'throttle': 0.8, 'steer': clamp(diff / 45.0, -1.0, 1.0)}
+
+
+class BatchAIController:
+    """
+    AIController for a whole grid at once: target waypoints, headings and
+    steering for every car come from a handful of array operations, so the
+    per-tick AI cost barely grows with the number of cars.
+    """
+    def __init__(self, cars, waypoints):
+        self.cars = cars
+        self.waypoints = np.asarray(waypoints, dtype=np.float64)
+        self.idx = np.zeros(len(cars), dtype=np.int64)
+
+    def step(self, x, y, angle):
+        """Car pose arrays in, (throttle, steer) arrays out; same rules as AIController."""
+        tx, ty = self.waypoints[self.idx].T
+        reached = np.hypot(tx - x, ty - y) < 120
+        for i in np.flatnonzero(reached).tolist():
+            self.idx[i] = (self.idx[i] + 1) % len(self.waypoints)
+            self.cars[i].waypoint_index = int(self.idx[i])
+
+        desired = np.degrees(np.arctan2(ty - y, tx - x))
+        diff = (desired - angle + 540) % 360 - 180
+        return np.full(len(x), 0.8), np.maximum(np.minimum(diff / 45.0, 1.0), -1.0)
+
+
+# Per-tick telemetry model of Car.sync_with_physics as one affine step and a
+# clamp per column: new = clamp(old * KEEP + DELTA + |speed| * PER_SPEED, LO, HI)
+TELEMETRY = ("fuel", "tire_wear", "tire_temp", "brake_temp", "engine_temp", "ers")
+_TEL_DELTA = np.array([-0.01, 0.005, 0.0, 0.0, 85.0, -0.002])
+_TEL_PER_SPEED = np.array([0.0, 0.0, 0.002, 0.005, 0.02, 0.0])
+_TEL_KEEP = np.array([1.0, 1.0, 1.0, 1.0, 0.0, 1.0])  # engine temp only depends on speed
+_TEL_LO = np.array([0.0, -np.inf, -np.inf, -np.inf, 85.0, 0.0])
+_TEL_HI = np.array([np.inf, 100.0, 130.0, 1000.0, 130.0, np.inf])
+
+def sync_cars(cars):
+    """
+    Car.sync_with_physics for a list of cars. Body poses still have to be
+    read one Box2D body at a time, but the telemetry model runs on arrays
+    and only cars at or in a pit stop go through check_pit_stop. Cars on
+    the 1D level-of-detail model keep the pose it set. Returns the cars
+    that started a pit stop this tick.
+    """
+    pose = np.array([(c.x, c.y, c.angle, c.speed) if c.lod else
+                     (p.x * PPM, p.y * PPM, b.angle * (180.0 / math.pi), b.linearVelocity.length * PPM)
+                     for c in cars for b in (c.body,) for p in (b.position,)]).reshape(-1, 4)
+    telem = np.array([(c.fuel, c.tire_wear, c.tire_temp, c.brake_temp, c.engine_temp, c.ers)
+                      for c in cars]).reshape(-1, 6)
+    telem *= _TEL_KEEP
+    telem += _TEL_DELTA
+    telem += np.abs(pose[:, 3:4]) * _TEL_PER_SPEED
+    np.minimum(telem, _TEL_HI, out=telem)
+    np.maximum(telem, _TEL_LO, out=telem)
+
+    for car, p, t in zip(cars, pose.tolist(), telem.tolist()):
+        car.x, car.y, car.angle, car.speed = p
+        car.fuel, car.tire_wear, car.tire_temp, car.brake_temp, car.engine_temp, car.ers = t
+
+    # check_pit_stop is a no-op unless a car is pitting or due to pit; the
+    # remaining calls keep car order, so pit RNG draws match the per-car path
+    due = (telem[:, 0] < 15.0) | (telem[:, 1] > 80.0)
+    pitted = []
+    for car, d in zip(cars, due.tolist()):
+        if d or car.in_pit:
+            was_in_pit = car.in_pit
+            car.check_pit_stop()
+            if car.in_pit and not was_in_pit:
+                pitted.append(car)
+    return pitted
+
+
+def update_gaps(leaderboard):
+    """Time gaps from the distance behind the leader / car ahead at this car's speed."""
+    ahead = leader = None
+    for car in leaderboard:
+        if car.finished or leader is None:
+            car.gap_to_leader = car.interval = None
+            if not car.finished:
+                leader = ahead = car
+            continue
+        speed = max(car.speed, 1.0)
+        car.gap_to_leader = (leader.race_distance - car.race_distance) / speed
+        car.interval = (ahead.race_distance - car.race_distance) / speed
+        ahead = car
+
+
+# ---------- Simulation ----------
+class SimulationManager:
+    # Front-ends swap in subclasses that know how to draw themselves.
+    track_cls = Track
+    car_cls = Car
+
+    def __init__(self, seed=None, n_cars=None, lod=False):
+        self.rng = random.Random(seed)
+        self.world = world(gravity=(0, 0))
+        self.track = self.track_cls()
+
+        # Only 6 teams (simpler grid)
+        teams = [
+            ("Red Bull", (30, 65, 174)),
+            ("Ferrari", (220, 0, 0)),
+            ("Mercedes", (0, 210, 190)),
+            ("McLaren", (255, 135, 0)),
+            ("Aston Martin", (0, 111, 98)),
+            ("Alpine", (34, 147, 209))
+        ]
+
+        self.cars = []
+        sx, sy = self.track.start_line
+
+        # Create only AI cars now; bigger grids (benchmarks) reuse the liveries
+        for i in range(n_cars or len(teams)):
+            team_name, color = teams[i % len(teams)]
+            offset_x, offset_y = -(i // 2) * 60, ((i % 2) - 0.5) * 45
+            car_id = f"AI{i+1}"
+            self.cars.append(self.car_cls(self.world, car_id, sx + offset_x, sy + offset_y, color, team_name, self.rng))
+
+        # Default focus = first car (Red Bull)
+        self.focused_car = self.cars[0]
+
+        # One batched AI driver for the whole grid
+        self.ai = BatchAIController(self.cars, self.track.geometry.points)
+
+        proj = self.track.projector
+        seg, s, _ = proj.project([(c.x, c.y) for c in self.cars], [-1] * len(self.cars))
+        for car, g, a in zip(self.cars, seg.tolist(), s.tolist()):
+            car.track_seg, car.track_s = g, a
+            car.race_distance = float(proj.delta(self.track.start_s, a))
+        self.standings = Standings(len(self.cars))
+        self._update_standings()
+
+        self.time, self.race_started, self.start_countdown = 0.0, False, 5.0
+        self.recorder = None
+        self.events = EventBus()
+        # level of detail: off-screen cars away from traffic skip Box2D (see LOD_*)
+        self.lod = lod
+        self.view = None   # (x, y, w, h) world rect on screen; None when nothing is drawn
+
+    def set_focus_car(self, car):
+        """Set which car the camera should follow."""
+        if car in self.cars:
+            self.focused_car = car
+
+    def set_view(self, rect):
+        """The world rect the front-end is drawing, for level of detail."""
+        self.view = rect
+    
+    def step(self, dt=TIME_STEP, player_action=None, actions=None):
+        """
+        Advances the race by one tick. `actions` optionally holds one action
+        dict per car (or None) that replaces that car's AI output, which is
+        how external agents drive the cars.
+        """
+        if not self.race_started:
+            self.start_countdown -= dt
+            if self.start_countdown <= 0: self.race_started = True
+            else: return
+
+        with profiler.section("sim.step"):
+            # Update physics based on actions
+            # Update all AI cars
+            with profiler.section("sim.ai"):
+                throttle, steer = self.ai.step(np.array([c.x for c in self.cars]),
+                                               np.array([c.y for c in self.cars]),
+                                               np.array([c.angle for c in self.cars]))
+            if self.lod:
+                with profiler.section("sim.lod"):
+                    self._update_lod(actions)
+            with profiler.section("sim.update_physics"):
+                for i, (car, t, st) in enumerate(zip(self.cars, throttle.tolist(), steer.tolist())):
+                    if car.lod:
+                        continue
+                    action = {'throttle': t, 'steer': st}
+                    if actions is not None and actions[i] is not None:
+                        action = actions[i]
+                    car.update_physics(action)
+                if self.lod:
+                    self._step_lod(throttle)
+
+            # Step the physics world
+            with profiler.section("sim.world_step"):
+                self.world.Step(TIME_STEP, 10, 8)
+            
+            # Sync game objects with physics bodies
+            with profiler.section("sim.sync"):
+                pitted = sync_cars(self.cars)
+                for car in self.cars:
+                    car.total_time += dt
+                    car.current_lap_time += dt
+
+            # Lap detection and positioning
+            with profiler.section("sim.race_progress"):
+                lapped = self.update_race_progress()
+        self.time += dt
+        if self.events.level:
+            self._emit_events(pitted, lapped)
+            self.events.flush()
+        if self.recorder is not None:
+            self.recorder.record(self.time, chain.from_iterable(map(_record_row, self.cars)))
+
+    def _update_lod(self, actions):
+        """Moves cars between Box2D and the 1D model by their distance to the view and to each other."""
+        cars = self.cars
+        xy = np.array([(c.x, c.y) for c in cars]).reshape(-1, 2)
+        gap = np.hypot(*(xy[:, None, :] - xy[None, :, :]).transpose(2, 0, 1))
+        np.fill_diagonal(gap, np.inf)
+        nearest = gap.min(axis=1)
+        if self.view is None:
+            from_view = np.full(len(cars), np.inf)
+        else:
+            x, y, w, h = self.view
+            dx = np.maximum(np.maximum(x - xy[:, 0], xy[:, 0] - (x + w)), 0.0)
+            dy = np.maximum(np.maximum(y - xy[:, 1], xy[:, 1] - (y + h)), 0.0)
+            from_view = np.hypot(dx, dy)
+        enter = (nearest < LOD_CONTACT) | (from_view < LOD_VIEW_MARGIN)
+        stay = (nearest < LOD_CONTACT * LOD_HYSTERESIS) | (from_view < LOD_VIEW_MARGIN * LOD_HYSTERESIS)
+
+        demote = []
+        for i, (car, e, st) in enumerate(zip(cars, enter.tolist(), stay.tolist())):
+            # pit stops steer the body, and external drivers need real steering
+            full = car.in_pit or (actions is not None and actions[i] is not None)
+            if car.lod:
+                if e or full:
+                    car.leave_lod()
+            elif not (st or full):
+                demote.append(car)
+        if demote:
+            # keep each car's lateral place on the track
+            line, tangent = self.track.projector.frame_at([c.track_s for c in demote])
+            rel = np.array([(c.x, c.y) for c in demote]) - line
+            offsets = rel[:, 1] * tangent[:, 0] - rel[:, 0] * tangent[:, 1]
+            limit = self.track.track_width / 2
+            for car, off in zip(demote, np.clip(offsets, -limit, limit).tolist()):
+                car.enter_lod(off)
+
+    def _step_lod(self, throttle):
+        """
+        Advances the 1D-model cars by one tick: Car.update_physics's
+        throttle, drag and damping along the car, with Box2D's integration
+        order, then placed on the racing line at their offset.
+        """
+        idx = [i for i, c in enumerate(self.cars) if c.lod]
+        if not idx:
+            return
+        cars = [self.cars[i] for i in idx]
+        cmd = np.clip(throttle[idx], -1.0, 1.0)
+        applied = np.array([c.throttle_input for c in cars])
+        applied += (cmd - applied) * THROTTLE_SMOOTH
+        power = np.array([ENGINE_MODES[c.engine_mode]['power'] for c in cars])
+        grip = np.array([TIRE_COMPOUNDS[c.tire_compound]['grip'] for c in cars])
+        mass = np.array([c.body.mass for c in cars])
+        v = np.array([c.speed for c in cars]) / PPM
+        force = np.where(applied > 0.0, ACCEL_FORCE * power, BRAKE_FORCE) * applied - LONGITUDINAL_DRAG * v * v
+        damping = np.where(v > 0.001, rolling_damping(grip), 1.0)
+        v = np.maximum((v + TIME_STEP * force / mass) / (1.0 + TIME_STEP * damping), 0.0)
+
+        s = np.array([c.track_s for c in cars]) + v * (PPM * TIME_STEP)
+        line, tangent = self.track.projector.frame_at(s)
+        offset = np.array([c.lod_offset for c in cars])
+        x = line[:, 0] - tangent[:, 1] * offset
+        y = line[:, 1] + tangent[:, 0] * offset
+        angle = np.degrees(np.arctan2(tangent[:, 1], tangent[:, 0]))
+        for car, row in zip(cars, zip(x.tolist(), y.tolist(), angle.tolist(),
+                                      (v * PPM).tolist(), applied.tolist())):
+            car.x, car.y, car.angle, car.speed, car.throttle_input = row
+
+    def record_to(self, path, **kwargs):
+        """Starts logging every car's state each racing tick to a TelemetryRecorder directory."""
+        self.recorder = TelemetryRecorder(path, RECORD_COLUMNS, len(self.cars), meta={
+            "source": "SimulationManager", "dt": TIME_STEP, "track_length": self.track.projector.length,
+            "car_ids": [c.id for c in self.cars],
+            "cars": [{"id": c.id, "team_name": c.team_name, "color": c.color,
+                      "tire_compound": c.tire_compound, "engine_mode": c.engine_mode}
+                     for c in self.cars]}, **kwargs)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def _emit_events(self, pitted, lapped):
+        events, now = self.events, self.time
+        for car in lapped:
+            if car.finished:
+                events.emit(Finish(now, car.id, car.position))
+            elif events.level >= ALL:
+                events.emit(Lap(now, car.id, car.lap))
+        if events.level >= ALL:
+            for car in pitted:
+                events.emit(PitStop(now, car.id, car.pit_stops))
+            cars = self.cars
+            for gainer, loser in self.standings.overtakes:
+                events.emit(Overtake(now, cars[gainer].id, cars[loser].id))
+
+    def update_race_progress(self):
+        """Advances every car along the track; returns the cars that crossed the line this tick."""
+        racing = [c for c in self.cars if not c.finished]
+        lapped = []
+        proj = self.track.projector
+        # one windowed projection per car, searched around its last segment
+        xy = np.array([(c.x, c.y) for c in racing]).reshape(-1, 2)
+        seg, s, _ = proj.project(xy, [c.track_seg for c in racing])
+        moved = proj.delta(np.array([c.track_s for c in racing]), s)
+        for car, g, a, d in zip(racing, seg.tolist(), s.tolist(), moved.tolist()):
+            car.track_seg, car.track_s = g, a
+            car.race_distance += d
+
+            # lap count follows the furthest start-line crossing, so backing
+            # over the line and crossing it again does not count twice
+            if math.floor(car.race_distance / proj.length) + 1 > car.lap:
+                if car.lap > 0:
+                    car.last_lap_time = car.current_lap_time
+                    if car.best_lap is None or car.current_lap_time < car.best_lap:
+                        car.best_lap = car.current_lap_time
+                    car.current_lap_time = 0.0
+                car.lap += 1
+                lapped.append(car)
+
+                if car.lap > LAPS_TO_FINISH:
+                    car.finished = True
+                    car.body.linearVelocity = (0, 0)
+                    car.body.angularVelocity = 0
+
+        # Re-rank (incrementally, from last tick's order)
+        self._update_standings()
+
+        # Stop all cars when everyone finishes
+        if all(c.finished for c in self.cars):
+            for c in self.cars:
+                c.body.linearVelocity = (0, 0)
+                c.body.angularVelocity = 0
+        return lapped
+
+
+    def _update_standings(self):
+        # finishers first by total time, then runners by distance; ties keep grid order
+        cars = self.cars
+        self.standings.update([(1, -c.total_time, -i) if c.finished else (0, c.race_distance, -i)
+                               for i, c in enumerate(cars)])
+        self._leaderboard = leaderboard = [cars[i] for i in self.standings.order]
+        for i, car in enumerate(leaderboard):
+            car.position = i + 1
+        update_gaps(leaderboard)
+
+    def get_leaderboard(self):
+        """Cars in race order, as of the last tick; do not modify the list."""
+        return self._leaderboard
+
+    def run(self, max_steps=None, dt=TIME_STEP):
+        """Steps unthrottled until every car finishes (or max_steps); returns steps taken."""
+        steps = 0
+        while not all(c.finished for c in self.cars):
+            if max_steps is not None and steps >= max_steps:
+                break
+            self.step(dt)
+            steps += 1
+        return steps
+
+    def snapshot(self):
+        """
+        Captures cars, bodies, AI targets, race clock and RNG in a SimSnapshot.
+        Box2D's internal contact caches are not part of it, so a restored race
+        can drift from the original by solver noise while cars are touching.
+        """
+        cars = np.array([c.get_state() + [i] for c, i in zip(self.cars, self.ai.idx.tolist())],
+                        dtype=np.float64)
+        return SimSnapshot(cars, self.time, self.race_started, self.start_countdown,
+                           self.cars.index(self.focused_car), pack_rng_state(self.rng))
+
+    def restore(self, snap):
+        """Rewinds this simulation to a snapshot taken from it."""
+        for car, row in zip(self.cars, snap.cars.tolist()):
+            car.set_state(row)
+        self.ai.idx[:] = snap.cars[:, -1]
+        self.time, self.race_started, self.start_countdown = snap.time, snap.race_started, snap.start_countdown
+        self.focused_car = self.cars[snap.focused]
+        self._update_standings()
+        self.standings.overtakes = []
+        self.events.clear()
+        unpack_rng_state(self.rng, snap.rng)
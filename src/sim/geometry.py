@@ -0,0 +1,250 @@
+"""
+Compiled track geometry with an on-disk cache.
+
+compile_track() turns a loop of control points (Catmull-Rom splined, as
+engine.Track does) or a plain polyline (the src.core.tracks paths) into
+one bundle of arrays: the sampled line with its tangents, normals,
+curvature and arc length, a dense arc-length table, barrier and kerb
+polygons, sector gates and the projector's spatial grid. Bundles are
+saved as uncompressed .npz files named after a hash of every input, and
+later runs memory-map them instead of redoing the spline work:
+
+    geo = compile_track(control_points, spline_steps=50, width=240, start=(1200, 1400))
+    geo.points, geo.normals, geo.cum          # read-only arrays over the mapped file
+    TrackProjector.from_geometry(geo)         # no grid rebuild
+
+Drawing, the AI and progress tracking all read the same bundle. Set
+TRACK_CACHE_DIR to move the cache; bump GEOMETRY_VERSION whenever the
+arrays a bundle holds or how they are computed changes.
+"""
+import hashlib
+import json
+import math
+import os
+import tempfile
+import zipfile
+import numpy as np
+from numpy.lib import format as npy_format
+
+GEOMETRY_VERSION = 1
+CACHE_DIR = os.environ.get("TRACK_CACHE_DIR",
+                           os.path.join(os.path.expanduser("~"), ".cache", "f1-track", "geometry"))
+SAMPLE_SPACING = 1.0      # px between entries of the dense arc-length table
+CELL_SIZE = 100.0         # px, resolution of the projector's spatial grid
+SECTORS = 3
+KERB_WIDTH = 16           # px, laid inside the track edge
+KERB_CURVATURE = 1 / 400  # 1/px; segments turning tighter than this get kerbs
+
+
+class TrackGeometry:
+    """
+    A compiled bundle. Per line point (n): `points`, `tangents` and unit
+    left `normals` of the segment starting there, `seg_len`, `heading`
+    (radians), signed `curvature`; `cum` (n + 1) is the arc length at each
+    point, closing the loop. The dense table `sample_xy` / `sample_seg`
+    holds a point every `sample_ds` px. `barrier_outer` / `barrier_inner`
+    are per-segment (n, 2, 2) lines at the barrier centre, `kerbs` are
+    (k, 4, 2) quads on the segments `kerb_seg`, and `sector_gates` are
+    (SECTORS, 2, 2) lines across the track at arc lengths `sector_s`, the
+    first on the start line.
+    """
+    def __init__(self, arrays, path=None):
+        self.path = path
+        for name, value in arrays.items():
+            setattr(self, name, value)
+        self.n = len(self.points)
+        self.length = float(self.cum[-1])
+        self.width, self.barrier_width = float(self.params[0]), float(self.params[1])
+        self.reach, self.cell_size = float(self.params[2]), float(self.params[3])
+        self.start_s, self.sample_ds = float(self.params[4]), float(self.params[5])
+
+    def grid(self):
+        """The projector's cell -> segment-array buckets."""
+        return _buckets(self.grid_cells, self.grid_index, self.grid_segs)
+
+    def sector_at(self, s):
+        """Sector index (0 from the start line) of arc length `s` along the line."""
+        k = len(self.sector_s)
+        return min(int((s - self.start_s) % self.length * k / self.length), k - 1)
+
+
+def compile_track(points, spline_steps=0, width=240.0, barrier_width=25.0, start=None,
+                  reach=None, cell_size=CELL_SIZE, spacing=SAMPLE_SPACING, sectors=SECTORS,
+                  cache_dir=None):
+    """
+    The TrackGeometry of a closed loop through `points`: spline_steps > 0
+    samples a Catmull-Rom spline that many times per control point,
+    otherwise the points are the line. `start` (x, y) sets where the lap
+    and the first sector begin; `reach` pads the projector grid (defaults
+    to the width). Loads the cached bundle when there is one, and writes
+    it otherwise; cache_dir=False skips the cache.
+    """
+    reach = width if reach is None else reach
+    inputs = {
+        "version": GEOMETRY_VERSION,
+        "points": [[float(x), float(y)] for x, y in points],
+        "spline_steps": int(spline_steps), "width": float(width), "barrier_width": float(barrier_width),
+        "start": None if start is None else [float(start[0]), float(start[1])],
+        "reach": float(reach), "cell_size": float(cell_size), "spacing": float(spacing),
+        "sectors": int(sectors),
+    }
+    if cache_dir is False:
+        return TrackGeometry(_compile(**inputs))
+    key = hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+    path = os.path.join(cache_dir or CACHE_DIR, f"track-v{GEOMETRY_VERSION}-{key[:20]}.npz")
+    if os.path.exists(path):
+        try:
+            return TrackGeometry(load_npz(path), path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass  # torn or foreign file: rebuild it
+    arrays = _compile(**inputs)
+    try:
+        _save(path, arrays)
+    except OSError:
+        return TrackGeometry(arrays)  # read-only home: still usable, just not cached
+    return TrackGeometry(load_npz(path), path)
+
+
+def _compile(version, points, spline_steps, width, barrier_width, start, reach, cell_size, spacing, sectors):
+    ctrl = np.asarray(points, dtype=np.float64)
+    pts = _spline(ctrl, spline_steps) if spline_steps > 0 else ctrl
+    n = len(pts)
+    seg_vec = np.roll(pts, -1, axis=0) - pts
+    seg_len = np.hypot(seg_vec[:, 0], seg_vec[:, 1])
+    cum = np.concatenate(([0.0], np.cumsum(seg_len)))
+    length = float(cum[-1])
+    tangents = seg_vec / np.maximum(seg_len, 1e-12)[:, None]
+    normals = np.stack([-tangents[:, 1], tangents[:, 0]], axis=1)
+    heading = np.arctan2(seg_vec[:, 1], seg_vec[:, 0])
+
+    # signed turn at each point over the mean length of the segments either side
+    turn = (heading - np.roll(heading, 1) + math.pi) % (2 * math.pi) - math.pi
+    curvature = turn / np.maximum((seg_len + np.roll(seg_len, 1)) / 2, 1e-12)
+
+    # dense table over the closed polyline
+    m = max(2, int(math.ceil(length / spacing)) + 1)
+    s = np.linspace(0.0, length, m)
+    closed = np.concatenate((pts, pts[:1]))
+    sample_xy = np.stack([np.interp(s, cum, closed[:, 0]), np.interp(s, cum, closed[:, 1])], axis=1)
+    sample_seg = np.clip(np.searchsorted(cum, s, side="right") - 1, 0, n - 1)
+
+    # barriers: each segment's ends pushed out along its own normal
+    off = normals * (width / 2 + barrier_width / 2)
+    ends = np.roll(pts, -1, axis=0)
+    barrier_outer = np.stack([pts + off, ends + off], axis=1)
+    barrier_inner = np.stack([pts - off, ends - off], axis=1)
+
+    # kerbs on both edges wherever the segment turns tighter than KERB_CURVATURE
+    seg_curv = (curvature + np.roll(curvature, -1)) / 2
+    kerb_seg = np.flatnonzero(np.abs(seg_curv) > KERB_CURVATURE)
+    quads = []
+    for side in (1.0, -1.0):
+        a = normals[kerb_seg] * side * (width / 2 - KERB_WIDTH)
+        b = normals[kerb_seg] * side * (width / 2)
+        p, q = pts[kerb_seg], ends[kerb_seg]
+        quads.append(np.stack([p + a, q + a, q + b, p + b], axis=1))
+    kerbs = np.concatenate(quads).reshape(-1, 4, 2)
+    kerb_seg = np.concatenate((kerb_seg, kerb_seg))
+
+    start_s = 0.0 if start is None else _locate(pts, seg_vec, seg_len, cum, start)
+    sector_s = (start_s + np.arange(sectors) * length / sectors) % length
+    gate_seg = np.minimum(np.searchsorted(cum, sector_s, side="right") - 1, n - 1)
+    centre = pts[gate_seg] + tangents[gate_seg] * (sector_s - cum[gate_seg])[:, None]
+    half = normals[gate_seg] * (width / 2)
+    sector_gates = np.stack([centre - half, centre + half], axis=1)
+
+    cells, index, segs = _grid(pts, reach, cell_size)
+    return {
+        "version": np.array(version), "points": pts, "tangents": tangents, "normals": normals,
+        "heading": heading, "seg_len": seg_len, "cum": cum, "curvature": curvature,
+        "sample_xy": sample_xy, "sample_seg": sample_seg,
+        "barrier_outer": barrier_outer, "barrier_inner": barrier_inner,
+        "kerbs": kerbs, "kerb_seg": kerb_seg, "sector_s": sector_s, "sector_gates": sector_gates,
+        "grid_cells": cells, "grid_index": index, "grid_segs": segs,
+        "params": np.array([width, barrier_width, reach, cell_size, start_s, length / (m - 1)]),
+    }
+
+def _spline(ctrl, steps):
+    """Catmull-Rom samples, term for term as engine.catmull_rom_spline so the points match exactly."""
+    p0, p1 = np.roll(ctrl, 1, axis=0)[:, None], ctrl[:, None]
+    p2, p3 = np.roll(ctrl, -1, axis=0)[:, None], np.roll(ctrl, -2, axis=0)[:, None]
+    t = (np.arange(steps) / float(steps))[None, :, None]
+    t2, t3 = t * t, t * t * t
+    out = 0.5 * ((2 * p1) + (-p0 + p2) * t + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t2
+                 + (-p0 + 3 * p1 - 3 * p2 + p3) * t3)
+    return out.reshape(-1, 2)
+
+def _locate(pts, seg_vec, seg_len, cum, xy):
+    """Arc length of the nearest point on the line to xy (first segment on ties)."""
+    rel = np.asarray(xy, dtype=np.float64) - pts
+    t = np.clip((rel * seg_vec).sum(1) / np.maximum(seg_len**2, 1e-12), 0.0, 1.0)
+    off = rel - seg_vec * t[:, None]
+    seg = int(np.argmin((off * off).sum(1)))
+    return float(cum[seg] + t[seg] * seg_len[seg])
+
+def segment_grid(pts, reach, cell_size=CELL_SIZE):
+    """Cell -> segment-array buckets of a loop that has no compiled bundle."""
+    return _buckets(*_grid(np.asarray(pts, dtype=np.float64), reach, cell_size))
+
+def _buckets(cells, index, segs):
+    index = index.tolist()
+    return {(cx, cy): segs[index[i]:index[i + 1]] for i, (cx, cy) in enumerate(cells.tolist())}
+
+def _grid(pts, reach, cell_size):
+    """TrackProjector's grid in CSR form: sorted cells (c, 2), offsets (c + 1), segments."""
+    ends = np.roll(pts, -1, axis=0)
+    lo = np.floor((np.minimum(pts, ends) - reach) / cell_size).astype(np.int64)
+    hi = np.floor((np.maximum(pts, ends) + reach) / cell_size).astype(np.int64)
+    buckets = {}
+    for seg, ((x0, y0), (x1, y1)) in enumerate(zip(lo.tolist(), hi.tolist())):
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                buckets.setdefault((cx, cy), []).append(seg)
+    cells = sorted(buckets)
+    index = np.cumsum([0] + [len(buckets[c]) for c in cells])
+    segs = np.array([s for c in cells for s in buckets[c]], dtype=np.int64)
+    return np.array(cells, dtype=np.int64).reshape(-1, 2), index, segs
+
+
+def _save(path, arrays):
+    """Writes the bundle beside its final name and renames it in, so readers never see half a file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".npz", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def load_npz(path):
+    """
+    Memory-maps every array of an uncompressed .npz (np.load ignores
+    mmap_mode for archives): the members are plain .npy files stored at
+    known offsets, so the file is mapped once and each array is a
+    read-only view into it.
+    """
+    arrays = {}
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    with open(path, "rb") as f, zipfile.ZipFile(f) as zf:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed")
+            # local header: 30 fixed bytes, then the name and extra field
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype="<u2").tolist()
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            if npy_format.read_magic(f) == (1, 0):
+                shape, fortran, dtype = npy_format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = npy_format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"{path}: {info.filename} holds objects")
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            arrays[name] = np.ndarray(shape, dtype, buffer=mapped, offset=f.tell(),
+                                      order="F" if fortran else "C")
+    if int(arrays.get("version", -1)) != GEOMETRY_VERSION:
+        raise ValueError(f"{path}: not a version {GEOMETRY_VERSION} track bundle")
+    return arrays
@@ -0,0 +1,81 @@
+"""
+Continuous progress along a closed waypoint loop.
+
+TrackProjector turns world positions into arc length along the racing line.
+Each car keeps the segment it was last projected onto, so a tick only tests
+a small window of segments around it; a uniform grid over the segments
+re-finds a car that left its window (teleported by a restore, spun off far
+from the line, ...).
+"""
+import math
+import numpy as np
+from src.sim.geometry import CELL_SIZE, segment_grid
+
+WINDOW = 8         # segments searched either side of a car's last segment
+
+class TrackProjector:
+    def __init__(self, waypoints, reach=240.0, window=WINDOW, cell_size=CELL_SIZE, grid=None):
+        pts = np.asarray(waypoints, dtype=np.float64)
+        self.n = len(pts)
+        self.pts = pts
+        self.seg_vec = np.roll(pts, -1, axis=0) - pts
+        self.seg_len = np.hypot(self.seg_vec[:, 0], self.seg_vec[:, 1])
+        self._inv_len2 = 1.0 / np.maximum(self.seg_len**2, 1e-12)
+        self.cum = np.concatenate(([0.0], np.cumsum(self.seg_len)))
+        self.length = float(self.cum[-1])
+        self.reach = reach  # beyond this distance from the window, re-locate via the grid
+        self._offsets = np.arange(-window, window + 1)
+        self.cell_size = cell_size
+        self._grid = grid if grid is not None else segment_grid(pts, reach, cell_size)
+
+    @classmethod
+    def from_geometry(cls, geometry, window=WINDOW):
+        """A projector over a compiled TrackGeometry, reusing its precomputed grid."""
+        return cls(geometry.points, geometry.reach, window, geometry.cell_size, geometry.grid())
+
+    def _nearest(self, xy, segs):
+        """For points (m, 2) against candidate segments (m, k): best (segment, t, dist)."""
+        a = self.pts[segs]
+        d = self.seg_vec[segs]
+        rel = xy[:, None, :] - a
+        t = np.clip((rel * d).sum(-1) * self._inv_len2[segs], 0.0, 1.0)
+        off = rel - d * t[..., None]
+        dist2 = (off * off).sum(-1)
+        j = np.argmin(dist2, axis=1)
+        rows = np.arange(len(xy))
+        return segs[rows, j], t[rows, j], np.sqrt(dist2[rows, j])
+
+    def locate(self, x, y):
+        """Global search for one point, via the grid (all segments if off the grid)."""
+        key = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        segs = self._grid.get(key)
+        if segs is None:
+            segs = np.arange(self.n)
+        seg, t, dist = self._nearest(np.array([[x, y]]), segs[None, :])
+        return int(seg[0]), float(self.cum[seg[0]] + t[0] * self.seg_len[seg[0]]), float(dist[0])
+
+    def project(self, xy, hint):
+        """
+        Projects points (m, 2) onto the loop, searching around the segments in
+        `hint` (m,); a negative hint forces a grid lookup. Returns the arrays
+        (segment, arc length, distance from the line).
+        """
+        xy = np.asarray(xy, dtype=np.float64)
+        hint = np.asarray(hint)
+        segs = (np.maximum(hint, 0)[:, None] + self._offsets) % self.n
+        seg, t, dist = self._nearest(xy, segs)
+        s = self.cum[seg] + t * self.seg_len[seg]
+        for i in np.flatnonzero((hint < 0) | (dist > self.reach)):
+            seg[i], s[i], dist[i] = self.locate(*xy[i])
+        return seg, s, dist
+
+    def frame_at(self, s):
+        """Points (m, 2) on the line at arc lengths `s` and the unit tangents (m, 2) there."""
+        s = np.mod(np.asarray(s, dtype=np.float64), self.length)
+        seg = np.minimum(np.searchsorted(self.cum, s, side="right") - 1, self.n - 1)
+        tangent = self.seg_vec[seg] / np.maximum(self.seg_len[seg], 1e-12)[:, None]
+        return self.pts[seg] + tangent * (s - self.cum[seg])[:, None], tangent
+
+    def delta(self, s_from, s_to):
+        """Signed shortest arc distance from s_from to s_to around the loop."""
+        return (np.asarray(s_to) - s_from + self.length / 2) % self.length - self.length / 2
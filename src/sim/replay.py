@@ -0,0 +1,80 @@
+"""
+Playback of SimulationManager telemetry logs.
+
+ReplaySimulation exposes the attributes the admin panels read from a live
+SimulationManager (cars, time, focused_car, get_leaderboard(), ...), filled
+from a recorded log at a seekable cursor. No Box2D world is created and no
+physics runs, so it can scrub through a race at any speed in either
+direction.
+"""
+from src.core.recorder import TelemetryLog
+from src.core.replay import Replay
+from src.sim.engine import Track, LAPS_TO_FINISH, update_gaps
+
+class ReplayCar:
+    """Stand-in for a Car with the static details from the log header; the rest is set per refresh."""
+    width, length = 20, 36
+    drs_enabled, downforce_level = False, 5
+
+    def __init__(self, info):
+        self.id, self.team_name = info["id"], info["team_name"]
+        self.color = tuple(info["color"])
+        self.tire_compound, self.engine_mode = info["tire_compound"], info["engine_mode"]
+        self.gap_to_leader = self.interval = None
+
+
+class ReplaySimulation:
+    # Front-ends swap in subclasses that know how to draw themselves.
+    track_cls = Track
+    car_cls = ReplayCar
+
+    def __init__(self, path):
+        self.log = log = path if isinstance(path, TelemetryLog) else TelemetryLog(path)
+        if log.header.get("source") != "SimulationManager":
+            raise ValueError(f"{log.path} was not recorded from a SimulationManager")
+        self.track = self.track_cls()
+        self.replay = Replay(log, angles=("angle",))
+        self.cars = [self.car_cls(info) for info in log.header["cars"]]
+        self.focused_car = self.cars[0]
+        self.race_started, self.start_countdown = True, 0.0
+        self.refresh()
+
+    def refresh(self):
+        """Loads every car's state at the replay cursor."""
+        state = self.replay.state()
+        for name in self.log.columns:
+            for car, v in zip(self.cars, state[name].tolist()):
+                setattr(car, name, v)
+        self.time = state["time"]
+        for car in self.cars:
+            car.finished = car.lap > LAPS_TO_FINISH
+            car.total_time = self.time
+        self._leaderboard = sorted(self.cars, key=lambda c: c.position)
+        update_gaps(self._leaderboard)
+
+    def advance(self, seconds):
+        """Plays `seconds` of real time at replay.speed; False once playback hits either end."""
+        moving = self.replay.advance(seconds)
+        self.refresh()
+        return moving
+
+    def seek(self, time):
+        self.replay.seek(time)
+        self.refresh()
+
+    def seek_lap(self, lap):
+        """Jumps to where the focused car started lap `lap`, if it got that far."""
+        try:
+            self.replay.seek_lap(self.cars.index(self.focused_car), lap)
+        except KeyError:
+            return False
+        self.refresh()
+        return True
+
+    def set_focus_car(self, car):
+        if car in self.cars:
+            self.focused_car = car
+
+    def get_leaderboard(self):
+        """Cars in recorded race order at the cursor; do not modify the list."""
+        return self._leaderboard
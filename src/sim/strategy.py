@@ -0,0 +1,198 @@
+"""
+Monte Carlo pit-strategy evaluation.
+
+Instead of pitting when fuel or tyres cross a threshold, a car can compare
+whole plans (when to stop, which compound for each stint, which engine
+mode) by running thousands of stochastic rollouts of the rest of the race:
+
+    evaluator = StrategyEvaluator(get_track("forest")["physics"], laps=40, seed=1)
+    plans = [Plan((20,), ("soft", "hard")), Plan((13, 27), ("soft", "soft", "medium"))]
+    results = evaluator.evaluate(plans, lap=car.lap, fuel=car.fuel, tire_wear=car.tire_wear)
+    best = ranked(results)[0]
+
+Rollouts are lap-level, not physics: each lap costs the track's base lap
+time scaled by compound grip and engine power, plus tyre wear (with a
+cliff), fuel load and noise; safety cars, slow stops, wear and fuel burn
+vary between rollouts. All rollouts of a plan are computed at once as
+(rollouts, laps) arrays, and every plan sees the same random draws, so
+differences between plans are not noise from different luck.
+"""
+import math
+from collections import namedtuple
+from itertools import product
+import numpy as np
+from src.env.speed_profile import lap_time
+from src.sim.compounds import ENGINE_MODES, TIRE_COMPOUNDS
+
+ROLLOUTS = 2000
+CONFIDENCE_Z = 1.96       # 95% interval on the mean finishing time
+
+# Pace: lap time scales with grip ** -GRIP_PACE and power ** -POWER_PACE
+GRIP_PACE = 0.05
+POWER_PACE = 0.1
+# Tyre wear (% per lap in race mode, scaled by power ** 2) and its cost as a
+# fraction of the lap: linear, then quadratic past the cliff
+TYRE_WEAR = {'soft': 4.0, 'medium': 2.5, 'hard': 1.6}
+WEAR_PACE = 0.0004
+CLIFF_WEAR = 70.0
+CLIFF_PACE = 0.00005
+# Fuel (% of a tank per lap in race mode, scaled by power ** 2); pit stops
+# refill, running dry retires the car
+FUEL_PER_LAP = 2.5
+FUEL_PACE = 0.0003
+# Randomness
+LAP_NOISE = 0.004         # sd of each lap, fraction of the lap
+WEAR_SPREAD = 0.15        # sd of log wear rate per rollout (track temperature, driving style)
+FUEL_SPREAD = 0.05
+SAFETY_CAR_PROB = 0.02    # per lap
+SAFETY_CAR_LAPS = 3
+SAFETY_CAR_PACE = 1.4     # lap time behind the safety car, fraction of the base lap
+PIT_LOSS = 22.0           # seconds lost to a stop
+PIT_LOSS_SD = 1.0
+SLOW_STOP_PROB = 0.05
+SLOW_STOP_LOSS = 5.0
+SAFETY_CAR_PIT = 0.5      # fraction of PIT_LOSS lost when stopping under a safety car
+
+# pit_laps: laps at the end of which the car stops; compounds: one per stint;
+# modes: one per stint (Plan() accepts a single mode name for all of them)
+class Plan(namedtuple("Plan", "pit_laps compounds modes")):
+    __slots__ = ()
+
+    def __new__(cls, pit_laps, compounds, modes="race"):
+        pit_laps, compounds = tuple(pit_laps), tuple(compounds)
+        modes = (modes,) * len(compounds) if isinstance(modes, str) else tuple(modes)
+        if not len(compounds) == len(modes) == len(pit_laps) + 1:
+            raise ValueError("a plan needs one compound and one mode per stint")
+        if list(pit_laps) != sorted(set(pit_laps)):
+            raise ValueError("pit laps must be increasing")
+        for c in compounds:
+            if c not in TIRE_COMPOUNDS:
+                raise ValueError(f"unknown compound {c!r}")
+        for m in modes:
+            if m not in ENGINE_MODES:
+                raise ValueError(f"unknown engine mode {m!r}")
+        return super().__new__(cls, pit_laps, compounds, modes)
+
+    def label(self):
+        """e.g. "S-20-H/c": softs, stop after lap 20, hards in conservation mode."""
+        stints = [c[0].upper() + ("" if m == "race" else "/" + m[0])
+                  for c, m in zip(self.compounds, self.modes)]
+        parts = stints[:1]
+        for lap, stint in zip(self.pit_laps, stints[1:]):
+            parts += [str(lap), stint]
+        return "-".join(parts)
+
+# times: finishing time of every rollout (inf where the car ran out of fuel);
+# mean, ci and percentiles cover the finished rollouts only
+StrategyResult = namedtuple("StrategyResult", "plan times mean ci p10 p50 p90 dnf_rate")
+
+
+def even_plans(laps, stops=(0, 1, 2), compounds=tuple(TIRE_COMPOUNDS), modes=("race",)):
+    """Every compound and mode sequence over evenly split stints, for each number of stops."""
+    plans = []
+    for n in stops:
+        pit_laps = tuple(round(laps * (i + 1) / (n + 1)) for i in range(n))
+        for comps in product(compounds, repeat=n + 1):
+            for mode in modes:
+                plans.append(Plan(pit_laps, comps, mode))
+    return plans
+
+def ranked(results, max_dnf=0.05):
+    """Results by mean finishing time, plans retiring more than `max_dnf` of the time last."""
+    return sorted(results, key=lambda r: (r.dnf_rate > max_dnf, r.mean))
+
+
+class StrategyEvaluator:
+    """
+    Rolls out candidate plans for the rest of a `laps`-lap race. `track`
+    is a 1D Track whose base lap is its flying lap on fresh tyres from
+    the cached speed profile; pass base_lap (seconds) instead for other tracks.
+    """
+    def __init__(self, track=None, laps=50, base_lap=None, rollouts=ROLLOUTS, seed=None,
+                 fuel_per_lap=FUEL_PER_LAP):
+        if base_lap is None:
+            if track is None:
+                raise ValueError("need a track or a base lap time")
+            base_lap = lap_time(track)
+        self.base_lap = base_lap
+        self.laps = laps
+        self.rollouts = rollouts
+        self.fuel_per_lap = fuel_per_lap
+        self.rng = np.random.default_rng(seed)
+
+    def evaluate(self, plans, lap=0, fuel=100.0, tire_wear=0.0):
+        """
+        Runs every plan from the end of lap `lap` with the car's current fuel
+        and tyre wear (the first stint carries on with the fitted tyres).
+        Pit laps at or before `lap` are ignored. Returns a StrategyResult per plan.
+        """
+        n, r = self.laps - lap, self.rollouts
+        if n <= 0:
+            raise ValueError("the race is already over")
+        draws = self._draw(r, n)
+        return [self._rollout(plan, lap, n, fuel, tire_wear, draws) for plan in plans]
+
+    def _draw(self, r, n):
+        """Random inputs shared by every plan."""
+        rng = self.rng
+        starts = rng.random((r, n)) < SAFETY_CAR_PROB
+        c = np.cumsum(starts, axis=1)
+        lagged = np.zeros_like(c)
+        lagged[:, SAFETY_CAR_LAPS:] = c[:, :-SAFETY_CAR_LAPS]
+        stop = PIT_LOSS + rng.normal(0.0, PIT_LOSS_SD, (r, n))
+        stop += (rng.random((r, n)) < SLOW_STOP_PROB) * SLOW_STOP_LOSS
+        return {
+            "noise": rng.normal(0.0, LAP_NOISE, (r, n)),
+            "safety_car": c > lagged,   # a safety car came out in the last SAFETY_CAR_LAPS laps
+            "pit_loss": stop,
+            "wear": np.exp(rng.normal(0.0, WEAR_SPREAD, (r, 1))),
+            "fuel": np.exp(rng.normal(0.0, FUEL_SPREAD, (r, 1))),
+        }
+
+    def _schedule(self, plan, lap, n, fuel, tire_wear):
+        """Per-lap arrays of the plan: pace factor, wear and fuel per lap, laps into the stint, ..."""
+        pace, wear, burn = np.empty(n), np.empty(n), np.empty(n)
+        age, wear0, fuel0 = np.empty(n), np.zeros(n), np.full(n, 100.0)
+        pit = np.zeros(n, dtype=bool)
+        start = 0
+        done = sum(p <= lap for p in plan.pit_laps)   # stints already over
+        ends = [p - lap for p in plan.pit_laps[done:] if p < self.laps] + [n]
+        stints = list(zip(plan.compounds, plan.modes))[done:done + len(ends)]
+        for k, (end, (compound, mode)) in enumerate(zip(ends, stints)):
+            grip, power = TIRE_COMPOUNDS[compound]['grip'], ENGINE_MODES[mode]['power']
+            s = slice(start, end)
+            pace[s] = grip ** -GRIP_PACE * power ** -POWER_PACE
+            wear[s] = TYRE_WEAR[compound] * power ** 2
+            burn[s] = self.fuel_per_lap * power ** 2
+            age[s] = np.arange(1, end - start + 1)
+            if k == 0:
+                wear0[s], fuel0[s] = tire_wear, fuel
+            if end < n:
+                pit[end - 1] = True
+            start = end
+        return pace, wear, burn, age, wear0, fuel0, pit
+
+    def _rollout(self, plan, lap, n, fuel, tire_wear, d):
+        pace, wear_rate, burn, age, wear0, fuel0, pit = self._schedule(plan, lap, n, fuel, tire_wear)
+        wear = wear0 + age * wear_rate * d["wear"]            # at the end of each lap, (rollouts, laps)
+        tank = fuel0 - age * burn * d["fuel"]
+        over = np.maximum(wear - CLIFF_WEAR, 0.0)
+        t = 1.0 + WEAR_PACE * np.minimum(wear, 100.0) + CLIFF_PACE * over * over \
+            + FUEL_PACE * np.maximum(tank, 0.0) + d["noise"]
+        t *= self.base_lap * pace
+        sc = d["safety_car"]
+        t[sc] = self.base_lap * SAFETY_CAR_PACE
+        t += pit * d["pit_loss"] * np.where(sc, SAFETY_CAR_PIT, 1.0)
+        times = t.sum(axis=1)
+        dnf = (tank < 0.0).any(axis=1)
+        times[dnf] = np.inf
+        return _summarize(plan, times, dnf)
+
+def _summarize(plan, times, dnf):
+    ok = times[~dnf]
+    if not len(ok):
+        return StrategyResult(plan, times, math.inf, (math.inf, math.inf), math.inf, math.inf, math.inf, 1.0)
+    mean = float(ok.mean())
+    half = CONFIDENCE_Z * float(ok.std(ddof=1)) / math.sqrt(len(ok)) if len(ok) > 1 else 0.0
+    p10, p50, p90 = np.percentile(ok, (10, 50, 90)).tolist()
+    return StrategyResult(plan, times, mean, (mean - half, mean + half), p10, p50, p90, float(dnf.mean()))
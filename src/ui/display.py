@@ -1,7 +1,15 @@
 import pygame
-import math
 import os
+import numpy as np
 from src.core.tracks import THEMES, TRACK_DATA
+from src.sim.geometry import compile_track
+from src.ui.sprites import SpriteCache, quantize_scale
+from src.core.profiler import profiler
+from src.ui.profiler_overlay import ProfilerOverlay
+from src.ui.text import text_cache
+
+PATH_SAMPLE_SPACING = 1.0  # px between entries of the arc-length table
+TRACK_WIDTH = 40          # px of asphalt; the rumble strip shows 5 px either side
 
 class Button:
     """A simple clickable button class."""
@@ -15,7 +23,7 @@ class Button:
     def draw(self, screen, font):
         color = self.hover_color if self.is_hovered else self.color
         pygame.draw.rect(screen, color, self.rect, border_radius=10)
-        text_surf = font.render(self.text, True, (255, 255, 255))
+        text_surf = text_cache.render(font, self.text, (255, 255, 255))
         text_rect = text_surf.get_rect(center=self.rect.center)
         screen.blit(text_surf, text_rect)
 
@@ -43,6 +51,9 @@ class Display:
         self.track_data = None
         self.env = None
         self._load_car_images()
+        self.car_sprites = SpriteCache(self._render_car_sprite)
+        self.profiler_overlay = ProfilerOverlay(self.font_tiny)
+        self.hud_surf = pygame.Surface((self.width, 140), pygame.SRCALPHA)  # reused every frame
 
     def _load_car_images(self):
         self.car_images = []
@@ -59,47 +70,60 @@ class Display:
                 surf.fill(color)
                 self.car_images.append(surf)
 
+    def _render_car_sprite(self, key):
+        """Car image `index` scaled to (w, h); the unrotated base of a sprite key."""
+        index, w, h = key
+        return pygame.transform.scale(self.car_images[index], (w, h))
+
     def set_track(self, track_data, env):
         self.track_data = track_data
         self.env = env
+        self._prev_pos = None
         self.theme = track_data["theme"]
         self.track_path = track_data["path"]
         self._precalculate_path()
 
     def _precalculate_path(self):
-        self.path_segments_len = []
-        self.path_cumulative_len = [0]
-        total_len = 0
-        for i in range(len(self.track_path)):
-            p1 = self.track_path[i]
-            p2 = self.track_path[(i + 1) % len(self.track_path)]
-            dist = math.hypot(p2[0] - p1[0], p2[1] - p1[1])
-            self.path_segments_len.append(dist)
-            total_len += dist
-            self.path_cumulative_len.append(total_len)
-        self.total_path_length = total_len
-
-    def _get_point_on_path(self, progress):
-        target_dist = progress * self.total_path_length
-        segment_idx = next((i for i, total in enumerate(self.path_cumulative_len) if total > target_dist), len(self.path_cumulative_len) - 2)
-        
-        p1 = self.track_path[segment_idx]
-        p2 = self.track_path[(segment_idx + 1) % len(self.track_path)]
+        # Dense arc-length table: position, heading and lane-offset normal
+        # every PATH_SAMPLE_SPACING px, so placing any number of cars is a
+        # single vectorized index/interpolate instead of a scan per car.
+        # The table comes from the compiled (and disk-cached) track geometry.
+        geo = compile_track(self.track_path, width=TRACK_WIDTH, barrier_width=0,
+                            spacing=PATH_SAMPLE_SPACING)
+        self.geometry = geo
+        self.path_segments_len = geo.seg_len.tolist()
+        self.path_cumulative_len = geo.cum.tolist()
+        self.total_path_length = geo.length
+        self.path_ds = geo.sample_ds
+        self.path_x, self.path_y = geo.sample_xy[:, 0], geo.sample_xy[:, 1]
+        self.path_angle = np.degrees(-geo.heading)[geo.sample_seg]
+        # screen-space normal of the heading, the track's right-hand side
+        self.path_nx, self.path_ny = -geo.normals[geo.sample_seg].T
 
-        dist_into_segment = target_dist - self.path_cumulative_len[segment_idx]
-        segment_len = self.path_segments_len[segment_idx]
-        segment_progress = dist_into_segment / segment_len if segment_len > 0 else 0
+    def _path_poses(self, progress, lane_offset=0.0):
+        """
+        Positions and headings for arrays of lap progress (0..1) at the given
+        lateral lane offsets. Returns (x, y, angle_degrees) arrays.
+        """
+        f = (np.asarray(progress, dtype=np.float64) % 1.0) * self.total_path_length / self.path_ds
+        i = np.minimum(f.astype(np.int64), len(self.path_x) - 2)
+        t = f - i
+        x = self.path_x[i] + (self.path_x[i + 1] - self.path_x[i]) * t
+        y = self.path_y[i] + (self.path_y[i + 1] - self.path_y[i]) * t
+        # heading of the nearer sample, so corners switch within half a sample
+        j = np.where(t < 0.5, i, i + 1)
+        return (x + lane_offset * self.path_nx[j], y + lane_offset * self.path_ny[j],
+                self.path_angle[j])
 
-        x = p1[0] + (p2[0] - p1[0]) * segment_progress
-        y = p1[1] + (p2[1] - p1[1]) * segment_progress
-        angle = math.degrees(math.atan2(-(p2[1] - p1[1]), p2[0] - p1[0]))
-        return (x, y), angle
+    def _get_point_on_path(self, progress):
+        x, y, angle = self._path_poses(np.array([progress]))
+        return (float(x[0]), float(y[0])), float(angle[0])
 
     # --- DRAWING METHODS FOR EACH GAME STATE ---
 
     def draw_main_menu(self, buttons):
         self.screen.fill((10, 10, 30))
-        title_text = self.font_large.render("F1 Grand Prix", True, (255, 255, 255))
+        title_text = text_cache.render(self.font_large, "F1 Grand Prix", (255, 255, 255))
         title_rect = title_text.get_rect(center=(self.width / 2, self.height / 3))
         self.screen.blit(title_text, title_rect)
         for button in buttons.values():
@@ -108,7 +132,7 @@ class Display:
 
     def draw_track_selection(self, buttons, tracks):
         self.screen.fill((10, 10, 30))
-        title = self.font_medium.render("Select a Circuit", True, (255, 255, 255))
+        title = text_cache.render(self.font_medium, "Select a Circuit", (255, 255, 255))
         self.screen.blit(title, (20, 20))
         for key, button in buttons.items():
             # Draw track preview
@@ -135,86 +159,102 @@ class Display:
             button.draw(self.screen, self.font_small)
         pygame.display.flip()
 
-    def draw_race(self):
-        # Environment
-        self.screen.fill(self.theme["grass"])
-        pygame.draw.rect(self.screen, self.theme["background"], (20, 20, self.width-40, self.height-40))
-        pygame.draw.lines(self.screen, self.theme["rumble_strip"], True, self.track_path, width=50)
-        pygame.draw.lines(self.screen, self.theme["track"], True, self.track_path, width=40)
-        
-        # Draw cars and HUD
-        self._draw_cars()
-        self._draw_race_hud()
-        
-        pygame.display.flip()
-        self.clock.tick(60)
+    def remember_positions(self):
+        """Call before each env.step so draw_race can interpolate towards the new state."""
+        self._prev_pos = np.array([car.pos for car in self.env.cars])
 
-    def draw_race_end(self, button):
+    def draw_race(self, alpha=1.0, time_scale=None, hint="[TAB]"):
+        """
+        Renders the race `alpha` of the way from the positions saved by
+        remember_positions() to the current ones, and returns the seconds
+        elapsed since the previous frame. `hint` follows the speed readout.
+        """
+        with profiler.section("ui.draw_race"):
+            # Environment
+            with profiler.section("ui.track"):
+                self.screen.fill(self.theme["grass"])
+                pygame.draw.rect(self.screen, self.theme["background"], (20, 20, self.width-40, self.height-40))
+                pygame.draw.lines(self.screen, self.theme["rumble_strip"], True, self.track_path, width=TRACK_WIDTH + 10)
+                pygame.draw.lines(self.screen, self.theme["track"], True, self.track_path, width=TRACK_WIDTH)
+            
+            # Draw cars and HUD
+            with profiler.section("ui.cars"):
+                self._draw_cars(alpha)
+            with profiler.section("ui.hud"):
+                self._draw_race_hud(time_scale, hint)
+            self.profiler_overlay.draw(self.screen, (20, self.height - 260))
+            
+            pygame.display.flip()
+        frame_seconds = self.clock.tick(60) / 1000
+        profiler.end_frame()
+        return frame_seconds
+
+    def draw_race_end(self, buttons):
         s = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
         s.fill((0, 0, 0, 180))
         self.screen.blit(s, (0, 0))
 
-        title = self.font_large.render("Race Finished", True, (255, 255, 255))
+        title = text_cache.render(self.font_large, "Race Finished", (255, 255, 255))
         self.screen.blit(title, title.get_rect(centerx=self.width/2, y=100))
         
-        sorted_cars = sorted(zip(self.env.cars, self.env.laps), key=lambda x:(x[1], x[0].pos), reverse=True)
+        sorted_cars = self.env.ranked()
 
         for rank, (car, lap) in enumerate(sorted_cars, start=1):
             text = f"{rank}. Car-{car.id} - Laps: {lap}"
-            render_text = self.font_medium.render(text, True, (255, 255, 255))
+            render_text = text_cache.render(self.font_medium, text, (255, 255, 255))
             self.screen.blit(render_text, render_text.get_rect(centerx=self.width/2, y=250 + rank*50))
         
-        button.draw(self.screen, self.font_medium)
+        for button in buttons:
+            button.draw(self.screen, self.font_medium)
         pygame.display.flip()
 
 
     # --- HELPER DRAWING METHODS ---
     
-    def _draw_cars(self):
+    def _draw_cars(self, alpha=1.0):
         lane_width = 10
-        for car in self.env.cars:
-            if car.done: continue
-            progress = car.pos / self.env.track.length
-            (x, y), angle = self._get_point_on_path(progress)
-            
-            # Dynamic scaling based on speed
-            base_w, base_h = 40, 20
-            speed_scale = 1 + (car.speed / 500) # Slightly larger at high speed
+        cars = [car for car in self.env.cars if not car.done]
+        if not cars:
+            return
+        n = len(self.env.cars)
+        length = self.env.track.length
+        pos = np.array([car.pos for car in cars])
+        if self._prev_pos is not None and alpha < 1.0:
+            prev = self._prev_pos[[car.id for car in cars]]
+            pos = prev + alpha * ((pos - prev) % length)  # cars only move forward
+        progress = pos / length
+        offsets = (np.array([car.id for car in cars]) - (n - 1) / 2) * lane_width
+        xs, ys, angles = self._path_poses(progress, offsets)
+
+        # Dynamic scaling based on speed
+        base_w, base_h = 40, 20
+        for car, x, y, angle in zip(cars, xs.tolist(), ys.tolist(), angles.tolist()):
+            speed_scale = quantize_scale(1 + (car.speed / 500)) # Slightly larger at high speed
             w, h = int(base_w * speed_scale), int(base_h * speed_scale)
-            
-            scaled_img = pygame.transform.scale(self.car_images[car.id], (w, h))
-            rotated_img = pygame.transform.rotate(scaled_img, angle)
-            
-            offset_angle_rad = math.radians(angle + 90)
-            offset = (car.id - (len(self.env.cars) - 1) / 2) * lane_width
-            offset_x = offset * math.cos(offset_angle_rad)
-            offset_y = -offset * math.sin(offset_angle_rad)
-            
-            rect = rotated_img.get_rect(center=(x + offset_x, y + offset_y))
-            self.screen.blit(rotated_img, rect.topleft)
+            self.car_sprites.blit(self.screen, (car.id, w, h), angle, (x, y))
 
-    def _draw_race_hud(self):
+    def _draw_race_hud(self, time_scale=None, hint="[TAB]"):
         # Semi-transparent background for HUD
-        hud_surf = pygame.Surface((self.width, 140), pygame.SRCALPHA)
-        hud_surf.fill((0, 0, 0, 150))
-        self.screen.blit(hud_surf, (0, 0))
+        self.hud_surf.fill((0, 0, 0, 150))
+        self.screen.blit(self.hud_surf, (0, 0))
         
         # Race Time
         minutes = int(self.env.race_time // 60)
         seconds = int(self.env.race_time % 60)
         time_text = f"TIME: {minutes:02d}:{seconds:02d}"
-        time_surf = self.font_medium.render(time_text, True, (255, 255, 255))
-        self.screen.blit(time_surf, (self.width - 250, 20))
+        text_cache.draw(self.screen, self.font_medium, time_text, (255, 255, 255), (self.width - 250, 20))
+        if time_scale:
+            text_cache.draw(self.screen, self.font_small, f"SPEED {time_scale}  {hint}", (255, 255, 0),
+                            (self.width - 250, 65))
         
         # Leaderboard
-        sorted_cars = sorted(zip(self.env.cars, self.env.laps), key=lambda x:(x[1], x[0].pos), reverse=True)
+        sorted_cars = self.env.ranked()
         for rank, (car, lap) in enumerate(sorted_cars, start=1):
             text = (f"{rank}. C{car.id} | L:{lap}/{self.env.total_laps} | "
                     f"S:{car.speed:3.0f} | F:{car.fuel:3.0f} | "
                     f"T:{car.tyre_wear:.2f} | D:{car.damage:.2f}")
             color = self.theme.get("font", (255, 255, 255))
-            render_text = self.font_tiny.render(text, True, color)
-            self.screen.blit(render_text, (20, 10 + (rank * 25)))
+            text_cache.draw(self.screen, self.font_tiny, text, color, (20, 10 + (rank * 25)))
 
     def close(self):
         pygame.quit()
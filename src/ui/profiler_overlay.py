@@ -0,0 +1,69 @@
+import time
+import pygame
+from src.core.profiler import profiler
+from src.ui.text import text_cache
+
+CAPTURE_FRAMES = 120      # frames covered by one cProfile capture
+REFRESH_FRAMES = 30       # the table is rebuilt this often, not every frame
+BG = (0, 0, 0)
+FG = (200, 255, 200)
+
+class ProfilerOverlay:
+    """
+    Toggleable table of per-stage frame timings.
+
+    F3 shows/hides it (and switches timing on/off), F4 exports the current
+    stats as CSV and JSON, F5 captures a cProfile dump of the next
+    CAPTURE_FRAMES frames. Files are written to the working directory.
+    """
+    def __init__(self, font, prof=profiler):
+        self.font = font
+        self.prof = prof
+        self.visible = False
+        self._lines = []
+        self._built_at = -REFRESH_FRAMES
+        self._surf = None
+
+    def handle_event(self, event):
+        """Handles the profiler hotkeys; True when the overlay was shown or hidden."""
+        if event.type != pygame.KEYDOWN:
+            return False
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if event.key == pygame.K_F3:
+            self.visible = not self.visible
+            self.prof.enabled = self.visible
+            if not self.visible:
+                self.prof.reset()
+                self._surf = None
+            return True
+        if event.key == pygame.K_F4:
+            self.prof.export_csv(f"profile-{stamp}.csv")
+            self.prof.export_json(f"profile-{stamp}.json")
+        elif event.key == pygame.K_F5:
+            self.prof.capture(CAPTURE_FRAMES, f"profile-{stamp}.prof")
+        return False
+
+    def _build(self):
+        lines = self.prof.report_lines()
+        if self.prof.capturing:
+            lines.append("cProfile capture running...")
+        line_h = self.font.get_linesize()
+        # never shrink, so a redraw always covers the previous table
+        old_w, old_h = self._surf.get_size() if self._surf else (0, 0)
+        width = max(old_w, max(text_cache.width(self.font, l, FG) for l in lines) + 16)
+        self._surf = pygame.Surface((width, max(old_h, line_h * len(lines) + 12)))
+        self._surf.fill(BG)
+        for i, line in enumerate(lines):
+            text_cache.draw(self._surf, self.font, line, FG, (8, 6 + i * line_h))
+        self._built_at = self.prof.frames
+
+    def draw(self, surf, pos):
+        """
+        Blits the (opaque) table at `pos`; returns the covered rect, empty
+        when hidden. Call every frame while visible.
+        """
+        if not self.visible:
+            return pygame.Rect(pos, (0, 0))
+        if self._surf is None or self.prof.frames - self._built_at >= REFRESH_FRAMES:
+            self._build()
+        return surf.blit(self._surf, pos)
@@ -0,0 +1,46 @@
+from functools import lru_cache
+import pygame
+
+ANGLE_STEP = 2          # degrees between cached rotations
+SPEED_SCALE_STEP = 0.05 # quantum for speed-dependent sprite sizes
+
+class SpriteCache:
+    """
+    Rotated sprites at quantized angles, behind bounded LRU caches.
+
+    `render(key)` draws the unrotated sprite for a hashable key (team colour
+    and tyre compound, image index and size, ...). Both the unrotated sprites
+    and their rotations are cached, so a steady-state frame only does lookups
+    and blits.
+    """
+    def __init__(self, render, angle_step=ANGLE_STEP, maxsize=2048):
+        self.angle_step = angle_step
+        self._buckets = round(360 / angle_step)
+        self._base = lru_cache(maxsize=128)(render)
+        self._rotated = lru_cache(maxsize=maxsize)(self._rotate)
+
+    def _rotate(self, key, bucket):
+        return pygame.transform.rotate(self._base(key), bucket * self.angle_step)
+
+    def get(self, key, angle):
+        """Sprite for key rotated counter-clockwise by angle (degrees), to the nearest step."""
+        return self._rotated(key, round(angle / self.angle_step) % self._buckets)
+
+    def prerender(self, key):
+        """Fills every rotation of key up front, e.g. while a race is loading."""
+        for bucket in range(self._buckets):
+            self._rotated(key, bucket)
+
+    def blit(self, dest, key, angle, center):
+        sprite = self.get(key, angle)
+        dest.blit(sprite, (center[0] - sprite.get_width() // 2, center[1] - sprite.get_height() // 2))
+
+    def clear(self):
+        self._base.cache_clear()
+        self._rotated.cache_clear()
+
+    def cache_info(self):
+        return self._rotated.cache_info()
+
+def quantize_scale(scale, step=SPEED_SCALE_STEP):
+    return round(scale / step) * step
@@ -0,0 +1,83 @@
+import re
+from collections import OrderedDict
+
+_DIGITS = re.compile(r"([0-9]+)")
+
+class TextCache:
+    """
+    Rendered-text cache shared by the pygame front-ends.
+
+    render() returns the Surface for (font, text, colour, antialias), keeping
+    recently used ones until `max_bytes` of pixels is exceeded. draw() is for
+    readouts that change every frame (timers, speeds, temperatures): the text
+    between numbers comes from render() and the digits from a per-font glyph
+    atlas, so a new value never needs a fresh font.render.
+    """
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._surfs = OrderedDict()
+        self._bytes = 0
+        self._atlases = {}
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self._surfs.get(key)
+        if surf is not None:
+            self._surfs.move_to_end(key)
+            return surf
+        surf = font.render(text, antialias, color)
+        self._surfs[key] = surf
+        self._bytes += surf.get_width() * surf.get_height() * surf.get_bytesize()
+        while self._bytes > self.max_bytes and len(self._surfs) > 1:
+            _, old = self._surfs.popitem(last=False)
+            self._bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+        return surf
+
+    def _atlas(self, font, color, antialias):
+        key = (font, tuple(color), antialias)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = self._atlases[key] = {}
+        return atlas
+
+    def _glyph(self, atlas, font, ch, color, antialias):
+        glyph = atlas.get(ch)
+        if glyph is None:
+            metrics = font.metrics(ch)
+            advance = metrics[0][4] if metrics and metrics[0] else font.size(ch)[0]
+            glyph = atlas[ch] = (font.render(ch, antialias, color), advance)
+        return glyph
+
+    def _layout(self, font, text, color, antialias):
+        """Yields (surface, advance) pieces: cached label runs and digit glyphs."""
+        atlas = self._atlas(font, color, antialias)
+        for i, run in enumerate(_DIGITS.split(text)):
+            if not run:
+                continue
+            if i % 2:
+                for ch in run:
+                    yield self._glyph(atlas, font, ch, color, antialias)
+            else:
+                surf = self.render(font, run, color, antialias)
+                yield surf, surf.get_width()
+
+    def width(self, font, text, color, antialias=True):
+        """Width of `text` as laid out by draw()."""
+        return sum(advance for _, advance in self._layout(font, text, color, antialias))
+
+    def draw(self, dest, font, text, color, pos, antialias=True):
+        """Blits `text` with its top-left at pos; returns the drawn width."""
+        x, y = pos
+        start = x
+        for surf, advance in self._layout(font, text, color, antialias):
+            dest.blit(surf, (x, y))
+            x += advance
+        return x - start
+
+    def clear(self):
+        self._surfs.clear()
+        self._atlases.clear()
+        self._bytes = 0
+
+# Shared by main_game and src/ui/display.py
+text_cache = TextCache()
@@ -0,0 +1,37 @@
+import pygame
+
+class StaticLayer:
+    """
+    A world-space surface that is rendered once and blitted every frame.
+
+    `render(surface, offset)` draws the static scene exactly as it would onto
+    the screen with a camera at `offset`; `bounds()` returns the world rect
+    (x, y, w, h) the scene covers. The layer re-renders whenever the key
+    passed to blit() differs from the one it was built with, so callers fold
+    anything that changes the picture (geometry, colours) into the key.
+    """
+    def __init__(self, render, bounds):
+        self._render = render
+        self._bounds = bounds
+        self._key = None
+        self.surface = None
+        self.origin = (0, 0)
+
+    def invalidate(self):
+        self._key = None
+
+    def build(self, key):
+        x, y, w, h = (int(v) for v in self._bounds())
+        surf = pygame.Surface((w, h))
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert()  # match the screen format so blits are plain copies
+        self._render(surf, (x, y))
+        self.surface, self.origin, self._key = surf, (x, y), key
+
+    def blit(self, dest, cam_offset, key):
+        """Copies the part of the layer visible from cam_offset onto dest."""
+        if key != self._key:
+            self.build(key)
+        ox, oy = self.origin
+        # blit clips to dest, so only the visible region is copied
+        dest.blit(self.surface, (ox - round(cam_offset[0]), oy - round(cam_offset[1])))
@@ -0,0 +1,67 @@
+from abc import ABC, abstractmethod
+import pygame
+
+_STALE = object()
+
+class Widget(ABC):
+    """
+    A retained screen region that redraws only when what it shows changes.
+
+    Subclasses return a hashable description of their content from state()
+    and draw it in render(). update() compares the state with the last drawn
+    one and returns the rectangles it repainted, ready for
+    pygame.display.update().
+    """
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self._state = _STALE
+
+    def invalidate(self):
+        self._state = _STALE
+
+    @property
+    def dirty(self):
+        return self._state is _STALE
+
+    def state(self, ctx):
+        return None
+
+    @abstractmethod
+    def render(self, surf, ctx):
+        """Draws the whole widget into its rect on `surf`."""
+
+    def update(self, surf, ctx):
+        state = self.state(ctx)
+        if state == self._state:
+            return []
+        self.render(surf, ctx)
+        self._state = state
+        return [self.rect]
+
+
+class WidgetGroup:
+    """Widgets sharing one screen; collects their dirty rectangles per frame."""
+    def __init__(self, widgets=(), background=None):
+        self.widgets = list(widgets)
+        self.background = background
+        self._full = True
+
+    def invalidate(self):
+        """Forces a full repaint next frame, e.g. after the window was exposed."""
+        self._full = True
+        for w in self.widgets:
+            w.invalidate()
+
+    def update(self, surf, ctx):
+        if self._full:
+            if self.background is not None:
+                surf.fill(self.background)
+            for w in self.widgets:
+                w.invalidate()
+        rects = []
+        for w in self.widgets:
+            rects += w.update(surf, ctx)
+        if self._full:
+            self._full = False
+            return [surf.get_rect()]
+        return rects
@@ -0,0 +1,106 @@
+import random
+import numpy as np
+import pytest
+from src.core.season import corner_limits, drive
+from src.core.tracks import get_track
+from src.env import batch_env, race_env
+from src.env.batch_env import BatchRaceEnvironment
+from src.env.race_env import RaceEnvironment
+
+TICKS = 3000
+N_CARS = 4
+
+
+@pytest.fixture
+def no_safety_car(monkeypatch):
+    # the two models draw their yellow flags from different generators
+    monkeypatch.setattr(race_env, "SAFETY_CAR_PROB", 0.0)
+    monkeypatch.setattr(batch_env, "SAFETY_CAR_PROB", 0.0)
+
+
+JIT = [False, pytest.param(True, marks=pytest.mark.skipif(batch_env.njit is None, reason="needs numba"))]
+
+
+@pytest.mark.parametrize("jit", JIT)
+@pytest.mark.parametrize("name", ["night", "desert", "forest"])
+def test_step_matches_race_environment(no_safety_car, name, jit):
+    track = get_track(name)["physics"]
+    env = RaceEnvironment(n=N_CARS, laps=10**6, track=track, seed=0)
+    batch = BatchRaceEnvironment(n_races=1, n=N_CARS, laps=10**6, track=track, seed=0, jit=jit)
+    throttles = np.random.default_rng(7).uniform(-0.3, 1.0, (TICKS, N_CARS))
+
+    for tick, actions in enumerate(throttles):
+        env.step(actions.tolist())
+        batch.step(actions)
+        for field in ("pos", "speed", "damage"):
+            expected = [getattr(c, field) for c in env.cars]
+            assert getattr(batch, field)[0].tolist() == expected, f"{field} differs at tick {tick}"
+    assert batch.laps[0].tolist() == env.laps
+    assert max(env.laps) > 2  # the cars really raced
+
+
+@pytest.mark.parametrize("jit", JIT)
+@pytest.mark.parametrize("name", ["night", "alpine"])
+def test_finished_cars_park_as_in_race_environment(no_safety_car, name, jit):
+    track = get_track(name)["physics"]
+    env = RaceEnvironment(n=N_CARS, laps=2, track=track, seed=0)
+    batch = BatchRaceEnvironment(n_races=1, n=N_CARS, laps=2, track=track, seed=0, jit=jit)
+    pace = (0.4, 0.6, 0.8, 0.95)
+    limits, rng = corner_limits(track, pace), random.Random(0)
+
+    while not env.finished():
+        actions = drive(env, pace, limits, rng)
+        env.step(actions)
+        _, finished = batch.step(actions)
+        for field in ("pos", "speed", "damage", "fuel"):
+            assert getattr(batch, field)[0].tolist() == [getattr(c, field) for c in env.cars], field
+        assert batch.parked[0].tolist() == [i in env.finishers for i in range(N_CARS)]
+    assert finished[0]
+    assert env.finishers  # someone took the flag
+
+
+@pytest.mark.parametrize("jit", JIT)
+def test_tied_positions_keep_last_road_order(no_safety_car, jit):
+    track = get_track("night")["physics"]
+    env = RaceEnvironment(n=N_CARS, laps=10**6, track=track, seed=0)
+    batch = BatchRaceEnvironment(n_races=1, n=N_CARS, laps=10**6, track=track, seed=0, jit=jit)
+    # stationary cars in reverse grid order, then all level on the same spot
+    for i, car in enumerate(env.cars):
+        car.pos = batch.pos[0, i] = float(i)
+    env.step([0.0] * N_CARS)
+    batch.step(0.0)
+    for car in env.cars:
+        car.pos = 50.0
+    batch.pos[:] = 50.0
+
+    for tick, actions in enumerate(np.random.default_rng(3).uniform(0.2, 1.0, (200, N_CARS))):
+        env.step(actions.tolist())
+        batch.step(actions)
+        for field in ("pos", "speed", "behind_timer"):
+            expected = [getattr(c, field) for c in env.cars]
+            assert getattr(batch, field)[0].tolist() == expected, f"{field} differs at tick {tick}"
+
+
+@pytest.mark.parametrize("jit", JIT)
+def test_reset_selected_races(jit):
+    batch = BatchRaceEnvironment(n_races=3, n=N_CARS, seed=0, jit=jit)
+    for _ in range(50):
+        batch.step(0.8)
+    batch.reset([1])
+    assert batch.pos[1].tolist() == [0.0] * N_CARS
+    assert batch.fuel[1].tolist() == [100.0] * N_CARS
+    assert (batch.pos[[0, 2]] > 0).all()
+
+
+@pytest.mark.parametrize("jit", JIT)
+def test_step_returns_progress_and_finished(jit):
+    batch = BatchRaceEnvironment(n_races=5, n=N_CARS, laps=1, seed=0, jit=jit)
+    batch.damage[2] = 1.0  # retires on its first step
+    finished_at = np.full(5, -1)
+    for tick in range(2000):
+        progress, finished = batch.step(1.0)
+        np.testing.assert_allclose(progress, batch.laps + batch.pos / batch.track.length)
+        assert finished.tolist() == batch.finished().tolist()
+        finished_at[finished & (finished_at < 0)] = tick
+    assert finished_at[2] == 0
+    assert (finished_at > 0).sum() == 4  # the others ran their lap
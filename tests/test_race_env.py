@@ -0,0 +1,33 @@
+from src.core.events import DNF, EventQueue, Finish
+from src.env.car import FUEL_BURN
+from src.env.race_env import RaceEnvironment
+from src.env.track import Track, TrackSection
+
+
+def test_finish_positions_skip_retired_cars():
+    env = RaceEnvironment(n=3, laps=1, track=Track([TrackSection("straight", 1000)]), seed=0)
+    # car 0 retires just short of the line and coasts on ahead of the field
+    env.cars[0].pos, env.cars[0].damage = env.track.length - 1.0, 1.0
+    log = EventQueue(maxlen=None)
+    env.events.subscribe(log, types=(Finish,))
+    while not env.finished():
+        env.step([1.0, 1.0, 0.6])
+    assert [(e.car, e.position) for e in log.drain()] == [(1, 1), (2, 2)]
+    assert env.finishers == [1, 2]
+    assert env.standings.order == [1, 2, 0]  # finishers lead the classification
+
+
+def test_finished_cars_stop_and_cannot_retire():
+    env = RaceEnvironment(n=2, laps=1, track=Track([TrackSection("straight", 1000)]), seed=0)
+    # car 0 crosses the line on the first step with two steps of fuel left
+    env.cars[0].pos, env.cars[0].speed = env.track.length - 1.0, 50.0
+    env.cars[0].fuel = FUEL_BURN * 3
+    log = EventQueue(maxlen=None)
+    env.events.subscribe(log, types=(Finish, DNF))
+    env.step([1.0, 0.5])
+    parked = env.snapshot().cars[0].tolist()
+    while not env.finished():
+        env.step([1.0, 0.5])
+    assert [type(e) for e in log.drain()] == [Finish, Finish]
+    assert env.snapshot().cars[0].tolist() == parked
+    assert env.cars[0].speed == 0.0 and not env.cars[0].done
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from src.core.recorder import TelemetryLog, TelemetryRecorder
+from src.core.replay import Replay
+from src.core.tracks import get_track
+from src.env.race_env import RECORD_COLUMNS, RaceEnvironment
+
+TICKS = 1500
+CHUNK = 64   # small, so the column files grow and flush many times
+
+
+@pytest.fixture(scope="module")
+def recorded(tmp_path_factory):
+    """A race logged through RaceEnvironment.record_to, with what each tick held."""
+    path = str(tmp_path_factory.mktemp("race"))
+    env = RaceEnvironment(n=4, laps=10**6, track=get_track("forest")["physics"], seed=2)
+    env.record_to(path, chunk=CHUNK)
+    rng = np.random.default_rng(0)
+    expected = {name: [] for name, _ in RECORD_COLUMNS}
+    times = []
+    for tick in range(TICKS):
+        actions = rng.uniform(0.3, 1.0, 4).tolist()
+        env.step(actions)
+        for name in ("pos", "speed", "fuel", "tyre_wear", "damage", "done"):
+            expected[name].append([getattr(c, name) for c in env.cars])
+        expected["lap"].append(list(env.laps))
+        expected["throttle"].append(actions)
+        times.append(env.race_time)
+        if tick == 10 * CHUNK - 1:
+            # readable mid-run: the header is rewritten at every flushed chunk
+            assert TelemetryLog(path).ticks == 10 * CHUNK
+    env.stop_recording()
+    return path, {k: np.array(v) for k, v in expected.items()}, np.array(times)
+
+
+def test_columns_round_trip(recorded):
+    path, expected, times = recorded
+    log = TelemetryLog(path)
+    assert len(log) == TICKS and log.n_cars == 4
+    assert log.columns == [name for name, _ in RECORD_COLUMNS]
+    for name, dtype in RECORD_COLUMNS:
+        col = log[name]
+        assert isinstance(col, np.memmap)
+        assert col.dtype == np.dtype(dtype).newbyteorder("<")
+        assert col.shape == (TICKS, 4)
+        np.testing.assert_array_equal(col, expected[name].astype(dtype))
+    np.testing.assert_array_equal(log["time"], times)
+    assert log.tick_at(times[700]) == 700
+
+
+def test_lap_index_and_replay_seek(recorded):
+    path, expected, _ = recorded
+    log = TelemetryLog(path)
+    replay = Replay(log, chunk=CHUNK)
+    laps = expected["lap"]
+    assert laps.max() >= 3
+    for car in range(4):
+        for lap in range(1, laps[:, car].max() + 1):
+            first = int(np.argmax(laps[:, car] == lap))
+            assert log.lap_start(car, lap) == first
+            replay.seek_lap(car, lap)
+            assert replay.tick() == (first, 0.0)
+            state = replay.state()
+            assert state["lap"][car] == lap
+            np.testing.assert_array_equal(state["pos"], expected["pos"][first].astype("f4"))
+    with pytest.raises(KeyError):
+        replay.seek_lap(0, laps[:, 0].max() + 1)
+
+
+def test_replay_interpolates_between_ticks(recorded):
+    path, expected, times = recorded
+    replay = Replay(TelemetryLog(path), chunk=CHUNK)
+    i = 3 * CHUNK - 1   # the next tick lives in the following chunk
+    replay.seek((times[i] + times[i + 1]) / 2)
+    tick, alpha = replay.tick()
+    assert tick == i and alpha == pytest.approx(0.5)
+    speed = expected["speed"].astype("f4").astype(np.float64)
+    np.testing.assert_allclose(replay.state(["speed"])["speed"], (speed[i] + speed[i + 1]) / 2)
+
+
+def test_empty_log(tmp_path):
+    TelemetryRecorder(str(tmp_path), [("pos", "f4")], n_cars=2).close()
+    log = TelemetryLog(str(tmp_path))
+    assert len(log) == 0 and log["pos"].shape == (0, 2)
+    with pytest.raises(ValueError):
+        Replay(log)
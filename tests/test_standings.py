@@ -0,0 +1,42 @@
+import random
+import pytest
+from src.core.standings import Standings
+
+
+def _ticks(seed, n, ticks):
+    """Keys per tick: mostly small moves, sometimes big jumps, with plenty of ties."""
+    rng = random.Random(seed)
+    keys = [0] * n
+    for _ in range(ticks):
+        for i in range(n):
+            keys[i] += rng.choice((0, 0, 1, 1, 2, 5)) if rng.random() < 0.9 else rng.randint(-20, 20)
+        yield list(keys)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n", [1, 2, 5, 20])
+def test_update_matches_full_sort(seed, n):
+    standings = Standings(n)
+    expected = list(range(n))
+    for keys in _ticks(seed, n, 300):
+        old_rank = {car: r for r, car in enumerate(expected)}
+        # a fresh stable sort of the previous order: ties keep it
+        expected = sorted(expected, key=lambda i: keys[i], reverse=True)
+        new_rank = {car: r for r, car in enumerate(expected)}
+
+        assert standings.update(keys) == expected
+        assert standings.order == expected
+        assert all(standings.rank[car] == r for car, r in new_rank.items())
+
+        swaps = {(a, b) for a in range(n) for b in range(n)
+                 if old_rank[a] > old_rank[b] and new_rank[a] < new_rank[b]}
+        assert len(standings.overtakes) == len(swaps)
+        assert set(standings.overtakes) == swaps
+
+
+def test_untracked_overtakes():
+    tracked, untracked = Standings(6), Standings(6, overtakes=False)
+    for keys in _ticks(1, 6, 200):
+        assert untracked.update(keys) == tracked.update(keys)
+        assert untracked.rank == tracked.rank
+        assert untracked.overtakes == []